@@ -1,9 +1,12 @@
 """Handles generating game-boards from reelstrips"""
 
 import random
+from operator import itemgetter
 from typing import List
 from src.state.state import GeneralGameState
 from src.calculations.statistics import get_random_outcome
+from src.calculations.symbol import get_attribute_mask, get_board_arrays
+from src.config.runtime import get_runtime_config
 from src.events.events import reveal_event
 
 
@@ -12,128 +15,80 @@ class Board(GeneralGameState):
 
     def create_board_reelstrips(self) -> None:
         """Randomly selects stopping positions from a reelstrip."""
-        if self.config.include_padding:
-            top_symbols = []
-            bottom_symbols = []
-        self.refresh_special_syms()
-        self.reelstrip_id = get_random_outcome(
-            self.get_current_distribution_conditions()["reel_weights"][self.gametype]
+        reelstrip_id = get_random_outcome(self.get_current_distribution_conditions()["reel_weights"][self.gametype])
+        windows = get_runtime_config(self.config).get_reel_windows(reelstrip_id)
+        reel_positions = [random.randrange(0, windows.lengths[reel]) for reel in range(self.config.num_reels)]
+        self.create_board_from_stops(reelstrip_id, reel_positions)
+
+    def create_board_below_count(self, target: str, max_count: int) -> None:
+        """
+        Draw a board showing fewer than max_count target symbols (e.g. scatters), distributed as if
+        create_board_reelstrips() were repeated until the condition holds, using a single draw of reelstrip and stops.
+        Games overriding create_board_reelstrips() keep the redraw loop so their override still applies.
+        """
+        if type(self).create_board_reelstrips is not Board.create_board_reelstrips:
+            self.create_board_reelstrips()
+            while self.count_special_symbols(target) >= max_count:
+                self.create_board_reelstrips()
+            return
+        target_names = tuple(self.config.special_symbols.get(target, (target,)))
+        totals = tuple(range(max_count))
+        runtime = get_runtime_config(self.config)
+        reel_weights = runtime.get_conditional_reel_weights(
+            self.get_current_distribution_conditions()["reel_weights"][self.gametype], target_names, totals
         )
-        self.reelstrip = self.config.reels[self.reelstrip_id]
-        anticipation = [0] * self.config.num_reels
-        board = [[]] * self.config.num_reels
-        for i in range(self.config.num_reels):
-            board[i] = [0] * self.config.num_rows[i]
-        reel_positions = [random.randrange(0, len(self.reelstrip[reel])) for reel in range(self.config.num_reels)]
-        padding_positions = [0] * self.config.num_reels
-        first_scatter_reel = -1
-        for reel in range(self.config.num_reels):
-            reel_pos = reel_positions[reel]
-            if self.config.include_padding:
-                top_symbols.append(
-                    self.create_symbol(self.reelstrip[reel][(reel_pos - 1) % len(self.reelstrip[reel])])
-                )
-                bottom_symbols.append(
-                    self.create_symbol(
-                        self.reelstrip[reel][(reel_pos + len(board[reel])) % len(self.reelstrip[reel])]
-                    )
-                )
-            for row in range(self.config.num_rows[reel]):
-                sym_id = self.reelstrip[reel][(reel_pos + row) % len(self.reelstrip[reel])]
-                sym = self.create_symbol(sym_id)
-                board[reel][row] = sym
-                if sym.special:
-                    for special_symbol in self.special_syms_on_board:
-                        for s in self.config.special_symbols[special_symbol]:
-                            if board[reel][row].name == s:
-                                self.special_syms_on_board[special_symbol] += [{"reel": reel, "row": row}]
-                                if (
-                                    board[reel][row].check_attribute("scatter")
-                                    and len(self.special_syms_on_board[special_symbol])
-                                    >= self.config.anticipation_triggers[self.gametype]
-                                    and first_scatter_reel == -1
-                                ):
-                                    first_scatter_reel = reel + 1
-            padding_positions[reel] = (reel_positions[reel] + len(board[reel]) + 1) % len(self.reelstrip[reel])
-
-        if first_scatter_reel > -1 and first_scatter_reel != self.config.num_reels:
-            count = 1
-            for reel in range(first_scatter_reel, self.config.num_reels):
-                anticipation[reel] = count
-                count += 1
-
-        for r in range(1, self.config.num_reels):
-            if anticipation[r - 1] > anticipation[r]:
-                raise RuntimeError
+        reelstrip_id = get_random_outcome(reel_weights)
+        stops = runtime.get_reel_windows(reelstrip_id).get_count_sampler(target_names).draw(totals)
+        self.create_board_from_stops(reelstrip_id, stops)
 
-        self.board = board
+    def create_board_from_stops(self, reelstrip_id: str, reel_positions: list) -> None:
+        """Creates a gameboard with each reel stopped at the given position and records special symbols."""
+        self.reelstrip_id = reelstrip_id
+        self.reelstrip = self.config.reels[self.reelstrip_id]
+        self.build_board_from_windows(get_runtime_config(self.config).get_reel_windows(reelstrip_id), reel_positions)
         self.get_special_symbols_on_board()
-        self.reel_positions = reel_positions
-        self.padding_position = padding_positions
-        self.anticipation = anticipation
-        if self.config.include_padding:
-            self.top_symbols = top_symbols
-            self.bottom_symbols = bottom_symbols
 
     def force_board_from_reelstrips(self, reelstrip_id: str, force_stop_positions: List[List]) -> None:
         """Creates a gameboard from specified stopping positions."""
-        if self.config.include_padding:
-            top_symbols = []
-            bottom_symbols = []
-        self.refresh_special_syms()
         self.reelstrip_id = reelstrip_id
         self.reelstrip = self.config.reels[self.reelstrip_id]
-        anticipation = [0] * self.config.num_reels
-        board = [[]] * self.config.num_reels
-        for i in range(self.config.num_reels):
-            board[i] = [0] * self.config.num_rows[i]
+        windows = get_runtime_config(self.config).get_reel_windows(self.reelstrip_id)
 
         reel_positions = [None] * self.config.num_reels
         for r, s in force_stop_positions.items():
             reel_positions[r] = s - random.randint(0, self.config.num_rows[r] - 1)
         for r, _ in enumerate(reel_positions):
             if reel_positions[r] is None:
-                reel_positions[r] = random.randrange(0, len(self.reelstrip[r]))
+                reel_positions[r] = random.randrange(0, windows.lengths[r])
 
+        self.build_board_from_windows(windows, reel_positions)
+        self.refresh_special_syms()
+        for reel, stop in enumerate(reel_positions):
+            for special_type, rows in zip(windows.special_types, windows.get_special_rows(reel, stop)):
+                self.special_syms_on_board[special_type] += [{"reel": reel, "row": row} for row in rows]
+
+    def build_board_from_windows(self, windows: object, reel_positions: list) -> None:
+        """Create board and padding symbols for the given reel stops, along with padding positions and anticipation.
+        Symbols are created reel by reel (above, below, then visible rows) so special functions draw in a fixed
+        order."""
+        board = [None] * self.config.num_reels
+        top_symbols, bottom_symbols = [], []
         padding_positions = [0] * self.config.num_reels
-        first_scatter_reel = -1
-        for reel in range(self.config.num_reels):
-            reel_pos = reel_positions[reel]
+        for reel, reel_pos in enumerate(reel_positions):
+            window = windows.get_window(reel, reel_pos)
             if self.config.include_padding:
-                top_symbols.append(
-                    self.create_symbol(self.reelstrip[reel][(reel_pos - 1) % len(self.reelstrip[reel])])
-                )
-                bottom_symbols.append(
-                    self.create_symbol(
-                        self.reelstrip[reel][(reel_pos + len(board[reel])) % len(self.reelstrip[reel])]
-                    )
-                )
-            for row in range(self.config.num_rows[reel]):
-                sym_id = self.reelstrip[reel][(reel_pos + row) % len(self.reelstrip[reel])]
-                sym = self.create_symbol(sym_id)
-                board[reel][row] = sym
-
-                if sym.special:
-                    for special_symbol in self.special_syms_on_board:
-                        for s in self.config.special_symbols[special_symbol]:
-                            if board[reel][row].name == s:
-                                self.special_syms_on_board[special_symbol] += [{"reel": reel, "row": row}]
-                                if (
-                                    board[reel][row].check_attribute("scatter")
-                                    and len(self.special_syms_on_board[special_symbol])
-                                    >= self.config.anticipation_triggers[self.gametype]
-                                    and first_scatter_reel == -1
-                                ):
-                                    first_scatter_reel = reel + 1
-                padding_positions[reel] = (reel_positions[reel] + len(board[reel]) + 1) % len(self.reelstrip[reel])
-
-        if first_scatter_reel > -1 and first_scatter_reel <= self.config.num_reels:
-            count = 1
-            for reel in range(first_scatter_reel, self.config.num_reels):
-                anticipation[reel] = count
-                count += 1
+                top_symbols.append(self.create_symbol(window[0]))
+                bottom_symbols.append(self.create_symbol(window[-1]))
+            board[reel] = [self.create_symbol(name) for name in window[1:-1]]
+            padding_positions[reel] = (reel_pos + len(board[reel]) + 1) % windows.lengths[reel]
+
+        scatter_counts = windows.get_scatter_counts(reel_positions)
+        anticipation = [0] * self.config.num_reels
+        if sum(scatter_counts) > 0:
+            anticipation = windows.get_anticipation(scatter_counts, self.config.anticipation_triggers[self.gametype])
 
         self.board = board
+        self.sync_board_arrays()
         self.reel_positions = reel_positions
         self.padding_position = padding_positions
         self.anticipation = anticipation
@@ -141,13 +96,44 @@ class Board(GeneralGameState):
             self.top_symbols = top_symbols
             self.bottom_symbols = bottom_symbols
 
+    def sync_board_arrays(self) -> None:
+        """
+        Mark board_ids, board_multipliers and board_flags for rebuilding from self.board on next access.
+        Called whenever a board is drawn or tumbled; games which replace or modify board symbols
+        afterwards should call it again before reading the arrays.
+        """
+        self._board_arrays = None
+
+    def get_board_arrays(self) -> tuple:
+        """(symbol_ids, multipliers, flags) arrays for the current board, built on first use."""
+        if self.__dict__.get("_board_arrays") is None:
+            self._board_arrays = get_board_arrays(self.board)
+        return self._board_arrays
+
+    @property
+    def board_ids(self) -> object:
+        """int16 symbol ids of the current board, indexed [reel, row]."""
+        return self.get_board_arrays()[0]
+
+    @property
+    def board_multipliers(self) -> object:
+        """Numeric multiplier values of the current board, 0 where a symbol has none."""
+        return self.get_board_arrays()[1]
+
+    @property
+    def board_flags(self) -> object:
+        """Symbol attribute flags of the current board."""
+        return self.get_board_arrays()[2]
+
     def create_symbol(self, name: str) -> object:
         """Create a new symbol and assign relevant attributes."""
-        if name not in self.symbol_storage.symbols:
+        prototype = self.symbol_storage.symbols.get(name)
+        if prototype is None:
             raise ValueError(f"Symbol '{name}' is not registered.")
-        symObject = self.symbol_storage.create_symbol_state(name)
-        if name in self.special_symbol_functions:
-            for func in self.special_symbol_functions[name]:
+        symObject = prototype.create()
+        special_functions = self.special_symbol_functions.get(name)
+        if special_functions is not None:
+            for func in special_functions:
                 func(symObject)
 
         return symObject
@@ -161,13 +147,30 @@ class Board(GeneralGameState):
     def get_special_symbols_on_board(self) -> None:
         """Scans board for any active special symbols."""
         self.refresh_special_syms()
+        special_masks = [(special, get_attribute_mask(special)) for special in self.special_syms_on_board]
         for reel, _ in enumerate(self.board):
             for row, _ in enumerate(self.board[reel]):
                 if self.board[reel][row].special:
-                    for specialType in list(self.special_syms_on_board.keys()):
-                        if self.board[reel][row].check_attribute(specialType):
+                    for specialType, special_mask in special_masks:
+                        if self.board[reel][row].flags & special_mask:
                             self.special_syms_on_board[specialType].append({"reel": reel, "row": row})
 
+    def update_special_symbols_on_reels(self, reels: list) -> None:
+        """
+        Rescan the given reels for active special symbols, keeping the positions recorded on every other reel.
+        Positions stay in board order, as listed by get_special_symbols_on_board.
+        """
+        rescanned = set(reels)
+        special_cells = [(reel, row, sym) for reel in reels for row, sym in enumerate(self.board[reel]) if sym.special]
+        for special_type, positions in self.special_syms_on_board.items():
+            added = []
+            if len(special_cells) > 0:
+                special_mask = get_attribute_mask(special_type)
+                added = [{"reel": reel, "row": row} for reel, row, sym in special_cells if sym.flags & special_mask]
+            kept = [pos for pos in positions if pos["reel"] not in rescanned]
+            if len(added) > 0 or len(kept) < len(positions):
+                self.special_syms_on_board[special_type] = sorted(kept + added, key=itemgetter("reel"))
+
     def transpose_board_string(self, board_string: List[List[str]]) -> List[List[str]]:
         """Transpose symbol names in the format displayed to the player during the game."""
         return [list(row) for row in zip(*board_string)]
@@ -205,11 +208,7 @@ class Board(GeneralGameState):
             not (self.get_current_distribution_conditions()["force_freegame"])
             and self.gametype == self.config.basegame_type
         ):
-            self.create_board_reelstrips()
-            while self.count_special_symbols(trigger_symbol) >= min(
-                self.config.freespin_triggers[self.gametype].keys()
-            ):
-                self.create_board_reelstrips()
+            self.create_board_below_count(trigger_symbol, min(self.config.freespin_triggers[self.gametype].keys()))
         else:
             self.create_board_reelstrips()
         if emit_event:
@@ -225,26 +224,33 @@ class Board(GeneralGameState):
             force_criteria: The type of symbol to force on the board. (e.g. "scatter")
             num_force_syms: The number of symbols to force on the board.
 
-        Note: If it is possible for two target symbols to appear on one reel, this method
-        will not be able to guarantee an exact number of target symbols or actually random
-        reel positions. I.e. Ensure the reels do not have stacked scatter symbols.
+        The reelstrip is drawn from the configured reel_weights, restricted to reelstrips able to show
+        exactly num_force_syms target symbols. Reel stops are then drawn uniformly among every stop combination
+        showing exactly that many, so stacked or adjacent symbols are handled and no board is redrawn.
         """
-        while True:
-            self._force_special_board(force_criteria, num_force_syms)
-            if (
-                force_criteria in self.config.special_symbols
-                and self.count_special_symbols(force_criteria) == num_force_syms
-            ):
-                break
-            elif (
-                not (force_criteria in self.config.special_symbols)
-                and self.count_symbols_on_board(force_criteria) == num_force_syms
-            ):
-                break
+        reel_weights = self.get_current_distribution_conditions()["reel_weights"][self.gametype]
+        target_names = tuple(self.config.special_symbols.get(force_criteria, (force_criteria,)))
+        runtime = get_runtime_config(self.config)
+
+        reelstrip_id = get_random_outcome(reel_weights)
+        sampler = runtime.get_reel_windows(reelstrip_id).get_count_sampler(target_names)
+        if sampler.count_combinations([num_force_syms]) == 0:
+            possible_weights = {}
+            for reel_id, weight in reel_weights.items():
+                reel_sampler = runtime.get_reel_windows(reel_id).get_count_sampler(target_names)
+                if reel_sampler.count_combinations([num_force_syms]) > 0:
+                    possible_weights[reel_id] = weight
+            if len(possible_weights) == 0:
+                raise RuntimeError(f"No reelstrip in {list(reel_weights)} can show {num_force_syms} {force_criteria}.")
+            reelstrip_id = get_random_outcome(possible_weights)
+            sampler = runtime.get_reel_windows(reelstrip_id).get_count_sampler(target_names)
+
+        self.create_board_from_stops(reelstrip_id, sampler.draw([num_force_syms]))
 
     def _force_special_board(self, force_criteria: str, num_force_syms: int) -> None:
         """
-        Helper function for forcing special (or name specific) symbols
+        Helper function for forcing special (or name specific) symbols.
+        Places one target symbol on up to num_force_syms reels, without guaranteeing the exact count.
         """
         reelstrip_id = get_random_outcome(
             self.get_current_distribution_conditions()["reel_weights"][self.gametype]
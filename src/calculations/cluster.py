@@ -1,11 +1,16 @@
 from collections import defaultdict
 from abc import ABC
 from typing import List, Dict
+import numpy as np
+
 from src.calculations.board import Board
-from src.calculations.symbol import Symbol
+from src.calculations.symbol import Symbol, get_attribute_mask
 from src.config.config import Config
+from src.config.runtime import get_runtime_config
 from src.wins.multiplier_strategy import apply_mult
 
+_neighbour_tables = {}
+
 
 class Cluster:
     """Collection of cluster-evaluation functions."""
@@ -25,87 +30,159 @@ class Cluster:
         return (reel_to_overlay, row_to_overlay)
 
     @staticmethod
-    def get_neighbours(board: list[list[Symbol]], reel: int, row: int, local_checked: list) -> list:
-        """All neighbouring symbols within board range."""
-        neighbours = []
-        if reel > 0:
-            if (reel - 1, row) not in local_checked:
-                neighbours += [(reel - 1, row)]
-                local_checked += [(reel - 1, row)]
-        if reel < len(board) - 1:
-            if (reel + 1, row) not in local_checked:
-                neighbours += [(reel + 1, row)]
-                local_checked += [(reel + 1, row)]
-        if row > 0:
-            if (reel, row - 1) not in local_checked:
-                neighbours += [(reel, row - 1)]
-                local_checked += [(reel, row - 1)]
-        if row < len(board[reel]) - 1:
-            if (reel, row + 1) not in local_checked:
-                neighbours += [(reel, row + 1)]
-                local_checked += [(reel, row + 1)]
-        return neighbours
+    def get_neighbour_table(num_reels: int, num_rows: int) -> tuple:
+        """
+        Neighbouring cells of every cell on a flat board (cell = reel * num_rows + row),
+        in the order left, right, above, below.
+        """
+        table = _neighbour_tables.get((num_reels, num_rows))
+        if table is None:
+            table = []
+            for reel in range(num_reels):
+                for row in range(num_rows):
+                    cell = reel * num_rows + row
+                    neighbours = []
+                    if reel > 0:
+                        neighbours.append(cell - num_rows)
+                    if reel < num_reels - 1:
+                        neighbours.append(cell + num_rows)
+                    if row > 0:
+                        neighbours.append(cell - 1)
+                    if row < num_rows - 1:
+                        neighbours.append(cell + 1)
+                    table.append(tuple(neighbours))
+            table = tuple(table)
+            _neighbour_tables[(num_reels, num_rows)] = table
+        return table
 
     @staticmethod
     def in_cluster(board: list[list[Symbol]], reel: int, row: int, og_symbol: str, wild_key: str = "wild") -> bool:
         """Checks if a symbol (including wilds) match cluster type."""
-        if board[reel][row].check_attribute(wild_key) or og_symbol == board[reel][row].name:
+        if board[reel][row].flags & get_attribute_mask(wild_key) or og_symbol == board[reel][row].name:
             return True
 
     @staticmethod
-    def check_all_neighbours(
-        board: Board,
-        already_checked: list,
-        local_checked: list,
-        potential_cluster: list,
-        reel,
-        row,
-        og_symbol: str,
-        wild_key: str = "wild",
-    ):
-        """Recursively check neighbours for like-symbols."""
-        neighbours = Cluster.get_neighbours(board, reel, row, local_checked)
-        for reel_, row_ in neighbours:
-            if Cluster.in_cluster(board, reel_, row_, og_symbol, wild_key):
-                potential_cluster += [(reel_, row_)]
-                already_checked += [(reel_, row_)]
-                Cluster.check_all_neighbours(
-                    board,
-                    already_checked,
-                    local_checked,
-                    potential_cluster,
-                    reel_,
-                    row_,
-                    og_symbol,
-                    wild_key,
-                )
+    def label_clusters(symbol_ids: list, wilds: list, num_reels: int, num_rows: int) -> list:
+        """
+        Connected groups of like symbols on a flat int-coded board (cell = reel * num_rows + row).
+        Wilds join every group they touch, so a wild may belong to several clusters. Cells with a negative
+        symbol id are empty. Returns [(symbol_id, [cells])] in board order, each cluster listing its cells in the
+        order the previous recursive search visited them: all unvisited neighbours of a cell are claimed before
+        descending into the first matching one. The search keeps an explicit stack and visited bitmaps.
+        """
+        neighbour_table = Cluster.get_neighbour_table(num_reels, num_rows)
+        num_cells = num_reels * num_rows
+        in_cluster = bytearray(num_cells)
+        # Cells checked while searching from start are marked with start + 1, so the bitmap is reset for free
+        checked = [0] * num_cells
+        clusters = []
+        for start in range(num_cells):
+            symbol = symbol_ids[start]
+            if in_cluster[start] or wilds[start] or symbol < 0:
+                continue
+            stamp = start + 1
+            checked[start] = stamp
+            in_cluster[start] = 1
+            cells = [start]
+            claimed = neighbour_table[start]
+            for n in claimed:
+                checked[n] = stamp
+            stack = [iter(claimed)]
+            while stack:
+                for cell in stack[-1]:
+                    if wilds[cell] or symbol_ids[cell] == symbol:
+                        cells.append(cell)
+                        in_cluster[cell] = 1
+                        claimed = [n for n in neighbour_table[cell] if checked[n] != stamp]
+                        for n in claimed:
+                            checked[n] = stamp
+                        stack.append(iter(claimed))
+                        break
+                else:
+                    stack.pop()
+            clusters.append((symbol, cells))
+        return clusters
 
     @staticmethod
     def get_clusters(board: list[list[Symbol]], wild_key: str = "wild") -> dict:
-        """Return all symbol clusters of size >= 1."""
-        already_checked = []
-        clusters = defaultdict(list)
-        for reel, _ in enumerate(board):
-            for row, _ in enumerate(board[reel]):
-                if (reel, row) not in already_checked and not (board[reel][row].check_attribute(wild_key)):
-                    potential_cluster = [(reel, row)]
-                    already_checked += [(reel, row)]
-                    local_checked = [(reel, row)]
-                    symbol = board[reel][row].name
-                    Cluster.check_all_neighbours(
-                        board,
-                        already_checked,
-                        local_checked,
-                        potential_cluster,
-                        reel,
-                        row,
-                        symbol,
-                        wild_key,
-                    )
-                    clusters[symbol].append(potential_cluster)
+        """Return all symbol clusters of size >= 1, as {symbol: [[(reel, row), ...], ...]}."""
+        wild_mask = get_attribute_mask(wild_key)
+        num_rows = max(len(symbols) for symbols in board)
+        symbol_ids = [-1] * (len(board) * num_rows)
+        wilds = [0] * (len(board) * num_rows)
+        for reel, symbols in enumerate(board):
+            for row, sym in enumerate(symbols):
+                symbol_ids[reel * num_rows + row] = sym.prototype.symbol_id
+                wilds[reel * num_rows + row] = sym.flags & wild_mask
 
+        positions = [divmod(cell, num_rows) for cell in range(len(symbol_ids))]
+        clusters = defaultdict(list)
+        for _, cells in Cluster.label_clusters(symbol_ids, wilds, len(board), num_rows):
+            reel, row = positions[cells[0]]
+            clusters[board[reel][row].name].append([positions[cell] for cell in cells])
         return clusters
 
+    @staticmethod
+    def label_clusters_batch(symbol_ids: np.ndarray, wilds: np.ndarray, symbol_id: int) -> np.ndarray:
+        """
+        Cluster labels of one symbol for an (N, reels, rows) stack of int-coded boards.
+        Cells holding the symbol or a wild are labelled with the smallest flat cell index (reel * rows + row)
+        among the symbol cells connected to them, by propagating the minimum label between neighbours until
+        no label changes. Other cells, and wilds touching no symbol cell, are labelled reels * rows.
+        """
+        num_boards, num_reels, num_rows = symbol_ids.shape
+        num_cells = num_reels * num_rows
+        members = (symbol_ids == symbol_id) | wilds
+        cells = np.arange(num_cells).reshape(1, num_reels, num_rows)
+        labels = np.where((symbol_ids == symbol_id) & ~wilds, cells, num_cells)
+        while True:
+            neighbours = labels.copy()
+            np.minimum(neighbours[:, 1:], labels[:, :-1], out=neighbours[:, 1:])
+            np.minimum(neighbours[:, :-1], labels[:, 1:], out=neighbours[:, :-1])
+            np.minimum(neighbours[:, :, 1:], labels[:, :, :-1], out=neighbours[:, :, 1:])
+            np.minimum(neighbours[:, :, :-1], labels[:, :, 1:], out=neighbours[:, :, :-1])
+            neighbours = np.where(members, neighbours, num_cells)
+            if np.array_equal(neighbours, labels):
+                return labels
+            labels = neighbours
+
+    @staticmethod
+    def get_cluster_wins_batch(
+        symbol_ids: np.ndarray,
+        wilds: np.ndarray,
+        config: Config,
+        multipliers: np.ndarray = None,
+        global_multiplier: int = 1,
+    ) -> np.ndarray:
+        """
+        Total cluster win of each board in an (N, reels, rows) stack of int-coded boards, as paid by
+        evaluate_clusters. multipliers holds per-cell multiplier values (symbol multipliers or a position grid,
+        broadcast against the boards), summed over each cluster's cells with a minimum of 1.
+        global_multiplier may be a number or one value per board.
+        """
+        runtime = get_runtime_config(config)
+        num_boards, num_reels, num_rows = symbol_ids.shape
+        num_cells = num_reels * num_rows
+        cell_mults = np.zeros(symbol_ids.shape)
+        if multipliers is not None:
+            cell_mults = np.broadcast_to(np.where(multipliers >= 1, multipliers, 0), symbol_ids.shape)
+        offsets = (np.arange(num_boards) * (num_cells + 1)).reshape(-1, 1, 1)
+        max_kind = runtime.pays.shape[1] - 1
+
+        total_wins = np.zeros(num_boards)
+        for symbol_id in np.unique(symbol_ids[(symbol_ids >= 0) & ~wilds]):
+            labels = Cluster.label_clusters_batch(symbol_ids, wilds, symbol_id)
+            index = (labels + offsets).ravel()
+            size = num_boards * (num_cells + 1)
+            sizes = np.bincount(index, minlength=size).reshape(num_boards, -1)[:, :num_cells]
+            cluster_mults = np.bincount(index, weights=cell_mults.ravel(), minlength=size)
+            cluster_mults = np.maximum(cluster_mults.reshape(num_boards, -1)[:, :num_cells], 1)
+            clipped = np.minimum(sizes, max_kind)
+            pays = (sizes <= max_kind) & runtime.pays[symbol_id, clipped]
+            wins = np.where(pays, runtime.pay_values[symbol_id, clipped] * cluster_mults, 0.0)
+            total_wins += wins.sum(axis=1)
+        return total_wins * np.asarray(global_multiplier, dtype=np.float64).reshape(-1)
+
     @staticmethod
     def evaluate_clusters(
         config: Config,
@@ -116,15 +193,15 @@ class Cluster:
         return_data: dict = {"totalWin": 0, "wins": []},
     ) -> type:
         """Determine payout amount from cluster, including symbol multiplier and global multiplier value."""
-        exploding_symbols = []
         total_win = 0
+        multiplier_mask = get_attribute_mask(multiplier_key)
         for sym in clusters:
             for cluster in clusters[sym]:
                 syms_in_cluster = len(cluster)
                 if (syms_in_cluster, sym) in config.paytable:
                     cluster_mult = 0
                     for positions in cluster:
-                        if board[positions[0]][positions[1]].check_attribute(multiplier_key):
+                        if board[positions[0]][positions[1]].flags & multiplier_mask:
                             if int(board[positions[0]][positions[1]].get_attribute(multiplier_key)) > 0:
                                 cluster_mult += board[positions[0]][positions[1]].get_attribute(multiplier_key)
                     cluster_mult = max(cluster_mult, 1)
@@ -151,11 +228,6 @@ class Cluster:
 
                     for positions in cluster:
                         board[positions[0]][positions[1]].explode = True
-                        if {
-                            "reel": positions[0],
-                            "row": positions[1],
-                        } not in exploding_symbols:
-                            exploding_symbols.append({"reel": positions[0], "row": positions[1]})
 
         return board, return_data, total_win
 
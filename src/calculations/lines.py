@@ -1,8 +1,11 @@
 """Evaluates and records winds for lines games."""
 
-from src.calculations.symbol import Symbol
+import numpy as np
+
+from src.calculations.symbol import Symbol, get_attribute_mask, get_board_arrays
 from src.config.config import Config
-from src.wins.multiplier_strategy import apply_mult
+from src.config.runtime import get_runtime_config
+from src.wins.multiplier_strategy import apply_mult, apply_mult_array
 from src.events.events import (
     win_info_event,
     set_win_event,
@@ -10,6 +13,26 @@ from src.events.events import (
 )
 
 
+_run_length_tables = {}
+
+
+def get_run_length_table(num_reels: int) -> tuple:
+    """
+    (run_lengths, powers) for num_reels: a boolean line dotted with powers gives a bit code, and
+    run_lengths[code] is the number of leading True values on the line.
+    """
+    table = _run_length_tables.get(num_reels)
+    if table is None:
+        powers = 1 << np.arange(num_reels, dtype=np.int64)
+        codes = np.arange(1 << num_reels)
+        run_lengths = np.zeros(1 << num_reels, dtype=np.intp)
+        for reel in range(num_reels):
+            run_lengths += np.all((codes[:, None] >> np.arange(reel + 1)) & 1, axis=1)
+        table = (run_lengths, powers)
+        _run_length_tables[num_reels] = table
+    return table
+
+
 class Lines:
     """Collection of functions to handle line-win games."""
 
@@ -24,6 +47,38 @@ class Lines:
             "meta": meta_data,
         }
 
+    @staticmethod
+    def match_lines(line_ids: np.ndarray, line_wilds: np.ndarray, runtime: object, wild_sym: str = "W") -> tuple:
+        """
+        Match (lines, reels) arrays of symbol ids and wild flags, one row per line to evaluate.
+        Returns per-line arrays (wild_kinds, kinds, first_ids, wild_wins, base_wins): the number of leading wilds,
+        the length of the run of wilds and the first non-wild symbol, that symbol's id (-1 if the line is all wild)
+        and the paytable values of the wild-only and symbol combinations (0 where the combination does not pay).
+        """
+        num_reels = line_ids.shape[1]
+        run_lengths, powers = get_run_length_table(num_reels)
+        wild_kinds = run_lengths[line_wilds.dot(powers)]
+        first_ids = line_ids[np.arange(len(line_ids)), np.minimum(wild_kinds, num_reels - 1)]
+        first_ids[wild_kinds == num_reels] = -1
+        kinds = run_lengths[((line_ids == first_ids[:, None]) | line_wilds).dot(powers)]
+        wild_wins = runtime.line_pay_values[runtime.symbol_ids.get(wild_sym, -1), wild_kinds]
+        base_wins = runtime.line_pay_values[first_ids, kinds]
+        return wild_kinds, kinds, first_ids, wild_wins, base_wins
+
+    @staticmethod
+    def evaluate_paylines(symbol_ids: np.ndarray, wilds: np.ndarray, config: Config, wild_sym: str = "W") -> tuple:
+        """
+        Match every payline of an (N, reels, rows) stack of int-coded boards at once, with symbol ids as in
+        RuntimeConfig and wilds True for wild symbols. Returns the match_lines arrays shaped (N, lines).
+        """
+        runtime = get_runtime_config(config)
+        num_boards, num_lines, num_reels = len(symbol_ids), len(runtime.payline_ids), symbol_ids.shape[1]
+        cells = runtime.get_payline_cells(symbol_ids.shape[2])
+        line_ids = symbol_ids.reshape(num_boards, -1)[:, cells].reshape(-1, num_reels)
+        line_wilds = wilds.reshape(num_boards, -1)[:, cells].reshape(-1, num_reels)
+        matches = Lines.match_lines(line_ids, line_wilds, runtime, wild_sym)
+        return tuple(values.reshape(num_boards, num_lines) for values in matches)
+
     @staticmethod
     def get_lines(
         board: list[list[Symbol]],
@@ -33,90 +88,96 @@ class Lines:
         multiplier_method: str = "symbol",
         global_multiplier: int = 1,
     ):
-        """More efficient lines calculation"""
+        """Match all paylines at once with match_lines, then build win information for each paying line."""
         return_data = {
             "totalWin": 0,
             "wins": [],
         }
-
-        for line_index in config.paylines.keys():
+        runtime = get_runtime_config(config)
+        wild_mask = get_attribute_mask(wild_key)
+        if len(set(map(len, board))) == 1:
+            cells = [sym for symbols in board for sym in symbols]
+            line_cells = runtime.get_payline_cells(len(board[0]))
+            line_ids = np.array([sym.prototype.symbol_id for sym in cells], dtype=np.int16)[line_cells]
+            line_wilds = np.array([sym.flags & wild_mask for sym in cells], dtype=bool)[line_cells]
+            wild_kinds, kinds, _, wild_wins, base_wins = Lines.match_lines(
+                line_ids.reshape(-1, len(board)), line_wilds.reshape(-1, len(board)), runtime, wild_sym
+            )
+        else:
+            symbol_ids, _, flags = get_board_arrays(board)
+            matches = Lines.evaluate_paylines(symbol_ids[None], (flags[None] & wild_mask) != 0, config, wild_sym)
+            wild_kinds, kinds, _, wild_wins, base_wins = (values[0] for values in matches)
+
+        for idx in (wild_wins + base_wins).nonzero()[0]:
+            line_index = runtime.payline_ids[idx]
             line = config.paylines[line_index]
-            first_sym = board[0][line[0]]
-            finished_wild_win = False if first_sym.check_attribute(wild_key) else True
-            first_non_wild = first_sym if finished_wild_win else None
-            potential_line = [first_sym]
-
-            wild_matches = 0 * (finished_wild_win) + 1 * (not (finished_wild_win))
-            matches = 1 * (finished_wild_win) + 0 * (not (finished_wild_win))
-            base_win, wild_win = 0, 0
-
-            for reel in range(1, len(line)):
-                sym = board[reel][line[reel]]
-                if finished_wild_win:
-                    if sym.name == first_non_wild.name or sym.check_attribute(wild_key):
-                        matches += 1
-                    else:
-                        break
-                else:
-                    if sym.check_attribute(wild_key) and first_non_wild is None:
-                        wild_matches += 1
-                    elif first_non_wild is None:
-                        first_non_wild = sym
-                        matches += 1
-                        finished_wild_win = True
-                    else:
-                        break
-                potential_line.append(sym)
-
-            if (wild_matches, wild_sym) in config.paytable:
-                wild_win = config.paytable[(wild_matches, wild_sym)]
-            if first_non_wild is not None:
-                if (wild_matches + matches, first_non_wild.name) in config.paytable:
-                    base_win = config.paytable[(wild_matches + matches, first_non_wild.name)]
-
-            if base_win > 0 or wild_win > 0:
-                if wild_win > base_win:
-                    positions = [{"reel": idx, "row": line[idx]} for idx in range(0, wild_matches)]
-                    line_win, applied_mult = apply_mult(
-                        board, multiplier_method, global_multiplier=global_multiplier, win_amount=wild_win, positions=positions
-                    )
-                    win_dict = Lines.line_win_info(
-                        potential_line[0].name,
-                        wild_matches,
-                        line_win,
-                        positions,
-                        {
-                            "lineIndex": line_index,
-                            "multiplier": applied_mult,
-                            "winWithoutMult": wild_win,
-                            "globalMult": int(global_multiplier),
-                            "lineMultiplier": int(applied_mult / global_multiplier),
-                        },
-                    )
-                else:
-                    positions = [{"reel": idx, "row": line[idx]} for idx in range(0, matches + wild_matches)]
-                    line_win, applied_mult = apply_mult(
-                        board, multiplier_method, global_multiplier=global_multiplier, win_amount=base_win, positions=positions
-                    )
-                    win_dict = Lines.line_win_info(
-                        first_non_wild.name,
-                        matches + wild_matches,
-                        line_win,
-                        positions,
-                        {
-                            "lineIndex": line_index,
-                            "multiplier": applied_mult,
-                            "winWithoutMult": base_win,
-                            "globalMult": int(global_multiplier),
-                            "lineMultiplier": int(applied_mult / global_multiplier),
-                        },
-                    )
-
-                return_data["totalWin"] += line_win
-                return_data["wins"].append(win_dict)
+            wild_matches = int(wild_kinds[idx])
+            if wild_wins[idx] > base_wins[idx]:
+                symbol, kind = board[0][line[0]].name, wild_matches
+                win = config.paytable[(wild_matches, wild_sym)]
+            else:
+                symbol, kind = board[wild_matches][line[wild_matches]].name, int(kinds[idx])
+                win = config.paytable[(kind, symbol)]
+
+            positions = [{"reel": reel, "row": line[reel]} for reel in range(kind)]
+            line_win, applied_mult = apply_mult(
+                board, multiplier_method, global_multiplier=global_multiplier, win_amount=win, positions=positions
+            )
+            win_dict = Lines.line_win_info(
+                symbol,
+                kind,
+                line_win,
+                positions,
+                {
+                    "lineIndex": line_index,
+                    "multiplier": applied_mult,
+                    "winWithoutMult": win,
+                    "globalMult": int(global_multiplier),
+                    "lineMultiplier": int(applied_mult / global_multiplier),
+                },
+            )
+            return_data["totalWin"] += line_win
+            return_data["wins"].append(win_dict)
 
         return return_data
 
+    @staticmethod
+    def get_lines_batch(
+        symbol_ids: np.ndarray,
+        flags: np.ndarray,
+        config: Config,
+        multipliers: np.ndarray = None,
+        wild_key: str = "wild",
+        wild_sym: str = "W",
+        multiplier_method: str = "symbol",
+        global_multiplier: int = 1,
+    ) -> np.ndarray:
+        """
+        Total line win of each board in an (N, reels, rows) stack of int-coded boards, as built by get_board_arrays.
+        multipliers holds symbol multiplier values (None for no symbol multipliers) and global_multiplier may be
+        a number or one value per board. Totals equal get_lines()["totalWin"] up to floating point rounding.
+        """
+        wilds = (flags & get_attribute_mask(wild_key)) != 0
+        wild_kinds, kinds, _, wild_wins, base_wins = Lines.evaluate_paylines(symbol_ids, wilds, config, wild_sym)
+        use_wild = wild_wins > base_wins
+        wins = np.where(use_wild, wild_wins, base_wins)
+        win_kinds = np.where(use_wild, wild_kinds, kinds)
+
+        symbol_mults = np.zeros(wins.shape)
+        if multipliers is not None:
+            payline_rows = get_runtime_config(config).payline_rows
+            line_mults = multipliers[:, np.arange(payline_rows.shape[1]), payline_rows]
+            cumulative = np.cumsum(np.where(line_mults > 1, line_mults, 0), axis=2)
+            symbol_mults = np.take_along_axis(cumulative, np.maximum(win_kinds - 1, 0)[..., None], axis=2)[..., 0]
+            symbol_mults = np.where(win_kinds > 0, symbol_mults, 0)
+
+        global_multiplier = np.asarray(global_multiplier, dtype=np.float64).reshape(-1, 1)
+        line_wins, _ = apply_mult_array(multiplier_method, wins, global_multiplier, symbol_mults)
+        total_wins = np.zeros(len(symbol_ids))
+        for line in range(line_wins.shape[1]):
+            total_wins += line_wins[:, line]
+        return total_wins
+
     @staticmethod
     def emit_linewin_events(gamestate) -> None:
         """Transmit win events asociated with lines wins."""
@@ -1,14 +1,29 @@
 """Handle win calculation for pay-anywhere games"""
 
 from typing import List, Dict
-from collections import defaultdict
-from src.calculations.symbol import Symbol
+from itertools import compress
+import numpy as np
+
+from src.calculations.symbol import Symbol, get_attribute_mask
 from src.config.config import Config
+from src.config.runtime import get_runtime_config
+
+_board_positions = {}
 
 
 class Scatter:
     """Collection of Scatter-pays functions."""
 
+    @staticmethod
+    def get_board_positions(board: list[list[Symbol]]) -> tuple:
+        """(reel, row) of every cell of the board in reel-major order, cached per reel heights."""
+        reel_heights = tuple(map(len, board))
+        positions = _board_positions.get(reel_heights)
+        if positions is None:
+            positions = tuple((reel, row) for reel, height in enumerate(reel_heights) for row in range(height))
+            _board_positions[reel_heights] = positions
+        return positions
+
     @staticmethod
     def get_central_scatter_position(
         rows_for_overlay: List, winning_positions: List[Dict], max_reels: int, max_rows: int
@@ -31,6 +46,22 @@ class Scatter:
 
         return (reel_to_overlay, row_to_overlay)
 
+    @staticmethod
+    def get_overlay_position(excluded_rows: list, winning_positions: list, max_reels: int, max_rows: int) -> tuple:
+        """
+        Position on screen to display win amount, as get_central_scatter_position but for (reel, row) tuples:
+        the first position closest to the board centre whose row is not already used by an overlay.
+        """
+        overlay_position = (0, 0)
+        if len(excluded_rows) < max_reels:
+            closest_to_middle = 100
+            for reel, row in winning_positions:
+                dist_from_middle = (reel - max_reels / 2) ** 2 + (row - max_rows / 2) ** 2
+                if dist_from_middle < closest_to_middle and row not in excluded_rows:
+                    closest_to_middle = dist_from_middle
+                    overlay_position = (reel, row)
+        return overlay_position
+
     @staticmethod
     def get_scatterpay_wins(
         config: Config,
@@ -39,61 +70,133 @@ class Scatter:
         multiplier_key: str = "multiplier",
         global_multiplier: int = 1,
     ) -> dict:
-        """Return win data for all paying symbols"""
+        """
+        Return win data for all paying symbols.
+        Symbols are counted by id in one pass over the board, summing the multiplier values of those carrying one.
+        Wilds count towards every symbol. Paying counts are looked up in RuntimeConfig.pay_rows and positions are only
+        listed for paying symbols, in board order followed by the wild positions.
+        """
         return_data = {
             "totalWin": 0,
             "wins": [],
         }
-        rows_for_overlay = []
-        symbols_on_board = defaultdict(list)
-        wild_positions = []
-        total_win = 0.0
-        for reel_idx, reel in enumerate(board):
-            for row_idx, symbol in enumerate(reel):
-                if symbol.name not in config.special_symbols[wild_key]:
-                    symbols_on_board[symbol.name].append({"reel": reel_idx, "row": row_idx})
+        runtime = get_runtime_config(config)
+        multiplier_mask = get_attribute_mask(multiplier_key)
+        wild_ids = frozenset(runtime.symbol_ids[name] for name in config.special_symbols[wild_key])
+        # Histogram of symbol ids in order of first appearance, wilds included, and the cells carrying a multiplier
+        cell_ids, counts, multiplier_cells = [], {}, []
+        for reel in board:
+            for symbol in reel:
+                symbol_id = symbol.prototype.symbol_id
+                cell_ids.append(symbol_id)
+                if symbol_id in counts:
+                    counts[symbol_id] += 1
                 else:
-                    wild_positions.append({"reel": reel_idx, "row": row_idx})
-
-        # Update all symbol positions with wilds, as this symbol is shared
-        for sym in symbols_on_board:
-            if len(wild_positions) > 0:
-                symbols_on_board[sym].extend(wild_positions)
-            win_size = len(symbols_on_board[sym])
-            if (win_size, sym) in config.paytable:
-                symbol_mult = 0
-                for p in symbols_on_board[sym]:
-                    if board[p["reel"]][p["row"]].check_attribute(multiplier_key):
-                        symbol_mult += board[p["reel"]][p["row"]].get_attribute(multiplier_key)
-
-                    board[p["reel"]][p["row"]].assign_attribute({"explode": True})
-
-                symbol_mult = max(symbol_mult, 1)
-                overlay_position = Scatter.get_central_scatter_position(
-                    rows_for_overlay, symbols_on_board[sym], len(board), len(board[0])
-                )
-                rows_for_overlay.append(overlay_position[1])
-                symbol_win_data = {
-                    "symbol": sym,
-                    "win": config.paytable[(win_size, sym)] * global_multiplier * symbol_mult,
-                    "positions": symbols_on_board[sym],
-                    "meta": {
-                        "globalMult": global_multiplier,
-                        "clusterMult": symbol_mult,
-                        "winWithoutMult": config.paytable[(win_size, sym)],
-                        "overlay": {
-                            "reel": overlay_position[0],
-                            "row": overlay_position[1],
-                        },
+                    counts[symbol_id] = 1
+                if symbol.flags & multiplier_mask:
+                    multiplier_cells.append((symbol_id, symbol.attributes[multiplier_key]))
+        num_wilds = sum(counts.pop(wild_id, 0) for wild_id in wild_ids)
+
+        symbol_mults, wild_mults = {}, []
+        for symbol_id, value in multiplier_cells:
+            if symbol_id in wild_ids:
+                wild_mults.append(value)
+            else:
+                symbol_mults[symbol_id] = symbol_mults.get(symbol_id, 0) + value
+
+        total_win = 0.0
+        # A list rather than a set: repeated (0, 0) fallbacks count towards the max_reels overlay limit
+        rows_for_overlay = []
+        positions = None
+        explode = {"explode": True}
+        for symbol_id, count in counts.items():
+            win_size = count + num_wilds
+            # Names missing from the paytable and special symbols have id -1 and never pay
+            if symbol_id < 0 or win_size >= len(runtime.pay_rows[symbol_id]):
+                continue
+            pay = runtime.pay_rows[symbol_id][win_size]
+            if pay is None:
+                continue
+            sym = runtime.symbol_names[symbol_id]
+            if positions is None:
+                positions = Scatter.get_board_positions(board)
+                wild_positions = []
+                if num_wilds > 0:
+                    wild_positions = [positions[cell] for cell, cell_id in enumerate(cell_ids) if cell_id in wild_ids]
+            win_positions = list(compress(positions, map(symbol_id.__eq__, cell_ids)))
+            win_positions += wild_positions
+            for reel, row in win_positions:
+                board[reel][row].assign_attribute(explode)
+
+            symbol_mult = symbol_mults.get(symbol_id, 0)
+            for value in wild_mults:
+                symbol_mult += value
+            symbol_mult = max(symbol_mult, 1)
+            overlay_position = Scatter.get_overlay_position(rows_for_overlay, win_positions, len(board), len(board[0]))
+            rows_for_overlay.append(overlay_position[1])
+            symbol_win_data = {
+                "symbol": sym,
+                "win": pay * global_multiplier * symbol_mult,
+                "positions": [{"reel": reel, "row": row} for reel, row in win_positions],
+                "meta": {
+                    "globalMult": global_multiplier,
+                    "clusterMult": symbol_mult,
+                    "winWithoutMult": pay,
+                    "overlay": {
+                        "reel": overlay_position[0],
+                        "row": overlay_position[1],
                     },
-                }
-                total_win += symbol_win_data["win"]
-                return_data["wins"].append(symbol_win_data)
+                },
+            }
+            total_win += symbol_win_data["win"]
+            return_data["wins"].append(symbol_win_data)
 
         return_data["totalWin"] = total_win
 
         return return_data
 
+    @staticmethod
+    def get_scatterpay_wins_batch(
+        symbol_ids: np.ndarray,
+        wilds: np.ndarray,
+        config: Config,
+        multipliers: np.ndarray = None,
+        global_multiplier: int = 1,
+    ) -> np.ndarray:
+        """
+        Total scatter win of each board in an (N, reels, rows) stack of int-coded boards, as paid by
+        get_scatterpay_wins. Symbol counts and multiplier sums are taken with one bincount per stack, and wild
+        counts and multipliers are added to every symbol on the board. multipliers holds numeric per-cell values
+        (see get_board_arrays). global_multiplier may be a number or one value per board.
+        """
+        runtime = get_runtime_config(config)
+        num_boards = symbol_ids.shape[0]
+        num_symbols = len(runtime.symbol_names)
+        symbol_ids = symbol_ids.reshape(num_boards, -1)
+        wilds = wilds.reshape(num_boards, -1)
+        cell_mults = np.zeros(symbol_ids.shape)
+        if multipliers is not None:
+            cell_mults = np.broadcast_to(multipliers, (num_boards,) + multipliers.shape[-2:]).reshape(num_boards, -1)
+
+        # Wilds and empty cells are counted in a spare last column, which is dropped
+        counted = np.where((symbol_ids >= 0) & ~wilds, symbol_ids, num_symbols)
+        index = (counted + (np.arange(num_boards) * (num_symbols + 1)).reshape(-1, 1)).ravel()
+        size = num_boards * (num_symbols + 1)
+        counts = np.bincount(index, minlength=size).reshape(num_boards, -1)[:, :num_symbols]
+        symbol_mults = np.bincount(index, weights=cell_mults.ravel(), minlength=size)
+        symbol_mults = symbol_mults.reshape(num_boards, -1)[:, :num_symbols]
+        wild_counts = wilds.sum(axis=1, keepdims=True)
+        wild_mults = np.where(wilds, cell_mults, 0).sum(axis=1, keepdims=True)
+
+        max_kind = runtime.pays.shape[1] - 1
+        kinds = counts + wild_counts
+        clipped_kinds = np.minimum(kinds, max_kind)
+        symbols = np.arange(num_symbols)
+        pays = (counts > 0) & (kinds <= max_kind) & runtime.pays[symbols, clipped_kinds]
+        win_mults = np.maximum(symbol_mults + wild_mults, 1)
+        wins = np.where(pays, runtime.pay_values[symbols, clipped_kinds] * win_mults, 0.0)
+        return wins.sum(axis=1) * np.asarray(global_multiplier, dtype=np.float64).reshape(-1)
+
     @staticmethod
     def record_scatter_wins(gamestate) -> None:
         """Force-file description key generator."""
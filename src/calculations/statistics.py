@@ -1,12 +1,72 @@
 import random
+from bisect import bisect_left
+from itertools import accumulate
 from typing import Union
+import numpy as np
+
+_samplers = {}
+_MAX_CACHED_SAMPLERS = 4096
+
+
+class DistributionSampler:
+    """
+    Cumulative weight table for a {value: weight} distribution, built once and sampled by bisection.
+    Draws consume one random.random() call each, and select the same value as a linear cumulative scan
+    of the original dictionary, so results are unchanged for a given seed.
+    """
+
+    def __init__(self, distribution: dict):
+        self.values = tuple(distribution.keys())
+        self.cumulative = list(accumulate(distribution.values(), initial=0.0))[1:]
+        self.total = sum(distribution.values())
+
+    def draw(self) -> Union[float, int]:
+        """Single weighted draw using the global random state."""
+        return self.values[bisect_left(self.cumulative, random.uniform(0, self.total))]
+
+    def sample(self, n: int, rng: np.random.Generator = None) -> list:
+        """
+        n weighted draws. Without rng, the global random state is used and the result equals n calls to draw().
+        With a NumPy Generator, all rolls are drawn and located in one vectorized step.
+        """
+        if rng is None:
+            rolls = np.array([random.uniform(0, self.total) for _ in range(n)])
+        else:
+            rolls = rng.random(n) * self.total
+        indexes = np.searchsorted(self.cumulative, rolls, side="left")
+        return [self.values[idx] for idx in np.minimum(indexes, len(self.values) - 1)]
+
+
+def get_sampler(distribution: dict) -> DistributionSampler:
+    """
+    Cached sampler for a distribution, keyed by the identity of the dictionary. The cache holds a reference to
+    the dictionary, so its id cannot be reused by another object while cached. Distributions modified in place
+    must be invalidated with clear_samplers(), which recompile_runtime_config() also calls.
+    """
+    entry = _samplers.get(id(distribution))
+    if entry is None:
+        if len(_samplers) >= _MAX_CACHED_SAMPLERS:
+            _samplers.clear()
+        entry = (distribution, DistributionSampler(distribution))
+        _samplers[id(distribution)] = entry
+    return entry[1]
+
+
+def clear_samplers(distribution: dict = None) -> None:
+    """Drop the cached sampler for a distribution, or every cached sampler if none is given."""
+    if distribution is None:
+        _samplers.clear()
+    else:
+        _samplers.pop(id(distribution), None)
 
 
 def get_random_outcome(distribution: dict, totalWeight: float = None) -> Union[float, int]:
     """Returns a value from a distibution passed as a dictionary: {value : weight, ...}"""
+    if isinstance(distribution, DistributionSampler):
+        return distribution.draw()
     assert isinstance(distribution, dict), "distribution must be of type: dict "
     if totalWeight is None:
-        totalWeight = sum(distribution.values())
+        return get_sampler(distribution).draw()
     roll = random.uniform(0, totalWeight)
     cumulative = 0.0
     for value, weight in distribution.items():
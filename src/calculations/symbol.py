@@ -1,77 +1,176 @@
 """Handle symbol classes and initial generation."""
 
 from typing import Dict
+import numpy as np
+
+from src.config.runtime import get_runtime_config
+
+_set_slot = object.__setattr__
+
+_attribute_bits = {}
+_attribute_masks = {}
+
+
+def get_attribute_bit(attribute: str) -> int:
+    """Bit assigned to an attribute name, allocated the first time the name is seen."""
+    bit = _attribute_bits.get(attribute)
+    if bit is None:
+        bit = 1 << len(_attribute_bits)
+        _attribute_bits[attribute] = bit
+    return bit
+
+
+def get_attribute_mask(*attributes) -> int:
+    """Combined bits of several attribute names, for testing against Symbol.flags.
+    Returns None for names stored as symbol slots or properties, which are not tracked by flags."""
+    mask = _attribute_masks.get(attributes, 0)
+    if mask == 0:
+        if any(attribute in _UNMASKED_ATTRIBUTES for attribute in attributes):
+            return None
+        for attribute in attributes:
+            mask |= get_attribute_bit(attribute)
+        _attribute_masks[attributes] = mask
+    return mask
 
 
 class SymbolStorage:
-    """Initial symbol generation from configuration file."""
+    """Initial symbol generation from configuration file.
+    One immutable prototype is built per symbol name, and board symbols are created from it."""
 
     def __init__(self, config: object, all_symbols: list):
         self.config = config
-        self.symbols: Dict[str, Symbol] = {}
+        self.runtime = get_runtime_config(config)
+        self.paytables = {}
+        for tup, val in config.paytable.items():
+            assert isinstance(tup[1], str), "paytable expects string for symbol name, (kind, symbol): value"
+            self.paytables.setdefault(tup[1], []).append({str(tup[0]): val})
+        self.symbols: Dict[str, SymbolPrototype] = {}
         for symbol in all_symbols:
-            self.symbols[symbol] = Symbol(self.config, symbol)
+            self.symbols[symbol] = self.create_prototype(symbol)
+
+    def create_prototype(self, name: str) -> object:
+        """Resolve special properties and paytable values for a symbol name."""
+        special_properties = tuple(
+            special_property for special_property, names in self.config.special_symbols.items() if name in names
+        )
+        symbol_id = self.runtime.symbol_ids.get(name, -1)
+        return SymbolPrototype(name, special_properties, self.paytables.get(name), symbol_id)
 
     def create_symbol_state(self, symbol_name: str) -> object:
         """Create new symbol class instance."""
-        return Symbol(self.config, symbol_name)
+        return self.get_symbol(symbol_name).create()
 
     def get_symbol(self, name: str) -> object:
-        """Retrieve symbol class from name."""
+        """Retrieve symbol prototype from name."""
         if name not in self.symbols:
-            self.symbols[name] = Symbol(self.config, name)
+            self.symbols[name] = self.create_prototype(name)
         return self.symbols[name]
 
 
+def get_symbol_storage(config: object) -> SymbolStorage:
+    """Symbol storage cached on the configuration, rebuilt if the runtime configuration has been recompiled."""
+    storage = config.__dict__.get("_symbol_storage")
+    if storage is None or storage.runtime is not get_runtime_config(config):
+        storage = SymbolStorage(config, [])
+        config._symbol_storage = storage
+    return storage
+
+
+class SymbolPrototype:
+    """
+    Attributes shared by every symbol with the same name, computed once per game.
+    Prototypes are never modified after construction, so they are shared rather than copied.
+    """
+
+    __slots__ = ("name", "symbol_id", "special", "is_paying", "paytable", "attributes", "flags")
+
+    def __init__(self, name: str, special_properties: tuple, paytable: list = None, symbol_id: int = -1):
+        self.name = name
+        self.symbol_id = symbol_id
+        self.special = len(special_properties) > 0
+        self.is_paying = paytable is not None
+        self.paytable = paytable
+        self.attributes = {special_property: True for special_property in special_properties}
+        self.flags = get_attribute_mask(*special_properties, "special") if self.special else 0
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def create(self) -> object:
+        """New board symbol sharing this prototype's attributes until one is assigned."""
+        symbol = _new_symbol(Symbol)
+        _set_symbol_name(symbol, self.name)
+        _set_symbol_special(symbol, self.special)
+        _set_symbol_prototype(symbol, self)
+        _set_symbol_attributes(symbol, self.attributes)
+        _set_symbol_flags(symbol, self.flags)
+        return symbol
+
+
 class Symbol:
-    """Create symbol from name (string) and assign relevant attributes and special functions."""
+    """
+    Board symbol created from a SymbolPrototype. Special properties (wild, scatter, ...) and dynamic attributes
+    (multiplier, explode, ...) are read as regular attributes. The attribute dictionary is shared with the
+    prototype and copied on the first assignment, so unmodified symbols cost only a few slots.
+    flags holds one bit per attribute whose value is not False (see get_attribute_mask).
+    """
+
+    __slots__ = ("name", "special", "prototype", "attributes", "flags", "special_functions")
 
     def __init__(self, config: object, name: str) -> None:
-        self.name = name
-        self.special_functions = []
-        self.special = False
-        is_special = False
-        for special_property in config.special_symbols.keys():
-            if name in config.special_symbols[special_property]:
-                setattr(self, special_property, True)
-                is_special = True
+        symbol = get_symbol_storage(config).get_symbol(name).create()
+        for slot in ("name", "special", "prototype", "attributes", "flags"):
+            _set_slot(self, slot, getattr(symbol, slot))
+
+    def __getattr__(self, attribute: str):
+        if attribute == "special_functions":
+            return ()
+        if attribute.startswith("__") or attribute in Symbol.__slots__:
+            raise AttributeError(attribute)
+        try:
+            return self.attributes[attribute]
+        except KeyError:
+            raise AttributeError(f"Symbol '{self.name}' has no attribute '{attribute}'") from None
+
+    def __setattr__(self, attribute: str, value) -> None:
+        if attribute in Symbol.__slots__:
+            _set_slot(self, attribute, value)
+        else:
+            self.assign_attribute({attribute: value})
 
-        if is_special:
-            setattr(self, "special", True)
+    @property
+    def is_paying(self) -> bool:
+        """True if the symbol appears in the paytable."""
+        return self.prototype.is_paying
 
-        self.assign_paying_bool(config)
+    @property
+    def paytable(self) -> list:
+        """Paytable values for this symbol, as [{kind: value}], or None."""
+        return self.prototype.paytable
 
     def register_special_function(self, special_function: callable) -> None:
         """Assign special symbol function."""
-        self.special_functions.append(special_function)
+        self.special_functions = self.special_functions + (special_function,)
 
     def apply_special_function(self) -> callable:
         """Apply registered symbol function."""
         for fun in self.special_functions:
             fun(self)
 
-    def assign_paying_bool(self, config) -> None:
-        """Extract paytable from a given symbol."""
-        paying_symbols = set()
-        pay_value = []
-        for tup, val in config.paytable.items():
-            assert isinstance(tup[1], str), "paytable expects string for symbol name, (kind, symbol): value"
-            paying_symbols.add(tup[1])
-            if self.name == tup[1]:
-                pay_value.append({str(tup[0]): val})
-        if self.name not in list(paying_symbols):
-            self.is_paying = False
-            self.paytable = None
-        else:
-            self.is_paying = True
-            self.paytable = pay_value
-
     def is_special(self) -> bool:
         """Boolean if symbol has any special properties."""
         return self.special
 
     def check_attribute(self, *args) -> bool:
-        """Check if an attribute exists in a given list."""
+        """Check if any of the attributes exists with a value other than False."""
+        mask = _attribute_masks.get(args)
+        if mask is None:
+            mask = get_attribute_mask(*args)
+        if mask is not None:
+            return (self.flags & mask) != 0
         for arg in args:
             if hasattr(self, arg) and (not (isinstance(getattr(self, arg), bool)) or getattr(self, arg) is True):
                 return True
@@ -81,12 +180,55 @@ class Symbol:
         """Return existing attribute value."""
         return getattr(self, attribute)
 
+    def get_attributes(self) -> dict:
+        """Special properties and assigned attributes, in assignment order. Must not be modified."""
+        return self.attributes
+
     def assign_attribute(self, attribute_dict: dict) -> None:
-        """Assign attribute value to symbol."""
+        """Assign attribute value to symbol, copying the prototype's attributes on first write."""
+        if self.attributes is self.prototype.attributes:
+            _set_slot(self, "attributes", dict(self.attributes))
+        flags = self.flags
         for prop, value in attribute_dict.items():
-            setattr(self, prop, value)
+            self.attributes[prop] = value
+            if value is False:
+                flags &= ~get_attribute_bit(prop)
+            else:
+                flags |= get_attribute_bit(prop)
+        _set_slot(self, "flags", flags)
 
     def __eq__(self, name: str) -> bool:
         if self.name == name:
             return True
         return False
+
+
+def get_board_arrays(board: list, multiplier_key: str = "multiplier") -> tuple:
+    """
+    Integer-coded copy of a board as (symbol_ids, multipliers, flags) arrays of shape (reels, max rows).
+    Symbol ids index RuntimeConfig.symbol_names, multipliers hold numeric multiplier_key values (0 if unset)
+    and flags hold Symbol.flags. Cells below a shorter reel are -1 / 0.
+    """
+    assert len(_attribute_bits) < 64, "too many symbol attributes for int64 flags"
+    num_rows = max(len(reel) for reel in board)
+    symbol_ids = [[sym.prototype.symbol_id for sym in symbols] + [-1] * (num_rows - len(symbols)) for symbols in board]
+    flags = [[sym.flags for sym in symbols] + [0] * (num_rows - len(symbols)) for symbols in board]
+
+    multipliers = np.zeros((len(board), num_rows), dtype=np.float64)
+    multiplier_mask = get_attribute_mask(multiplier_key)
+    for reel, reel_flags in enumerate(flags):
+        for row, symbol_flags in enumerate(reel_flags):
+            if symbol_flags & multiplier_mask:
+                value = board[reel][row].attributes.get(multiplier_key)
+                if not isinstance(value, bool):
+                    multipliers[reel, row] = value
+    return np.array(symbol_ids, dtype=np.int16), multipliers, np.array(flags, dtype=np.int64)
+
+
+_new_symbol = Symbol.__new__
+_set_symbol_name = Symbol.name.__set__
+_set_symbol_special = Symbol.special.__set__
+_set_symbol_prototype = Symbol.prototype.__set__
+_set_symbol_attributes = Symbol.attributes.__set__
+_set_symbol_flags = Symbol.flags.__set__
+_UNMASKED_ATTRIBUTES = frozenset(Symbol.__slots__ + ("is_paying", "paytable")) - {"special"}
@@ -1,51 +1,55 @@
 from copy import copy
 from src.events.events import set_win_event, set_total_event
 from src.calculations.board import Board
+from src.calculations.symbol import get_attribute_mask
+from src.config.runtime import get_runtime_config
 
 
 class Tumble(Board):
     """General class for cascading/tumble game actions."""
 
     def tumble_board(self) -> None:
-        """Remove winning symbols from the active gameboard."""
+        """
+        Remove winning symbols from the active gameboard.
+        Surviving symbols are compacted to the bottom of each reel in place. The reel cursor then moves up the
+        reelstrip by the number of removed symbols, and refills are read from the precomputed window at the new stop
+        (see ReelWindowTable). Special symbol positions are only rescanned on reels which tumbled.
+        """
+        windows = get_runtime_config(self.config).get_reel_windows(self.reelstrip_id)
+        explode_mask = get_attribute_mask("explode")
+        include_padding = self.config.include_padding
         self.board_before_tumble = copy(self.board)
-        static_board = copy(self.board)
-        self.new_symbols_from_tumble = [[] for _ in range(len(static_board))]
-
-        for reel, _ in enumerate(static_board):
-            exploding_symbols = 0
-            copy_reel = static_board[reel]
-            exploding_symbols = sum(1 for x in static_board[reel] if x.check_attribute("explode"))
-
-            for i in range(exploding_symbols):
-                reel_pos = (self.reel_positions[reel] - 1) % len(self.reelstrip[reel])
-                self.reel_positions[reel] = reel_pos
-                # Take top symbol if it exists (don't add this to new_symbols_from_tumble)
-                if i == 0 and self.config.include_padding:
-                    insert_sym = self.top_symbols[reel]
-                else:
-                    nme = self.reelstrip[reel][(reel_pos) % len(self.reelstrip[reel])]
-                    insert_sym = self.create_symbol(nme)
-                    self.new_symbols_from_tumble[reel].insert(0, insert_sym)
-                copy_reel.insert(0, insert_sym)
-
-            copy_reel = [sym for sym in copy_reel if not (sym.check_attribute("explode"))]
-
-            if len(copy_reel) != self.config.num_rows[reel]:
-                raise RuntimeError(
-                    f"new reel length must match expected board size:\n expected: {self.config.num_rows[reel]} \n actual: {len(copy_reel)}"
-                )
-            static_board[reel] = copy_reel
-
-            if self.config.include_padding and exploding_symbols > 0:
-                padding_name = str(
-                    self.reelstrip[reel][(self.reel_positions[reel] - 1) % len(self.reelstrip[reel])]
-                )
-                self.top_symbols[reel] = self.create_symbol(padding_name)
-                self.new_symbols_from_tumble[reel].insert(0, self.top_symbols[reel])
-
-        self.board = static_board
-        self.get_special_symbols_on_board()
+        self.new_symbols_from_tumble = [[] for _ in range(len(self.board))]
+        tumbled_reels = []
+
+        for reel, symbols in enumerate(self.board):
+            survivors = [sym for sym in symbols if not sym.flags & explode_mask]
+            exploding_symbols = len(symbols) - len(survivors)
+            if exploding_symbols == 0:
+                continue
+            tumbled_reels.append(reel)
+            self.board_before_tumble[reel] = symbols[:]
+
+            reel_pos = (self.reel_positions[reel] - exploding_symbols) % windows.lengths[reel]
+            self.reel_positions[reel] = reel_pos
+            window = windows.get_window(reel, reel_pos)
+            # The top padding symbol drops into the board, so one less symbol is created
+            num_created = exploding_symbols - 1 if include_padding else exploding_symbols
+            new_symbols = [None] * num_created
+            # Symbols are created from the bottom of the refill upwards, so special functions draw in a fixed order
+            for row in range(num_created - 1, -1, -1):
+                new_symbols[row] = self.create_symbol(window[row + 1])
+
+            if include_padding:
+                symbols[:] = new_symbols + [self.top_symbols[reel]] + survivors
+                self.top_symbols[reel] = self.create_symbol(window[0])
+                new_symbols.insert(0, self.top_symbols[reel])
+            else:
+                symbols[:] = new_symbols + survivors
+            self.new_symbols_from_tumble[reel] = new_symbols
+
+        self.sync_board_arrays()
+        self.update_special_symbols_on_reels(tumbled_reels)
 
     def set_end_tumble_event(self) -> None:
         """Emit wins related to latest cumulative tumble sequence."""
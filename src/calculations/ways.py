@@ -1,8 +1,10 @@
 """Ways wins executables/calculations."""
 
-from collections import defaultdict
-from src.calculations.symbol import Symbol
+import numpy as np
+
+from src.calculations.symbol import Symbol, get_attribute_mask
 from src.config.config import Config
+from src.config.runtime import get_runtime_config
 from src.wins.multiplier_strategy import apply_mult
 from src.events.events import (
     win_info_event,
@@ -23,79 +25,64 @@ class Ways:
         multiplier_key: str = "multiplier",
         multiplier_strategy: str = "symbol",
     ):
-        """Ways calculation with possibility for global multiplier application."""
+        """
+        Ways calculation with possibility for global multiplier application.
+        Symbols are counted per reel (with the multiplier values of any symbols carrying one), kind and ways are
+        derived from the counts for every symbol on the first reel, and positions are only listed for winning symbols.
+        """
         return_data = {
             "totalWin": 0,
             "wins": [],
         }
         assert multiplier_strategy in ["symbol", "board", "global"]
         board_mult_count = 0
-        potential_wins = defaultdict()
-        wilds = [[] for _ in range(len(board))]
-        for reel, _ in enumerate(board):
-            for row, _ in enumerate(board[reel]):
-                sym = board[reel][row]
-                if reel == 0 and sym.name not in potential_wins:
-                    potential_wins[sym.name] = [[] for _ in range(len(board))]
-                    potential_wins[sym.name][0] = [{"reel": reel, "row": row}]
-                elif sym.name in potential_wins:
-                    potential_wins[sym.name][reel].append({"reel": reel, "row": row})
-
-                if sym.name in config.special_symbols[wild_key]:
-                    wilds[reel].append({"reel": reel, "row": row})
-                    if board[reel][row].check_attribute(multiplier_key):
-                        wilds[reel][-1][multiplier_key] = board[reel][row].get_attribute(multiplier_key)
-
-        for symbol in potential_wins:
+        multiplier_mask = get_attribute_mask(multiplier_key)
+        wild_names = frozenset(config.special_symbols[wild_key])
+        reel_symbols, reel_wilds = [], []
+        for symbols in board:
+            # Per symbol name, one entry per symbol on the reel: its multiplier value, or None without one
+            names, wilds = {}, []
+            for sym in symbols:
+                name = sym.name
+                value = sym.get_attribute(multiplier_key) if sym.flags & multiplier_mask else None
+                if name in names:
+                    names[name].append(value)
+                else:
+                    names[name] = [value]
+                if name in wild_names:
+                    wilds.append(value)
+            reel_symbols.append(names)
+            reel_wilds.append(wilds)
+
+        for symbol in reel_symbols[0]:
             kind, ways, cumulative_sym_mult = (0, 1, 0)
-            for reel, _ in enumerate(potential_wins[symbol]):
-                if len(potential_wins[symbol][reel]) > 0 or len(wilds[reel]) > 0:
-                    kind += 1
-                    reel_sym_count = 0
-                    # Note that here multipliers on subsequent reels multiply (not add, like in lines games)
-                    symbols_have_mult = False
-                    for s in potential_wins[symbol][reel]:
-                        if board[s["reel"]][s["row"]].check_attribute(multiplier_key):
-                            symbols_have_mult = True
-
-                    if symbols_have_mult is False:
-                        reel_sym_count += len(potential_wins[symbol][reel])
+            for reel, names in enumerate(reel_symbols):
+                symbol_values = names.get(symbol, ())
+                if len(symbol_values) == 0 and len(reel_wilds[reel]) == 0:
+                    break
+                kind += 1
+                # Note that here multipliers on subsequent reels multiply (not add, like in lines games)
+                reel_sym_count = 0
+                for value in symbol_values:
+                    if value is not None and multiplier_strategy == "symbol":
+                        reel_sym_count += value
                     else:
-                        reel_sym_count = 0
-                        for s in potential_wins[symbol][reel]:
-                            if (
-                                board[s["reel"]][s["row"]].check_attribute(multiplier_key)
-                                and multiplier_strategy == "symbol"
-                            ):
-                                reel_sym_count += board[s["reel"]][s["row"]].get_attribute(multiplier_key)
-                            else:
-                                reel_sym_count += 1
-                                if (
-                                    board[s["reel"]][s["row"]].check_attribute(multiplier_key)
-                                    and multiplier_strategy == "board"
-                                ):
-                                    gm = board[s["reel"]][s["row"]].get_attribute(multiplier_key)
-                                    board_mult_count += gm * (gm > 1)
-
-                    if len(wilds[reel]) > 0:
-                        for sym in wilds[reel]:
-                            if board[sym["reel"]][sym["row"]].check_attribute(
-                                multiplier_key
-                            ) and multiplier_strategy in ["board", "symbol"]:
-                                wild_mult_val = board[sym["reel"]][sym["row"]].get_attribute(multiplier_key)
-                                cumulative_sym_mult += wild_mult_val * (wild_mult_val > 1)
-                                if multiplier_strategy == "board":
-                                    reel_sym_count += 1
-                                    board_mult_count += wild_mult_val * (wild_mult_val > 1)
-                                else:
-                                    reel_sym_count += wild_mult_val
-                            else:
-                                reel_sym_count += 1
-
-                    ways *= reel_sym_count
+                        reel_sym_count += 1
+                        if value is not None and multiplier_strategy == "board":
+                            board_mult_count += value * (value > 1)
 
-                else:
-                    break
+                for value in reel_wilds[reel]:
+                    if value is not None and multiplier_strategy in ["board", "symbol"]:
+                        cumulative_sym_mult += value * (value > 1)
+                        if multiplier_strategy == "board":
+                            reel_sym_count += 1
+                            board_mult_count += value * (value > 1)
+                        else:
+                            reel_sym_count += value
+                    else:
+                        reel_sym_count += 1
+
+                ways *= reel_sym_count
 
             match multiplier_strategy:
                 case "global":
@@ -106,13 +93,6 @@ class Ways:
                     win_multiplier = 1
 
             if (kind, symbol) in config.paytable:
-                positions = []
-                for reel in range(kind):
-                    for pos in potential_wins[symbol][reel]:
-                        positions += [pos]
-                    for pos in wilds[reel]:
-                        positions += [pos]
-
                 win = round(config.paytable[kind, symbol] * ways, 2)
                 win_amt, multiplier = apply_mult(
                     board=board,
@@ -128,7 +108,7 @@ class Ways:
                         "symbol": symbol,
                         "kind": kind,
                         "win": win_amt,
-                        "positions": positions,
+                        "positions": Ways.get_ways_positions(board, symbol, kind, wild_names, multiplier_key),
                         "meta": {
                             "ways": ways,
                             "globalMult": multiplier,
@@ -141,6 +121,126 @@ class Ways:
 
         return return_data
 
+    @staticmethod
+    def get_ways_positions(board: list, symbol: str, kind: int, wild_names: list, multiplier_key: str) -> list:
+        """Positions of a ways win on the first kind reels: the symbol, then wilds (with any multiplier value)."""
+        multiplier_mask = get_attribute_mask(multiplier_key)
+        positions = []
+        for reel in range(kind):
+            positions += [{"reel": reel, "row": row} for row, sym in enumerate(board[reel]) if sym.name == symbol]
+            for row, sym in enumerate(board[reel]):
+                if sym.name in wild_names:
+                    positions.append({"reel": reel, "row": row})
+                    if sym.flags & multiplier_mask:
+                        positions[-1][multiplier_key] = sym.get_attribute(multiplier_key)
+        return positions
+
+    @staticmethod
+    def evaluate_ways(
+        symbol_ids: np.ndarray,
+        flags: np.ndarray,
+        multipliers: np.ndarray,
+        config: Config,
+        wild_key: str = "wild",
+        multiplier_key: str = "multiplier",
+        multiplier_strategy: str = "symbol",
+    ) -> tuple:
+        """
+        Ways of every symbol for an (N, reels, rows) stack of int-coded boards, as built by get_board_arrays.
+        A (N, reels, symbols) count matrix is built with bincount, together with per-reel wild counts and wild
+        multiplier sums, and kind and ways follow for all symbols at once. Returns (N, symbols) arrays
+        (kinds, ways, symbol_mults, board_mults, first_rows), indexed by RuntimeConfig symbol id:
+        board_mults accumulate over the symbols of the first reel in order of first_rows, as in get_ways_data,
+        and first_rows is the first row of each symbol on the first reel (number of rows if absent).
+        """
+        runtime = get_runtime_config(config)
+        num_boards, num_reels, num_rows = symbol_ids.shape
+        num_symbols = len(runtime.symbol_names) + 1
+        # Symbol ids are shifted by one so that unknown symbols and empty cells (-1) share bucket 0
+        buckets = symbol_ids.astype(np.intp) + 1
+        index = (np.arange(num_boards * num_reels).reshape(num_boards, num_reels, 1) * num_symbols + buckets).ravel()
+        size = num_boards * num_reels * num_symbols
+
+        has_mult = (flags & get_attribute_mask(multiplier_key)) != 0
+        values = np.where(has_mult & (multipliers != 0), multipliers, 1.0)
+        board_values = np.where(has_mult & (values > 1), values, 0.0)
+        is_wild = np.zeros(num_symbols, dtype=bool)
+        is_wild[[runtime.symbol_ids[name] + 1 for name in config.special_symbols[wild_key]]] = True
+        wilds = is_wild[buckets]
+
+        counts = np.bincount(index, minlength=size).reshape(num_boards, num_reels, num_symbols)
+        if multiplier_strategy == "symbol":
+            weights = np.bincount(index, weights=np.where(has_mult, values, 1.0).ravel(), minlength=size)
+            reel_counts = weights.reshape(counts.shape) + np.where(wilds, values, 0.0).sum(axis=2)[..., None]
+        else:
+            reel_counts = counts + wilds.sum(axis=2)[..., None]
+        wild_mults = np.where(wilds, board_values, 0.0).sum(axis=2)
+        if multiplier_strategy == "global":
+            wild_mults = np.zeros_like(wild_mults)
+
+        present = (counts > 0) | (wilds.any(axis=2)[..., None])
+        kinds = np.cumprod(present, axis=1).sum(axis=1)
+        ways = np.ones((num_boards, num_symbols))
+        symbol_mults = np.zeros((num_boards, num_symbols))
+        reel_board_mults = np.zeros((num_boards, num_symbols))
+        symbol_board_values = np.zeros((num_boards, num_reels, num_symbols))
+        if multiplier_strategy == "board":
+            symbol_board_values = np.bincount(index, weights=board_values.ravel(), minlength=size).reshape(counts.shape)
+        for reel in range(num_reels):
+            in_kind = reel < kinds
+            ways = np.where(in_kind, ways * reel_counts[:, reel], ways)
+            symbol_mults = np.where(in_kind, symbol_mults + wild_mults[:, reel, None], symbol_mults)
+            reel_board_mults = np.where(
+                in_kind, reel_board_mults + symbol_board_values[:, reel] + wild_mults[:, reel, None], reel_board_mults
+            )
+
+        first_rows = np.full((num_boards, num_symbols), num_rows)
+        for row in reversed(range(num_rows)):
+            first_rows[np.arange(num_boards), buckets[:, 0, row]] = row
+        board_mults = np.zeros((num_boards, num_symbols))
+        if multiplier_strategy == "board":
+            order = np.argsort(first_rows, axis=1, kind="stable")
+            cumulative = np.cumsum(np.take_along_axis(reel_board_mults, order, axis=1), axis=1)
+            np.put_along_axis(board_mults, order, cumulative, axis=1)
+
+        first_rows[:, 0] = num_rows
+        return tuple(values[:, 1:] for values in (kinds, ways, symbol_mults, board_mults, first_rows))
+
+    @staticmethod
+    def get_ways_batch(
+        symbol_ids: np.ndarray,
+        flags: np.ndarray,
+        multipliers: np.ndarray,
+        config: Config,
+        wild_key: str = "wild",
+        global_multiplier: int = 1,
+        multiplier_key: str = "multiplier",
+        multiplier_strategy: str = "symbol",
+    ) -> np.ndarray:
+        """
+        Total ways win of each board in an (N, reels, rows) stack of int-coded boards.
+        global_multiplier may be a number or one value per board. Totals equal get_ways_data()["totalWin"]
+        up to floating point rounding.
+        """
+        assert multiplier_strategy in ["symbol", "board", "global"]
+        kinds, ways, _, board_mults, first_rows = Ways.evaluate_ways(
+            symbol_ids, flags, multipliers, config, wild_key, multiplier_key, multiplier_strategy
+        )
+        runtime = get_runtime_config(config)
+        max_kind = runtime.pays.shape[1] - 1
+        clipped_kinds = np.minimum(kinds, max_kind)
+        symbols = np.arange(kinds.shape[1])
+        pays = (first_rows < symbol_ids.shape[2]) & (kinds <= max_kind) & runtime.pays[symbols, clipped_kinds]
+        wins = np.where(pays, np.round(runtime.pay_values[symbols, clipped_kinds] * ways, 2), 0.0)
+        match multiplier_strategy:
+            case "global":
+                win_multiplier = np.asarray(global_multiplier, dtype=np.float64).reshape(-1, 1)
+            case "board":
+                win_multiplier = np.maximum(board_mults, 1)
+            case "symbol":
+                win_multiplier = 1
+        return np.round(wins * win_multiplier, 2).sum(axis=1)
+
     @staticmethod
     def emit_wayswin_events(gamestate) -> None:
         """Transmit win events asociated with ways wins."""
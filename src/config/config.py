@@ -2,6 +2,7 @@
 
 from src.config.betmode import BetMode
 from src.config.paths import PATH_TO_GAMES
+from src.config.runtime import get_runtime_config
 import os
 
 
@@ -82,11 +83,8 @@ class Config:
         }
 
     def get_win_level(self, win_amount: float, winlevel_key: str) -> int:
-        levels = self.win_levels[winlevel_key]
-        for idx, pair in levels.items():
-            if win_amount >= pair[0] and win_amount < pair[1]:
-                return idx
-        return RuntimeError(f"winLevel not found: {win_amount}")
+        """Win level whose [lower, upper) range contains win_amount, found by bisection."""
+        return get_runtime_config(self).get_win_level(win_amount, winlevel_key)
 
     def get_special_symbol_names(self) -> None:
         """Get names of all special symbols"""
@@ -167,3 +167,19 @@ class OutputFiles:
     def get_final_segmented_name(self, betmode: str):
         """Final csv segmented wins lookup table name."""
         return os.path.join(self.lookup_path, f"lookUpTableSegmented_{betmode}.csv")
+
+    def get_criteria_cost_name(self, betmode: str):
+        """Per-criteria rejection cost report."""
+        return os.path.join(self.lookup_path, f"criteriaCost_{betmode}.csv")
+
+    def get_shard_path(self, shard_index: int, num_shards: int):
+        """Directory holding the bundle produced by one shard of a multi-node run."""
+        return os.path.join(self.library_path, "shards", f"shard_{shard_index}_of_{num_shards}")
+
+    def get_pilot_estimate_name(self):
+        """Projected cost of a run, estimated from a pilot."""
+        return os.path.join(self.library_path, "pilot_estimate.json")
+
+    def get_run_metrics_name(self):
+        """Live simulation throughput and progress metrics."""
+        return os.path.join(self.library_path, "run_metrics.json")
@@ -0,0 +1,336 @@
+"""Frozen view of a game configuration, precomputed once for the lookups made on every simulation."""
+
+import sys
+import random
+from copy import deepcopy
+from bisect import bisect_right
+import numpy as np
+
+from src.calculations.statistics import clear_samplers
+
+
+class RuntimeConfig:
+    """
+    Immutable lookup tables compiled from a game configuration:
+    bet modes and distributions keyed by name, win-level bisect tables, interned symbol names with
+    integer ids, paytable arrays indexed by (symbol_id, kind) and a (lines, reels) matrix of payline rows.
+    pay_rows holds the paytable's own values as pay_rows[symbol_id][kind], None where nothing pays.
+    line_pay_values extends pay_values to every kind up to num_reels, with a last all-zero row so that
+    symbol id -1 pays nothing.
+    BetMode and Distribution objects are referenced rather than copied, so force-keys recorded
+    during simulation are stored on the configuration's own bet modes.
+    """
+
+    def __init__(self, config: object):
+        bet_modes = {}
+        distributions = {}
+        for betmode in getattr(config, "bet_modes", []):
+            bet_modes[betmode.get_name()] = betmode
+            for dist in betmode.get_distributions():
+                distributions.setdefault((betmode.get_name(), dist._criteria), dist)
+        set_attr = super().__setattr__
+        set_attr("bet_modes", bet_modes)
+        set_attr("distributions", distributions)
+        win_levels = getattr(config, "win_levels", {})
+        set_attr("win_levels", {key: self.compile_win_levels(levels) for key, levels in win_levels.items()})
+        set_attr("win_level_items", {key: tuple(levels.items()) for key, levels in win_levels.items()})
+
+        symbol_names = set(kind_sym[1] for kind_sym in config.paytable)
+        for names in config.special_symbols.values():
+            symbol_names.update(names)
+        symbol_names = tuple(sys.intern(name) for name in sorted(symbol_names))
+        set_attr("symbol_names", symbol_names)
+        set_attr("symbol_ids", {name: idx for idx, name in enumerate(symbol_names)})
+
+        max_kind = max([kind_sym[0] for kind_sym in config.paytable], default=0)
+        pay_values = np.zeros((len(symbol_names), max_kind + 1), dtype=np.float64)
+        pays = np.zeros((len(symbol_names), max_kind + 1), dtype=bool)
+        for (kind, name), value in config.paytable.items():
+            assert isinstance(kind, int), "paytable expects integer kind, (kind, symbol): value"
+            pay_values[self.symbol_ids[name], kind] = value
+            pays[self.symbol_ids[name], kind] = True
+        pay_values.flags.writeable = False
+        pays.flags.writeable = False
+        set_attr("pay_values", pay_values)
+        set_attr("pays", pays)
+        pay_rows = [[None] * (max_kind + 1) for _ in symbol_names]
+        for (kind, name), value in config.paytable.items():
+            pay_rows[self.symbol_ids[name]][kind] = value
+        set_attr("pay_rows", tuple(tuple(row) for row in pay_rows))
+        line_pay_values = np.zeros((len(symbol_names) + 1, max(max_kind, getattr(config, "num_reels", 0)) + 1))
+        line_pay_values[: len(symbol_names), : max_kind + 1] = pay_values
+        line_pay_values.flags.writeable = False
+        set_attr("line_pay_values", line_pay_values)
+
+        paylines = getattr(config, "paylines", {})
+        payline_rows = np.array([paylines[idx] for idx in paylines], dtype=np.intp)
+        if len(paylines) == 0:
+            payline_rows = payline_rows.reshape(0, 0)
+        payline_rows.flags.writeable = False
+        set_attr("payline_ids", tuple(paylines))
+        set_attr("payline_rows", payline_rows)
+
+        reel_windows = {}
+        if hasattr(config, "num_rows"):
+            for reelstrip_id, reelstrip in getattr(config, "reels", {}).items():
+                reel_windows[reelstrip_id] = ReelWindowTable(
+                    reelstrip, config.num_rows, config.special_symbols, self.symbol_ids
+                )
+        set_attr("reel_windows", reel_windows)
+        set_attr("conditional_reel_weights", {})
+        set_attr("payline_cells", {})
+
+    def __deepcopy__(self, memo):
+        """
+        Copy sharing every compiled table with the original. Only the referenced BetMode and Distribution objects,
+        which record force-keys during simulation, are copied (along with the configuration holding them).
+        """
+        runtime = RuntimeConfig.__new__(RuntimeConfig)
+        memo[id(self)] = runtime
+        for name, value in self.__dict__.items():
+            object.__setattr__(runtime, name, value)
+        object.__setattr__(runtime, "bet_modes", deepcopy(self.bet_modes, memo))
+        object.__setattr__(runtime, "distributions", deepcopy(self.distributions, memo))
+        return runtime
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuntimeConfig is frozen, compile a new view after changing the configuration.")
+
+    def __delattr__(self, name):
+        raise AttributeError("RuntimeConfig is frozen, compile a new view after changing the configuration.")
+
+    @staticmethod
+    def compile_win_levels(levels: dict) -> tuple:
+        """(lower bounds, upper bounds, level ids) sorted by lower bound, or None if ranges overlap.
+        Overlapping ranges keep the first-match order of the win_levels dict."""
+        ordered = sorted(levels.items(), key=lambda level: level[1][0])
+        for (_, (_, upper)), (_, (lower, _)) in zip(ordered, ordered[1:]):
+            if upper > lower:
+                return None
+        return (
+            tuple(pair[0] for _, pair in ordered),
+            tuple(pair[1] for _, pair in ordered),
+            tuple(idx for idx, _ in ordered),
+        )
+
+    def get_betmode(self, mode_name: str) -> object:
+        """BetMode with the given name, or None."""
+        return self.bet_modes.get(mode_name)
+
+    def get_distribution(self, mode_name: str, criteria: str) -> object:
+        """Distribution for a criteria in a bet mode, or None."""
+        return self.distributions.get((mode_name, criteria))
+
+    def get_win_level(self, win_amount: float, winlevel_key: str) -> int:
+        """Level whose [lower, upper) range contains win_amount."""
+        table = self.win_levels[winlevel_key]
+        if table is None:
+            for idx, pair in self.win_level_items[winlevel_key]:
+                if pair[0] <= win_amount < pair[1]:
+                    return idx
+        else:
+            lowers, uppers, ids = table
+            pos = bisect_right(lowers, win_amount) - 1
+            if pos >= 0 and win_amount < uppers[pos]:
+                return ids[pos]
+        raise RuntimeError(f"winLevel not found: {win_amount}")
+
+    def get_reel_windows(self, reelstrip_id: str) -> object:
+        """Precomputed board windows for a reelstrip."""
+        return self.reel_windows[reelstrip_id]
+
+    def get_conditional_reel_weights(self, reel_weights: dict, target_names: tuple, totals: tuple) -> dict:
+        """
+        Reelstrip weights conditioned on the number of visible target_names symbols lying in totals.
+        Each weight is multiplied by the fraction of the reelstrip's stop combinations meeting the condition, so
+        drawing a reelstrip from these weights and then stops from StopCountSampler.draw(totals) gives the same
+        distribution as redrawing reelstrip and stops until the condition holds.
+        """
+        key = (id(reel_weights), target_names, tuple(totals))
+        # reel_weights is held alongside the result, so its id is not reused while cached
+        _, weights = self.conditional_reel_weights.get(key, (None, None))
+        if weights is None:
+            weights = {}
+            for reelstrip_id, weight in reel_weights.items():
+                sampler = self.reel_windows[reelstrip_id].get_count_sampler(target_names)
+                num_valid = sampler.count_combinations(totals)
+                if num_valid > 0:
+                    weights[reelstrip_id] = weight * (num_valid / sum(sampler.combinations[0]))
+            if len(weights) == 0:
+                raise RuntimeError(f"No reelstrip in {list(reel_weights)} can show a count in {list(totals)}.")
+            self.conditional_reel_weights[key] = (reel_weights, weights)
+        return weights
+
+    def get_payline_cells(self, num_rows: int) -> np.ndarray:
+        """Flat (reel * num_rows + row) index of every payline cell for boards with num_rows rows, line by line."""
+        cells = self.payline_cells.get(num_rows)
+        if cells is None:
+            cells = (np.arange(self.payline_rows.shape[1]) * num_rows + self.payline_rows).ravel()
+            cells.flags.writeable = False
+            self.payline_cells[num_rows] = cells
+        return cells
+
+    def get_symbol_id(self, name: str) -> int:
+        """Integer id of a symbol name."""
+        return self.symbol_ids[name]
+
+    def get_pay(self, kind: int, name: str) -> float:
+        """Paytable value for (kind, name), or 0.0 if the combination does not pay."""
+        symbol_id = self.symbol_ids.get(name)
+        if symbol_id is None or kind >= self.pays.shape[1] or not self.pays[symbol_id, kind]:
+            return 0.0
+        return float(self.pay_values[symbol_id, kind])
+
+
+class ReelWindowTable:
+    """
+    Every board window of a reelstrip, indexed [reel][stop]. A window holds the symbol above the board,
+    the visible rows and the symbol below, as names and as symbol ids. For each window the rows holding
+    each special symbol type (in config.special_symbols order) and the number of scatters are also stored,
+    so drawing a board needs one random stop per reel and anticipation follows from cumulative scatter counts.
+    """
+
+    def __init__(self, reelstrip: list, num_rows: list, special_symbols: dict, symbol_ids: dict):
+        special_types = list(special_symbols)
+        self.lengths = tuple(len(strip) for strip in reelstrip)
+        self.special_types = tuple(special_types)
+        self.names, self.ids, self.special_rows, self.scatter_counts = [], [], [], []
+        for reel, strip in enumerate(reelstrip):
+            rows = num_rows[reel]
+            names = tuple(
+                tuple(strip[(stop + row) % len(strip)] for row in range(-1, rows + 1)) for stop in range(len(strip))
+            )
+            special_rows = tuple(
+                tuple(
+                    tuple(row for row, name in enumerate(window[1:-1]) for s in special_symbols[t] if name == s)
+                    for t in special_types
+                )
+                for window in names
+            )
+            ids = np.array([[symbol_ids.get(name, -1) for name in window] for window in names], dtype=np.int16)
+            ids.flags.writeable = False
+            scatter_counts = np.zeros(len(strip), dtype=np.int32)
+            if "scatter" in special_types:
+                scatter_index = special_types.index("scatter")
+                scatter_counts[:] = [len(rows_by_type[scatter_index]) for rows_by_type in special_rows]
+            scatter_counts.flags.writeable = False
+            self.names.append(names)
+            self.ids.append(ids)
+            self.special_rows.append(special_rows)
+            self.scatter_counts.append(scatter_counts)
+        self.count_samplers = {}
+
+    def get_window(self, reel: int, stop: int) -> tuple:
+        """Symbol names (above board, visible rows..., below board) for a reel stop, wrapping around the strip."""
+        return self.names[reel][stop % self.lengths[reel]]
+
+    def get_special_rows(self, reel: int, stop: int) -> tuple:
+        """Visible rows holding each special symbol type, in special_types order."""
+        return self.special_rows[reel][stop % self.lengths[reel]]
+
+    def get_scatter_counts(self, stops: list) -> list:
+        """Number of visible scatters on each reel for the given stops."""
+        return [int(self.scatter_counts[reel][stop % self.lengths[reel]]) for reel, stop in enumerate(stops)]
+
+    def get_count_sampler(self, target_names: tuple) -> object:
+        """StopCountSampler over the number of visible target_names symbols on each reel, built on first use."""
+        sampler = self.count_samplers.get(target_names)
+        if sampler is None:
+            targets = set(target_names)
+            sampler = StopCountSampler(
+                [[sum(name in targets for name in window[1:-1]) for window in names] for names in self.names]
+            )
+            self.count_samplers[target_names] = sampler
+        return sampler
+
+    @staticmethod
+    def get_anticipation(scatter_counts: list, trigger: int) -> list:
+        """
+        Anticipation values from scatters per reel: once the cumulative number of scatters reaches trigger
+        on a reel holding a scatter, every following reel counts up from 1.
+        """
+        anticipation = [0] * len(scatter_counts)
+        total = 0
+        for reel, count in enumerate(scatter_counts):
+            total += count
+            if count > 0 and total >= trigger:
+                for offset, next_reel in enumerate(range(reel + 1, len(scatter_counts))):
+                    anticipation[next_reel] = offset + 1
+                break
+        return anticipation
+
+
+class StopCountSampler:
+    """
+    Draws reel stops uniformly among the combinations whose total symbol count lies in a given set, without retries.
+    stop_counts[reel][stop] is the number of target symbols visible at that stop. Stops are grouped by count, and
+    combinations[reel][total] holds the (exact, integer) number of stop combinations of reels reel.. with that total.
+    """
+
+    def __init__(self, stop_counts: list):
+        self.stops_by_count = []
+        for counts in stop_counts:
+            stops = [[] for _ in range(max(counts, default=0) + 1)]
+            for stop, count in enumerate(counts):
+                stops[count].append(stop)
+            self.stops_by_count.append(tuple(tuple(group) for group in stops))
+
+        combinations = [[1]]
+        for stops in reversed(self.stops_by_count):
+            following = combinations[0]
+            current = [0] * (len(following) + len(stops) - 1)
+            for count, group in enumerate(stops):
+                for total, num in enumerate(following):
+                    current[count + total] += len(group) * num
+            combinations.insert(0, current)
+        self.combinations = tuple(tuple(totals) for totals in combinations)
+
+    def count_combinations(self, totals) -> int:
+        """Number of stop combinations whose total count is in totals."""
+        return sum(self.combinations[0][t] for t in set(totals) if 0 <= t < len(self.combinations[0]))
+
+    def draw(self, totals) -> list:
+        """
+        Reel stops drawn uniformly from the combinations with a total count in totals, using one random draw.
+        The draw is decoded reel by reel: each count is chosen in proportion to its number of stops times the
+        number of ways the remaining reels can complete the total, then a stop with that count is selected.
+        """
+        reachable = sorted(t for t in set(totals) if 0 <= t < len(self.combinations[0]) and self.combinations[0][t])
+        if len(reachable) == 0:
+            raise RuntimeError(f"No reel stop combination has a total count in {sorted(set(totals))}.")
+        index = random.randrange(sum(self.combinations[0][t] for t in reachable))
+        for total in reachable:
+            if index < self.combinations[0][total]:
+                break
+            index -= self.combinations[0][total]
+
+        stops = []
+        for reel, stops_by_count in enumerate(self.stops_by_count):
+            following = self.combinations[reel + 1]
+            for count, group in enumerate(stops_by_count):
+                if count > total or total - count >= len(following):
+                    continue
+                block = len(group) * following[total - count]
+                if index < block:
+                    position, index = divmod(index, following[total - count])
+                    stops.append(group[position])
+                    total -= count
+                    break
+                index -= block
+        return stops
+
+
+def get_runtime_config(config: object) -> RuntimeConfig:
+    """Compiled view of config, built on first use and cached on the configuration."""
+    runtime = config.__dict__.get("_runtime_config")
+    if runtime is None:
+        runtime = RuntimeConfig(config)
+        config._runtime_config = runtime
+    return runtime
+
+
+def recompile_runtime_config(config: object) -> RuntimeConfig:
+    """Rebuild the compiled view, and drop cached distribution samplers, after the configuration has been modified."""
+    clear_samplers()
+    config.__dict__.pop("_runtime_config", None)
+    return get_runtime_config(config)
@@ -8,8 +8,7 @@ def json_ready_sym(symbol: object, special_attributes: list = None):
     """Converts a symbol to dictionary/JSON format."""
     assert special_attributes is not None
     print_sym = {"name": symbol.name}
-    attrs = vars(symbol)
-    for key, val in attrs.items():
+    for key, val in symbol.get_attributes().items():
         if key in special_attributes and symbol.get_attribute(key) != False:
             print_sym[key] = val
     return print_sym
@@ -0,0 +1,99 @@
+"""Record of completed simulation chunks, used to resume interrupted create_books() runs."""
+
+import os
+import json
+import hashlib
+
+from src.state.worker_pool import SimulationTask, SimulationResult
+from src.write_data.write_data import get_sha_256
+
+
+def get_task_fingerprint(task: SimulationTask) -> str:
+    """Hash of the criteria and seeds assigned to a task, a chunk is only reused if these are unchanged."""
+    assignment = json.dumps([task.get_sim_to_criteria(), task.get_simulation_seeds()])
+    return hashlib.sha256(assignment.encode("UTF-8")).hexdigest()
+
+
+class RunManifest:
+    """Append-only JSONL manifest of completed (betmode, repeat, chunk) simulation chunks and their file hashes."""
+
+    def __init__(self, temp_path: str, resume: bool = False):
+        self.temp_path = temp_path
+        self.path = os.path.join(temp_path, "manifest.jsonl")
+        self.entries = {}
+        if resume:
+            self.load()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def get_task_key(task: SimulationTask) -> str:
+        """Unique manifest key for a simulation chunk."""
+        return f"{task.betmode}_{task.repeat_count}_{task.chunk_index}_{task.sim_start}_{int(task.compress)}"
+
+    def load(self) -> None:
+        """Read existing manifest entries. A partially written final line (from a crash) is ignored."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="UTF-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.entries[entry["key"]] = entry
+
+    def get_verified_result(self, task: SimulationTask):
+        """Return the recorded SimulationResult if the chunk was completed with identical inputs and
+        all temporary files still match their recorded hashes, otherwise None."""
+        entry = self.entries.get(self.get_task_key(task))
+        if entry is None or entry["fingerprint"] != get_task_fingerprint(task):
+            return None
+        temp_files = {kind: os.path.join(self.temp_path, info["name"]) for kind, info in entry["files"].items()}
+        for kind, path in temp_files.items():
+            if not os.path.isfile(path) or get_sha_256(path) != entry["files"][kind]["sha256"]:
+                return None
+        return SimulationResult(
+            task.betmode,
+            task.chunk_index,
+            task.repeat_count,
+            entry["force_keys"],
+            temp_files,
+            entry.get("criteria_stats", {}),
+            entry.get("event_items"),
+        )
+
+    def record(self, task: SimulationTask, result: SimulationResult) -> None:
+        """Append a completed chunk, flushed to disk before the next chunk is recorded."""
+        entry = {
+            "key": self.get_task_key(task),
+            "fingerprint": get_task_fingerprint(task),
+            "force_keys": list(result.force_keys),
+            "criteria_stats": result.criteria_stats,
+            "event_items": result.event_items,
+            "files": {
+                kind: {"name": os.path.basename(path), "sha256": get_sha_256(path)}
+                for kind, path in result.temp_files.items()
+            },
+        }
+        self.entries[entry["key"]] = entry
+        with open(self.path, "a", encoding="UTF-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def split_completed_tasks(tasks: list, manifest: RunManifest = None) -> tuple:
+    """Separate tasks which still need simulating from chunks already verified in the manifest."""
+    if manifest is None:
+        return tasks, []
+    pending, completed = [], []
+    for task in tasks:
+        result = manifest.get_verified_result(task)
+        if result is not None:
+            completed.append(result)
+        else:
+            pending.append(task)
+    if len(completed) > 0:
+        print(f"Resuming: {len(completed)} of {len(tasks)} chunks already completed for {tasks[0].betmode}.")
+    return pending, completed
@@ -0,0 +1,86 @@
+"""Schedule the simulation and merging of several bet modes on a shared worker pool."""
+
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+
+from src.state.manifest import RunManifest
+from src.state.profiling import report_profile
+from src.state.worker_pool import run_worker_task
+from src.write_data.write_data import output_lookup_and_force_files, output_criteria_costs, output_event_items
+
+
+class ModeScheduler:
+    """
+    Runs the chunks of all bet modes through one worker pool, whose size sets the overall core budget.
+    Chunks are queued in mode order, so small modes (e.g. bonus buys) run side by side once the larger
+    modes have been handed out. As soon as the final chunk of a mode completes, its merge is started on a
+    background thread while the workers continue simulating the remaining modes.
+    Merges run one at a time since all modes share the force.json output.
+    """
+
+    def __init__(
+        self,
+        gamestate: object,
+        pool: Pool,
+        game_id: str,
+        compress: bool,
+        manifest: RunManifest = None,
+        profile_dir: str = None,
+    ):
+        self.gamestate = gamestate
+        self.pool = pool
+        self.game_id = game_id
+        self.compress = compress
+        self.manifest = manifest
+        self.profile_dir = profile_dir
+        self.modes = {}
+
+    def add_mode(self, betmode: str, tasks: list, completed: list) -> None:
+        """Queue pending tasks for a mode, along with any chunks already completed by a previous run."""
+        self.modes[betmode] = {
+            "tasks": tasks,
+            "results": list(completed),
+            "num_chunks": len(tasks) + len(completed),
+            "num_pending": len(tasks),
+        }
+
+    def finish_mode(self, betmode: str, merge_executor: ThreadPoolExecutor) -> object:
+        """Combine force-keys for a completed mode and start merging its temporary files."""
+        results = sorted(self.modes[betmode]["results"], key=lambda r: (r.repeat_count, r.chunk_index))
+        self.gamestate.combine(results, betmode)
+        self.gamestate.get_betmode(betmode).lock_force_keys()
+        output_criteria_costs(results, betmode, self.gamestate)
+        output_event_items(results, betmode, self.gamestate)
+        print("Finished simulating", betmode, flush=True)
+        if self.profile_dir is not None and self.modes[betmode]["num_pending"] > 0:
+            report_profile(self.game_id, betmode, self.profile_dir)
+        return merge_executor.submit(
+            output_lookup_and_force_files,
+            [result.temp_files for result in results],
+            self.game_id,
+            betmode,
+            self.gamestate,
+            compress=self.compress,
+        )
+
+    def run(self) -> None:
+        """Simulate all queued modes, returning once every mode has been merged."""
+        all_tasks = [task for mode in self.modes.values() for task in mode["tasks"]]
+        task_lookup = {(task.betmode, task.repeat_count, task.chunk_index): task for task in all_tasks}
+        merges = []
+        with ThreadPoolExecutor(max_workers=1) as merge_executor:
+            for betmode, mode in self.modes.items():
+                if len(mode["tasks"]) == 0:
+                    merges.append(self.finish_mode(betmode, merge_executor))
+
+            for result in self.pool.imap_unordered(run_worker_task, all_tasks, chunksize=1):
+                if self.manifest is not None:
+                    task = task_lookup[(result.betmode, result.repeat_count, result.chunk_index)]
+                    self.manifest.record(task, result)
+                mode = self.modes[result.betmode]
+                mode["results"].append(result)
+                if len(mode["results"]) == mode["num_chunks"]:
+                    merges.append(self.finish_mode(result.betmode, merge_executor))
+
+            for merge in merges:
+                merge.result()
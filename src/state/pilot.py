@@ -0,0 +1,194 @@
+"""Short pilot run used to project the cost of a full create_books() run before it is started."""
+
+import os
+import sys
+import json
+import math
+import time
+import tracemalloc
+from copy import deepcopy
+import zstandard as zstd
+
+from src.state.sim_assignment import string_to_int
+from src.write_data.write_data import BookWriter, make_lookup_tables, make_lookup_pay_split
+
+
+def get_traced_size(obj: object) -> int:
+    """Bytes allocated by a deep copy of obj, used as an estimate of the memory it holds."""
+    tracemalloc.start()
+    try:
+        copied = deepcopy(obj)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del copied
+    return size
+
+
+def get_process_memory() -> int:
+    """Peak resident memory of the current process, used as the baseline memory of each forked worker.
+    Returns 0 where the resource module is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_pilot(gamestate: object, mode_criteria: dict, sims_per_criteria: int, pilot_path: str) -> dict:
+    """
+    Simulate sims_per_criteria books for every criteria in each mode, in the current process.
+    mode_criteria maps each bet mode to (criteria counts for the full run, True if seeds are derived from
+    the criteria name). Returns per-criteria time, attempts and book sizes, along with per-mode lookup
+    table bytes and the memory retained per simulation by the library and recorded events.
+    """
+    os.makedirs(pilot_path, exist_ok=True)
+    pilot = {}
+    for betmode, (criteria_counts, criteria_seeds) in mode_criteria.items():
+        print("Running pilot for", betmode, flush=True)
+        pilot_state = deepcopy(gamestate)
+        pilot_state.reset_betmode(betmode)
+        criteria_results = {}
+        sim = 0
+        for criteria in criteria_counts:
+            books_path = os.path.join(pilot_path, f"books_{betmode}_{criteria}.jsonl")
+            pilot_state.book_writer = BookWriter(books_path)
+            attempts = 0
+            start = time.perf_counter()
+            try:
+                for count in range(sims_per_criteria):
+                    pilot_state.criteria = criteria
+                    pilot_state.run_spin(sim, string_to_int(criteria) + count if criteria_seeds else sim)
+                    attempts += max(pilot_state.repeat_count, 1)
+                    sim += 1
+            finally:
+                pilot_state.book_writer.close()
+                pilot_state.book_writer = None
+            elapsed = time.perf_counter() - start
+
+            with open(books_path, "rb") as f:
+                books = f.read()
+            criteria_results[criteria] = {
+                "seconds_per_sim": elapsed / sims_per_criteria,
+                "attempts_per_sim": attempts / sims_per_criteria,
+                "book_bytes": len(books) / sims_per_criteria,
+                "compressed_book_bytes": len(zstd.ZstdCompressor().compress(books)) / sims_per_criteria,
+            }
+
+        lookup_path = os.path.join(pilot_path, f"lookUpTable_{betmode}")
+        segmented_path = os.path.join(pilot_path, f"lookUpTableSegmented_{betmode}")
+        make_lookup_tables(pilot_state, lookup_path)
+        make_lookup_pay_split(pilot_state, segmented_path)
+        pilot[betmode] = {
+            "criteria": criteria_results,
+            "lookup_bytes": (os.path.getsize(lookup_path) + os.path.getsize(segmented_path)) / sim,
+            "memory_per_sim": get_traced_size((pilot_state.library, pilot_state.recorded_events)) / sim,
+        }
+    return pilot
+
+
+def get_batch_peak_memory(estimate: dict, batch_size: int, threads: int, chunks_per_thread: int = 4) -> float:
+    """Peak memory with every worker holding a chunk of batch_size / chunks_per_thread simulations,
+    while the parent merges a mode's output files."""
+    chunk_sims = math.ceil(batch_size / chunks_per_thread)
+    worker_memory = estimate["worker_base_memory"] + chunk_sims * estimate["memory_per_sim"]
+    return threads * worker_memory + estimate["merge_memory"]
+
+
+def is_valid_batch_size(batch_size: int, threads: int, num_sims: list) -> bool:
+    """Matches the mode-sims/(batch * threads) requirement checked by create_books()."""
+    return all(ns <= batch_size * batch_size or ns % (threads * batch_size) == 0 for ns in num_sims)
+
+
+def recommend_batch_size(
+    estimate: dict, memory_budget: float, threads: int, num_sims: list, chunks_per_thread: int = 4
+) -> int:
+    """Largest valid batch size whose projected peak memory fits within memory_budget bytes, or None."""
+    available = memory_budget - estimate["merge_memory"] - threads * estimate["worker_base_memory"]
+    if available <= 0:
+        return None
+    max_batch = int(available / threads / max(estimate["memory_per_sim"], 1) * chunks_per_thread)
+    max_batch = min(max_batch, math.ceil(max(num_sims) / threads))
+    for batch_size in range(max_batch, 0, -1):
+        if is_valid_batch_size(batch_size, threads, num_sims):
+            return batch_size
+    return None
+
+
+def estimate_run_cost(
+    gamestate: object,
+    pilot: dict,
+    mode_criteria: dict,
+    num_sims: dict,
+    batch_size: int,
+    threads: int,
+    compress: bool,
+    memory_budget_gb: float = None,
+    chunks_per_thread: int = 4,
+) -> dict:
+    """Project wall-time, disk and peak memory of the full run, weighting pilot results by each criteria's share."""
+    chunk_sims = math.ceil(batch_size / chunks_per_thread)
+    modes = {}
+    for betmode, mode_pilot in pilot.items():
+        criteria_counts = mode_criteria[betmode][0]
+        total = sum(criteria_counts.values())
+
+        def weighted(key):
+            return sum(count / total * mode_pilot["criteria"][c][key] for c, count in criteria_counts.items())
+
+        book_bytes = weighted("compressed_book_bytes" if compress else "book_bytes")
+        modes[betmode] = {
+            "num_sims": num_sims[betmode],
+            "sims_per_sec": round(threads / weighted("seconds_per_sim"), 2),
+            "mean_attempts": round(weighted("attempts_per_sim"), 3),
+            "book_bytes": round(weighted("book_bytes"), 1),
+            "wall_seconds": round(num_sims[betmode] * weighted("seconds_per_sim") / threads, 1),
+            "disk_bytes": int(num_sims[betmode] * (book_bytes + mode_pilot["lookup_bytes"])),
+            # Compressed books are streamed, uncompressed books are merged one chunk file at a time
+            "merge_memory": 0 if compress else int(min(chunk_sims, num_sims[betmode]) * weighted("book_bytes")),
+        }
+
+    estimate = {
+        "batch_size": batch_size,
+        "threads": threads,
+        "wall_seconds": round(sum(m["wall_seconds"] for m in modes.values()), 1),
+        "disk_bytes": sum(m["disk_bytes"] for m in modes.values()),
+        "worker_base_memory": max(get_process_memory(), get_traced_size(gamestate)),
+        "memory_per_sim": max(p["memory_per_sim"] for p in pilot.values()),
+        "merge_memory": max(m["merge_memory"] for m in modes.values()),
+        "modes": modes,
+    }
+    estimate["peak_memory"] = int(get_batch_peak_memory(estimate, batch_size, threads, chunks_per_thread))
+    if memory_budget_gb is not None:
+        estimate["memory_budget"] = int(memory_budget_gb * 1e9)
+        estimate["recommended_batch_size"] = recommend_batch_size(
+            estimate, estimate["memory_budget"], threads, list(num_sims.values()), chunks_per_thread
+        )
+    return estimate
+
+
+def print_pilot_report(estimate: dict) -> None:
+    """Summarize projected run cost per mode."""
+    print("\nPilot estimate:")
+    for betmode, mode in estimate["modes"].items():
+        print(
+            f"  {betmode}: {mode['num_sims']} sims, {mode['sims_per_sec']} sims/s,",
+            f"{mode['mean_attempts']} spins per accepted sim, {mode['book_bytes']} bytes per book,",
+            f"{round(mode['wall_seconds'] / 3600, 2)} hours, {round(mode['disk_bytes'] / 1e9, 3)} GB",
+        )
+    print(
+        f"  total: {round(estimate['wall_seconds'] / 3600, 2)} hours, {round(estimate['disk_bytes'] / 1e9, 3)} GB disk,",
+        f"{round(estimate['peak_memory'] / 1e9, 3)} GB peak memory with batch_size {estimate['batch_size']}",
+        flush=True,
+    )
+    if "memory_budget" in estimate:
+        print(
+            f"  recommended batch_size for {estimate['memory_budget'] / 1e9} GB: {estimate['recommended_batch_size']}"
+        )
+
+
+def write_pilot_estimate(estimate: dict, name: str) -> None:
+    """Write the projected run cost as JSON."""
+    with open(name, "w", encoding="UTF-8") as f:
+        f.write(json.dumps(estimate, indent=4))
@@ -0,0 +1,47 @@
+"""Per-worker cProfile collection, merged into a single profile and report per bet mode."""
+
+import os
+import glob
+import shutil
+import pstats
+import cProfile
+import subprocess
+
+_profilers = {}
+
+
+def get_worker_profile_path(profile_dir: str, betmode: str) -> str:
+    """Profile file written by the current process for a bet mode."""
+    return os.path.join(profile_dir, f"{betmode}_worker_{os.getpid()}.prof")
+
+
+def run_profiled(profile_dir: str, betmode: str, func: callable, *args):
+    """Call func under this process's profiler for the bet mode. Statistics accumulate over all
+    calls made by the process and are saved after each one, so no shutdown hook is needed in workers."""
+    profiler = _profilers.setdefault((profile_dir, betmode), cProfile.Profile())
+    profiler.enable()
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(get_worker_profile_path(profile_dir, betmode))
+
+
+def merge_profiles(profile_dir: str, betmode: str, output_path: str) -> pstats.Stats:
+    """Combine all worker profiles for a bet mode into one pstats file."""
+    profile_files = sorted(glob.glob(os.path.join(profile_dir, f"{betmode}_worker_*.prof")))
+    assert len(profile_files) > 0, f"no worker profiles found for {betmode}"
+    stats = pstats.Stats(*profile_files)
+    stats.dump_stats(output_path)
+    return stats
+
+
+def report_profile(game_id: str, betmode: str, profile_dir: str, top_n: int = 25) -> str:
+    """Merge worker profiles, print the top_n functions by cumulative time and open snakeviz if installed."""
+    output_path = f"games/{game_id}/simulationProfile_{betmode}.prof"
+    stats = merge_profiles(profile_dir, betmode, output_path)
+    print(f"\nProfile for {betmode} saved to {output_path}, top {top_n} functions by cumulative time:")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+    if shutil.which("snakeviz") is not None:
+        subprocess.Popen(["snakeviz", output_path])
+    return output_path
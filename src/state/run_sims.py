@@ -1,15 +1,19 @@
 import time
-import math
-import random
-import hashlib
-from multiprocessing import Process, Manager
-import cProfile
 from warnings import warn
+import os
 import shutil
-import asyncio
 from typing import Dict
+import numpy as np
 
-from src.write_data.write_data import output_lookup_and_force_files
+from src.write_data.write_data import output_lookup_and_force_files, output_criteria_costs, output_event_items
+from src.state.worker_pool import SimulationTask, count_task_sims, create_worker_pool, run_task, run_tasks_on_pool
+from src.state.manifest import RunManifest, split_completed_tasks
+from src.state.mode_scheduler import ModeScheduler
+from src.state.profiling import report_profile
+from src.state.telemetry import RunTelemetry, ProgressReporter
+from src.state.shards import create_shard_bundle
+from src.state.pilot import run_pilot, estimate_run_cost, print_pilot_report, write_pilot_estimate
+from src.state.sim_assignment import SimulationAssignment, get_code_dtype, release_shared_assignments, string_to_int
 
 
 def create_books(
@@ -20,8 +24,17 @@ def create_books(
     threads: int,
     compress: bool,
     profiling: bool,
+    resume: bool = False,
+    shard: tuple = None,
+    pilot_sims: int = 0,
+    memory_budget_gb: float = None,
 ):
-    """Main run-function for simulating game outcomes and outputting all files."""
+    """Main run-function for simulating game outcomes and outputting all files.
+    If resume is True, verified chunks recorded in the temporary manifest by an interrupted run are reused.
+    If shard = (index, num_shards) is given, only that shard's chunks are simulated and written to a shard
+    bundle in library/shards, to be combined with merge_shard_bundles() once every shard has completed.
+    If pilot_sims > 0, a pilot of pilot_sims books per criteria is run first to project the cost of the run,
+    which is aborted if the projected peak memory exceeds memory_budget_gb."""
     for key, ns in num_sim_args.items():
         if all([ns > 0, ns > batch_size * batch_size]):
             assert (
@@ -32,237 +45,336 @@ def create_books(
     if not compress and sum(num_sim_args.values()) > 1e4:
         warn("Generating large number of uncompressed books!")
 
-    if profiling and threads > 1:
-        raise RuntimeError("Multithread profiling not supported, threads must = 1 with profiling enabled")
+    if pilot_sims > 0:
+        estimate = estimate_books(
+            gamestate, config, num_sim_args, batch_size, threads, compress, pilot_sims, memory_budget_gb
+        )
+        if memory_budget_gb is not None and estimate["peak_memory"] > estimate["memory_budget"]:
+            raise RuntimeError(
+                f"Projected peak memory of {round(estimate['peak_memory'] / 1e9, 3)} GB exceeds the "
+                f"{memory_budget_gb} GB budget, recommended batch_size: {estimate['recommended_batch_size']}"
+            )
 
     startTime = time.time()
     print("\nCreating books...")
-    for betmode_name in num_sim_args:
-        sim_counter = 0
-        for bm in config.bet_modes:
-            if bm.get_name() == betmode_name:
-                for d in bm.get_distributions():
-                    if d.get_fixed_amt() is not None:
-                        sim_counter += d.get_fixed_amt()
-        set_sim_amount = False
-        if sim_counter > 0:
-            set_sim_amount = True
-
-        if num_sim_args[betmode_name] > 0:
-            gamestate.betmode = betmode_name
-            nsims = max(num_sim_args[betmode_name], sim_counter)
-            run_multi_process_sims(
-                threads,
-                batch_size,
-                config.game_id,
-                betmode_name,
-                gamestate,
-                num_sims=nsims,
-                compress=compress,
-                write_event_list=config.write_event_list,
-                profiling=profiling,
-                set_sim_amount=set_sim_amount,
-            )
+    gamestate.output_files.check_folder_exists(gamestate.output_files.temp_path)
+    manifest = RunManifest(gamestate.output_files.temp_path, resume=resume)
+    profile_dir = None
+    if profiling:
+        profile_dir = os.path.join(gamestate.output_files.temp_path, "profiles")
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        os.makedirs(profile_dir)
+    telemetry = RunTelemetry(gamestate.output_files.get_run_metrics_name(), config.game_id)
+    pool = None
+    if threads > 1:
+        pool = create_worker_pool(gamestate, threads, telemetry.queue)
+    telemetry.start()
+    try:
+        scheduler, shard_tasks = None, {}
+        if pool is not None and shard is None:
+            scheduler = ModeScheduler(gamestate, pool, config.game_id, compress, manifest, profile_dir)
+        for betmode_name in num_sim_args:
+            if num_sim_args[betmode_name] > 0:
+                gamestate.betmode = betmode_name
+                nsims, set_sim_amount = get_mode_sim_amount(config, betmode_name, num_sim_args[betmode_name])
+                if shard is not None:
+                    shard_tasks[betmode_name] = get_mode_tasks(
+                        threads,
+                        batch_size,
+                        betmode_name,
+                        gamestate,
+                        nsims,
+                        compress=compress,
+                        write_event_list=config.write_event_list,
+                        set_sim_amount=set_sim_amount,
+                        profile_dir=profile_dir,
+                    )
+                    continue
+                if scheduler is not None:
+                    print("\nQueueing books for", config.game_id, "in", betmode_name)
+                    tasks = get_mode_tasks(
+                        threads,
+                        batch_size,
+                        betmode_name,
+                        gamestate,
+                        nsims,
+                        compress=compress,
+                        write_event_list=config.write_event_list,
+                        set_sim_amount=set_sim_amount,
+                        profile_dir=profile_dir,
+                    )
+                    num_task_sims = count_task_sims(tasks)
+                    tasks, completed = split_completed_tasks(tasks, manifest)
+                    telemetry.add_mode(betmode_name, num_task_sims, num_task_sims - count_task_sims(tasks))
+                    scheduler.add_mode(betmode_name, tasks, completed)
+                    continue
 
-            output_lookup_and_force_files(
-                threads,
-                batch_size,
-                config.game_id,
-                betmode_name,
-                gamestate,
-                num_sims=nsims,
-                compress=compress,
-            )
+                results = run_multi_process_sims(
+                    threads,
+                    batch_size,
+                    config.game_id,
+                    betmode_name,
+                    gamestate,
+                    num_sims=nsims,
+                    compress=compress,
+                    write_event_list=config.write_event_list,
+                    set_sim_amount=set_sim_amount,
+                    manifest=manifest,
+                    profile_dir=profile_dir,
+                    telemetry=telemetry,
+                )
+
+                output_lookup_and_force_files(
+                    [result.temp_files for result in results],
+                    config.game_id,
+                    betmode_name,
+                    gamestate,
+                    compress=compress,
+                )
+        if scheduler is not None:
+            scheduler.run()
+        if shard is not None:
+            create_shard_bundle(gamestate, config.game_id, shard_tasks, shard, compress, pool, manifest, telemetry)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        release_shared_assignments()
+        telemetry.stop()
     shutil.rmtree(gamestate.output_files.temp_path)
     print("\nFinished creating books in", time.time() - startTime, "seconds.\n")
 
 
+def get_mode_sim_amount(config: object, betmode_name: str, num_sims: int) -> tuple:
+    """Number of simulations to run for a mode, and whether it contains fixed-amount distributions."""
+    sim_counter = 0
+    for bm in config.bet_modes:
+        if bm.get_name() == betmode_name:
+            for d in bm.get_distributions():
+                if d.get_fixed_amt() is not None:
+                    sim_counter += d.get_fixed_amt()
+    return max(num_sims, sim_counter), sim_counter > 0
+
+
+def estimate_books(
+    gamestate: object,
+    config: object,
+    num_sim_args: dict,
+    batch_size: int,
+    threads: int,
+    compress: bool,
+    pilot_sims: int = 100,
+    memory_budget_gb: float = None,
+) -> dict:
+    """Run a pilot of pilot_sims books per criteria and project the wall-time, disk and peak memory of
+    create_books() with the same arguments. The estimate is printed and written to library/pilot_estimate.json."""
+    mode_criteria, num_sims = {}, {}
+    for betmode_name, mode_sims in num_sim_args.items():
+        if mode_sims > 0:
+            num_sims[betmode_name], set_sim_amount = get_mode_sim_amount(config, betmode_name, int(mode_sims))
+            if set_sim_amount:
+                criteria_counts = get_fixed_sim_splits(gamestate, num_sims[betmode_name], betmode_name)
+            else:
+                criteria_counts = get_sim_splits(gamestate, num_sims[betmode_name], betmode_name)
+            mode_criteria[betmode_name] = (criteria_counts, set_sim_amount)
+
+    pilot_path = os.path.join(gamestate.output_files.temp_path, "pilot")
+    try:
+        pilot = run_pilot(gamestate, mode_criteria, pilot_sims, pilot_path)
+    finally:
+        shutil.rmtree(pilot_path, ignore_errors=True)
+    estimate = estimate_run_cost(
+        gamestate, pilot, mode_criteria, num_sims, batch_size, threads, compress, memory_budget_gb
+    )
+    print_pilot_report(estimate)
+    write_pilot_estimate(estimate, gamestate.output_files.get_pilot_estimate_name())
+    return estimate
+
+
+def get_criteria_counts(criteria: list, weights: list, num_sims: int) -> Dict[str, int]:
+    """Largest-remainder apportionment of num_sims between criteria, with at least one simulation each.
+    Ties are broken by criteria order, so counts are identical across runs."""
+    assert num_sims >= len(criteria), "at least one simulation is required per criteria"
+    exact = num_sims * np.asarray(weights, dtype=np.float64) / np.sum(weights)
+    counts = np.maximum(np.floor(exact).astype(np.int64), 1)
+    remainders = exact - np.floor(exact)
+    difference = num_sims - int(counts.sum())
+    if difference > 0:
+        counts[np.argsort(-remainders, kind="stable")[:difference]] += 1
+    while difference < 0:
+        reducible = [i for i in np.argsort(remainders, kind="stable") if counts[i] > 1]
+        counts[reducible[:-difference]] -= 1
+        difference = num_sims - int(counts.sum())
+
+    return {c: int(n) for c, n in zip(criteria, counts)}
+
+
 def get_sim_splits(gamestate: object, num_sims: int, betmode_name: str) -> Dict[str, int]:
     """Ensure assignment of criteria to all simulations numbers."""
     betmode_distributions = gamestate.get_betmode(betmode_name).get_distributions()
-    num_sims_criteria = {d._criteria: max(int(num_sims * d._quota), 1) for d in betmode_distributions}
-    total_sims = sum(num_sims_criteria.values())
-    reduce_sims = total_sims > num_sims
-    listedCriteria = [d._criteria for d in betmode_distributions]
-    criteria_weights = [d._quota for d in betmode_distributions]
-    random.seed(0)
-    while sum(num_sims_criteria.values()) != num_sims:
-        c = random.choices(listedCriteria, criteria_weights)[0]
-        if reduce_sims and num_sims_criteria[c] > 1:
-            num_sims_criteria[c] -= 1
-        elif not reduce_sims:
-            num_sims_criteria[c] += 1
+    return get_criteria_counts(
+        [d.get_criteria() for d in betmode_distributions],
+        [d.get_quota() for d in betmode_distributions],
+        num_sims,
+    )
+
+
+def get_fixed_sim_splits(gamestate: object, num_sims: int, betmode_name: str) -> Dict[str, int]:
+    """Assign fixed simulation amounts first, remaining simulations are split between quota distributions."""
+    betmode_distributions = gamestate.get_betmode(betmode_name).get_distributions()
+    num_sims_criteria = {}
+    for d in betmode_distributions:
+        if d.get_fixed_amt() is not None:
+            num_sims_criteria[d.get_criteria()] = num_sims_criteria.get(d.get_criteria(), 0) + d.get_fixed_amt()
+
+    quota_distributions = [d for d in betmode_distributions if d.get_quota() is not None]
+    remaining_sims = num_sims - sum(num_sims_criteria.values())
+    if remaining_sims > 0 and len(quota_distributions) > 0:
+        quota_counts = get_criteria_counts(
+            [d.get_criteria() for d in quota_distributions],
+            [d.get_quota() for d in quota_distributions],
+            max(remaining_sims, len(quota_distributions)),
+        )
+        for criteria, count in quota_counts.items():
+            num_sims_criteria[criteria] = num_sims_criteria.get(criteria, 0) + count
 
     return num_sims_criteria
 
 
-def assign_sim_criteria(num_sims_criteria: Dict[str, int], sims: int) -> Dict[int, str]:
-    """Assign criteria randomly to simulations based on quota defined in config."""
-    sim_allocation = [criteria for criteria, count in num_sims_criteria.items() for _ in range(count)]
-    random.shuffle(sim_allocation)
-    return {i: sim_allocation[i] for i in range(min(sims, len(sim_allocation)))}
-
-
-def string_to_int(s: str) -> int:
-    "Convert criteria name to large integer value"
-    h = hashlib.sha256(s.encode()).hexdigest()
-    return int(h[:12], 16)
-
-
-async def profile_and_visualize(
-    game_id,
-    gamestate,
-    all_betmode_configs,
-    betmode,
-    sim_allocation,
-    threads,
-    num_repeats,
-    sims_per_thread,
-    repeat,
-    compress,
-    write_event_list,
-    simulation_seeds,
-):
-    """Create flame-graph, automatically opens output on localhost."""
-    output_string = f"games/{game_id}/simulationProfile_{betmode}.prof"
-    cProfile.runctx(
-        "gamestate.run_sims(all_betmode_configs, betmode, sim_allocation, threads, num_repeats, sims_per_thread, 0, repeat, compress, write_event_list, simulation_seeds)",
-        globals(),
-        locals(),
-        output_string,
-    )
-    await asyncio.create_subprocess_exec("snakeviz", output_string)
+def assign_sim_criteria(num_sims_criteria: Dict[str, int], sims: int, seed: int = 0) -> tuple:
+    """Assign criteria randomly to simulations based on quota defined in config.
+    Returns the criteria code table and a permuted array of int8/int16 codes, one per simulation."""
+    code_table = list(num_sims_criteria)
+    assert sum(num_sims_criteria.values()) >= sims, "criteria counts do not cover all simulations"
+    code_range = np.arange(len(code_table), dtype=get_code_dtype(len(code_table)))
+    codes = np.repeat(code_range, list(num_sims_criteria.values()))
+    np.random.default_rng(seed).shuffle(codes)
+    return code_table, codes[:sims]
 
 
-def run_multi_process_sims(
+def get_criteria_seeds(code_table: list, criteria_codes: np.ndarray) -> np.ndarray:
+    """Seed each simulation from its criteria name, offset by the number of earlier simulations
+    assigned the same criteria."""
+    seeds = np.empty(len(criteria_codes), dtype=np.uint64)
+    for code, criteria in enumerate(code_table):
+        sims = np.flatnonzero(criteria_codes == code)
+        seeds[sims] = np.uint64(string_to_int(criteria)) + np.arange(len(sims), dtype=np.uint64)
+    return seeds
+
+
+def get_sim_chunks(num_sims: int, threads: int, batching_size: int, chunks_per_thread: int = 4) -> list:
+    """Split simulation numbers into batches of (sim_start, sim_end) chunks.
+    Each batch holds threads * batching_size simulations, divided into threads * chunks_per_thread chunks."""
+    num_repeats = max(int(round(num_sims / threads / batching_size, 0)), 1)
+    sims_per_thread = int(num_sims / threads / num_repeats)
+    sims_per_batch = threads * sims_per_thread
+    num_chunks = max(min(threads * chunks_per_thread, sims_per_batch), 1)
+    batches = []
+    for repeat in range(num_repeats):
+        batch_start = repeat * sims_per_batch
+        boundaries = [batch_start + (sims_per_batch * c) // num_chunks for c in range(num_chunks + 1)]
+        batches.append([(boundaries[c], boundaries[c + 1]) for c in range(num_chunks)])
+    return batches
+
+
+def get_mode_tasks(
     threads: int,
     batching_size: int,
-    game_id: str,
     betmode: str,
     gamestate: object,
-    num_sims: int = 1000000,
+    num_sims: int,
     compress: bool = True,
     write_event_list: bool = False,
-    profiling: bool = False,
-    set_sim_amount=False,
-):
-    """Setup multiprocessing manager for running all game-mode simulations."""
-    print("\nCreating books for", game_id, "in", betmode)
-    num_repeats = max(int(round(num_sims / threads / batching_size, 0)), 1)
-    sims_per_thread = int(num_sims / threads / num_repeats)
+    set_sim_amount: bool = False,
+    chunks_per_thread: int = 4,
+    profile_dir: str = None,
+) -> list:
+    """Assign criteria and seeds to all mode simulations and split them into SimulationTasks."""
     if not set_sim_amount:
         num_sims_criteria = get_sim_splits(gamestate, num_sims, betmode)
-        sim_criteria = assign_sim_criteria(num_sims_criteria, num_sims)
-        simulation_seeds = [i for i in range(len(sim_criteria))]
-        criteria_assignment = list(sim_criteria.values())
+        code_table, criteria_codes = assign_sim_criteria(num_sims_criteria, num_sims)
+        simulation_seeds = np.arange(len(criteria_codes), dtype=np.uint64)
     else:
-        for bm in gamestate.config.bet_modes:
-            if bm.get_name() == betmode:
-                dists = bm.get_distributions()
-                criteria_assignment, simulation_seeds = [], []
-                total_quota = 0.0
-                # populate fixed amount first
-                for d in dists:
-                    dist_criteria = d.get_criteria()
-                    if d.get_fixed_amt() is not None:
-                        criteria_assignment.extend([str(dist_criteria) for _ in range(d.get_fixed_amt())])
-                    else:
-                        total_quota += d.get_quota()
-                # populate remaining with quota
-                if len(criteria_assignment) < num_sims:
-                    quota_assignment = []
-                    quota_probs = []
-                    for d in dists:
-                        dist_criteria = d.get_criteria()
-                        if d.get_quota() is not None:
-                            quota_assignment.append(dist_criteria)
-                            quota_probs.append(d.get_quota())
-                            ncriteria = math.floor(
-                                max(1, (d.get_quota() / total_quota) * (num_sims - len(criteria_assignment)))
-                            )
-                            counter = 0
-                            while (len(criteria_assignment) < num_sims) and (counter < ncriteria):
-                                criteria_assignment.append(dist_criteria)
-                                counter += 1
-                    while len(criteria_assignment) < num_sims:
-                        criteria_assignment.append(random.choices(quota_assignment, quota_probs, k=1)[0])
-
-                    random.shuffle(criteria_assignment)
-                break
-
-        unique_criteria = set(criteria_assignment)
-        criteria_offset = {}
-        criteria_counter = {}
-        for c in unique_criteria:
-            criteria_offset[c] = string_to_int(c)
-            criteria_counter[c] = 0
-        simulation_seeds = []
-        for c in criteria_assignment:
-            offset_val = criteria_offset[c] + criteria_counter[c]
-            criteria_counter[c] += 1
-            simulation_seeds.append(offset_val)
+        num_sims_criteria = get_fixed_sim_splits(gamestate, num_sims, betmode)
+        code_table, criteria_codes = assign_sim_criteria(num_sims_criteria, num_sims)
+        simulation_seeds = get_criteria_seeds(code_table, criteria_codes)
 
-    for repeat in range(num_repeats):
-        print("Batch", repeat + 1, "of", num_repeats)
-        processes = []
-        manager = Manager()
-        all_betmode_configs = manager.list()
-        if profiling:
-            asyncio.run(
-                profile_and_visualize(
-                    game_id=game_id,
-                    gamestate=gamestate,
-                    all_betmode_configs=all_betmode_configs,
+    assignment = SimulationAssignment(code_table, criteria_codes, simulation_seeds)
+    tasks = []
+    for repeat, chunks in enumerate(get_sim_chunks(num_sims, threads, batching_size, chunks_per_thread)):
+        for chunk_index, (sim_start, sim_end) in enumerate(chunks):
+            tasks.append(
+                SimulationTask(
                     betmode=betmode,
-                    sim_allocation=criteria_assignment,
-                    threads=threads,
-                    num_repeats=num_repeats,
-                    sims_per_thread=sims_per_thread,
-                    repeat=repeat,
+                    chunk_index=chunk_index,
+                    repeat_count=repeat,
+                    sim_start=sim_start,
+                    sim_end=sim_end,
+                    assignment=assignment,
                     compress=compress,
                     write_event_list=write_event_list,
-                    simulation_seeds=simulation_seeds,
+                    profile_dir=profile_dir,
                 )
             )
-        elif threads == 1:
-            gamestate.run_sims(
-                betmode_copy_list=all_betmode_configs,
-                betmode=betmode,
-                sim_to_criteria=criteria_assignment,
-                total_threads=threads,
-                total_repeats=num_repeats,
-                num_sims=sims_per_thread,
-                thread_index=0,
-                repeat_count=repeat,
-                compress=compress,
-                write_event_list=write_event_list,
-                simulation_seeds=simulation_seeds,
-            )
-        else:
-            for thread in range(threads):
-                process = Process(
-                    target=gamestate.run_sims,
-                    args=(
-                        all_betmode_configs,
-                        betmode,
-                        criteria_assignment,
-                        threads,
-                        num_repeats,
-                        sims_per_thread,
-                        thread,
-                        repeat,
-                        compress,
-                        write_event_list,
-                        simulation_seeds,
-                    ),
-                )
-                print("Started thread", thread)
-                process.start()
-                processes += [process]
-            print("All threads are online.")
-            for process in processes:
-                process.join()
-            print("Finished joining threads.")
-            gamestate.combine(all_betmode_configs, betmode)
-            gamestate.get_betmode(betmode).lock_force_keys()
-            manager.shutdown()
+
+    return tasks
+
+
+def run_multi_process_sims(
+    threads: int,
+    batching_size: int,
+    game_id: str,
+    betmode: str,
+    gamestate: object,
+    num_sims: int = 1000000,
+    compress: bool = True,
+    write_event_list: bool = False,
+    set_sim_amount=False,
+    pool=None,
+    chunks_per_thread: int = 4,
+    manifest: RunManifest = None,
+    profile_dir: str = None,
+    telemetry: RunTelemetry = None,
+):
+    """Distribute all game-mode simulations across the worker pool, returning completed SimulationResults."""
+    print("\nCreating books for", game_id, "in", betmode)
+    tasks = get_mode_tasks(
+        threads,
+        batching_size,
+        betmode,
+        gamestate,
+        num_sims,
+        compress=compress,
+        write_event_list=write_event_list,
+        set_sim_amount=set_sim_amount,
+        chunks_per_thread=chunks_per_thread,
+        profile_dir=profile_dir,
+    )
+    num_task_sims = count_task_sims(tasks)
+    tasks, completed = split_completed_tasks(tasks, manifest)
+    record = manifest.record if manifest is not None else None
+    progress_reporter = None
+    if telemetry is not None:
+        telemetry.add_mode(betmode, num_task_sims, num_task_sims - count_task_sims(tasks))
+        progress_reporter = ProgressReporter(telemetry.queue)
+
+    if len(tasks) == 0:
+        results = []
+    elif pool is None:
+        results = []
+        for task in tasks:
+            results.append(run_task(gamestate, task, progress_reporter))
+            if record is not None:
+                record(task, results[-1])
+    else:
+        results = run_tasks_on_pool(pool, tasks, on_result=record)
+
+    if profile_dir is not None and len(tasks) > 0:
+        report_profile(game_id, betmode, profile_dir)
+
+    results = sorted(completed + results, key=lambda r: (r.repeat_count, r.chunk_index))
+    gamestate.combine(results, betmode)
+    gamestate.get_betmode(betmode).lock_force_keys()
+    output_criteria_costs(results, betmode, gamestate)
+    output_event_items(results, betmode, gamestate)
+    return results
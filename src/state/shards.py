@@ -0,0 +1,186 @@
+"""Split a create_books() run across several machines, and merge the resulting shard bundles."""
+
+import os
+import json
+import shutil
+
+from src.state.manifest import RunManifest, split_completed_tasks
+from src.state.profiling import report_profile
+from src.state.telemetry import RunTelemetry, ProgressReporter
+from src.state.worker_pool import SimulationResult, count_task_sims, run_task, run_tasks_on_pool
+from src.write_data.write_data import (
+    get_sha_256,
+    output_lookup_and_force_files,
+    output_criteria_costs,
+    output_event_items,
+)
+
+SHARD_METADATA = "shard.json"
+
+
+def get_shard_tasks(tasks: list, shard: tuple) -> list:
+    """Contiguous block of a mode's tasks simulated by shard (index, num_shards).
+    Shards cover every task exactly once, using the same chunks as a single-node run."""
+    shard_index, num_shards = shard
+    assert 0 <= shard_index < num_shards, "shard must be given as (index, num_shards) with 0 <= index < num_shards"
+    start = len(tasks) * shard_index // num_shards
+    end = len(tasks) * (shard_index + 1) // num_shards
+    return tasks[start:end]
+
+
+def create_shard_bundle(
+    gamestate: object,
+    game_id: str,
+    mode_tasks: dict,
+    shard: tuple,
+    compress: bool,
+    pool: object = None,
+    manifest: RunManifest = None,
+    telemetry: RunTelemetry = None,
+) -> str:
+    """
+    Simulate this shard's tasks for every mode and move the chunk files into a bundle directory, along
+    with a shard.json file describing each chunk (range, force-keys, rejection costs, event examples and file hashes).
+    mode_tasks maps each bet mode to all of its tasks, so the bundle records the full chunk count.
+    """
+    bundle_path = gamestate.output_files.get_shard_path(*shard)
+    shutil.rmtree(bundle_path, ignore_errors=True)
+    os.makedirs(bundle_path)
+    metadata = {"game_id": game_id, "shard": list(shard), "compress": compress, "modes": {}}
+    for betmode, tasks in mode_tasks.items():
+        print(f"\nCreating shard {shard[0]} of {shard[1]} for", game_id, "in", betmode)
+        shard_tasks = get_shard_tasks(tasks, shard)
+        pending, completed = split_completed_tasks(shard_tasks, manifest)
+        record = manifest.record if manifest is not None else None
+        if telemetry is not None:
+            num_task_sims = count_task_sims(shard_tasks)
+            telemetry.add_mode(betmode, num_task_sims, num_task_sims - count_task_sims(pending))
+
+        if pool is not None:
+            results = run_tasks_on_pool(pool, pending, on_result=record)
+        else:
+            progress_reporter = ProgressReporter(telemetry.queue) if telemetry is not None else None
+            results = []
+            for task in pending:
+                results.append(run_task(gamestate, task, progress_reporter))
+                if record is not None:
+                    record(task, results[-1])
+        if len(pending) > 0 and pending[0].profile_dir is not None:
+            report_profile(game_id, betmode, pending[0].profile_dir)
+
+        task_lookup = {(task.repeat_count, task.chunk_index): task for task in shard_tasks}
+        chunks = []
+        for result in sorted(completed + results, key=lambda r: (r.repeat_count, r.chunk_index)):
+            task = task_lookup[(result.repeat_count, result.chunk_index)]
+            files = {}
+            for kind, path in result.temp_files.items():
+                os.replace(path, os.path.join(bundle_path, os.path.basename(path)))
+                files[kind] = {
+                    "name": os.path.basename(path),
+                    "sha256": get_sha_256(os.path.join(bundle_path, os.path.basename(path))),
+                }
+            chunks.append(
+                {
+                    "repeat_count": result.repeat_count,
+                    "chunk_index": result.chunk_index,
+                    "sim_start": task.sim_start,
+                    "sim_end": task.sim_end,
+                    "force_keys": list(result.force_keys),
+                    "criteria_stats": result.criteria_stats,
+                    "event_items": result.event_items,
+                    "files": files,
+                }
+            )
+        metadata["modes"][betmode] = {
+            "num_chunks": len(tasks),
+            "num_sims": tasks[-1].sim_end,
+            "assignment": tasks[0].assignment.get_fingerprint(),
+            "chunks": chunks,
+        }
+
+    with open(os.path.join(bundle_path, SHARD_METADATA), "w", encoding="UTF-8") as f:
+        f.write(json.dumps(metadata, indent=4))
+    print(f"\nShard bundle written to {bundle_path}")
+    return bundle_path
+
+
+def load_shard_bundles(bundle_paths: list) -> list:
+    """Read and validate shard.json files, which must all belong to one run and cover every shard once."""
+    bundles = []
+    for bundle_path in bundle_paths:
+        with open(os.path.join(bundle_path, SHARD_METADATA), "r", encoding="UTF-8") as f:
+            bundles.append((bundle_path, json.load(f)))
+
+    first = bundles[0][1]
+    num_shards = first["shard"][1]
+    for bundle_path, metadata in bundles:
+        if metadata["game_id"] != first["game_id"] or metadata["compress"] != first["compress"]:
+            raise RuntimeError(f"Shard bundle {bundle_path} belongs to a different run.")
+        if metadata["shard"][1] != num_shards or list(metadata["modes"]) != list(first["modes"]):
+            raise RuntimeError(f"Shard bundle {bundle_path} was created with a different shard layout.")
+        for betmode, mode in metadata["modes"].items():
+            if mode["assignment"] != first["modes"][betmode]["assignment"]:
+                raise RuntimeError(f"Shard bundle {bundle_path} used a different criteria assignment for {betmode}.")
+
+    shard_indexes = sorted(metadata["shard"][0] for _, metadata in bundles)
+    if shard_indexes != list(range(num_shards)):
+        raise RuntimeError(f"Expected one bundle for each of {num_shards} shards, found shards {shard_indexes}.")
+    return sorted(bundles, key=lambda bundle: bundle[1]["shard"][0])
+
+
+def check_chunk_ranges(betmode: str, chunks: list, num_sims: int) -> None:
+    """Chunks sorted by (repeat_count, chunk_index) must cover simulations [0, num_sims) without gaps or overlaps."""
+    sim_end = 0
+    for chunk in chunks:
+        if chunk["sim_start"] != sim_end:
+            raise RuntimeError(
+                f"Shard chunks for {betmode} are not contiguous: expected a chunk starting at simulation {sim_end}, "
+                f"found {chunk['sim_start']}."
+            )
+        sim_end = chunk["sim_end"]
+    if sim_end != num_sims:
+        raise RuntimeError(f"Shard chunks for {betmode} end at simulation {sim_end}, expected {num_sims}.")
+
+
+def merge_shard_bundles(gamestate: object, bundle_paths: list) -> None:
+    """Combine shard bundles into the final books, lookup tables, pay splits, force records and event configs.
+    Chunk files are merged in simulation order, so outputs match a single-node run of the same simulations."""
+    bundles = load_shard_bundles(bundle_paths)
+    game_id = bundles[0][1]["game_id"]
+    compress = bundles[0][1]["compress"]
+    if game_id != gamestate.config.game_id:
+        raise RuntimeError(f"Shard bundles were created for {game_id}, not {gamestate.config.game_id}.")
+    for betmode, mode in bundles[0][1]["modes"].items():
+        chunks = [
+            (bundle_path, chunk) for bundle_path, metadata in bundles for chunk in metadata["modes"][betmode]["chunks"]
+        ]
+        chunks.sort(key=lambda c: (c[1]["repeat_count"], c[1]["chunk_index"]))
+        check_chunk_ranges(betmode, [chunk for _, chunk in chunks], mode["num_sims"])
+        results = []
+        for bundle_path, chunk in chunks:
+            temp_files = {kind: os.path.join(bundle_path, info["name"]) for kind, info in chunk["files"].items()}
+            for kind, path in temp_files.items():
+                if get_sha_256(path) != chunk["files"][kind]["sha256"]:
+                    raise RuntimeError(f"Shard file {path} does not match its recorded hash.")
+            results.append(
+                SimulationResult(
+                    betmode,
+                    chunk["chunk_index"],
+                    chunk["repeat_count"],
+                    chunk["force_keys"],
+                    temp_files,
+                    chunk["criteria_stats"],
+                    chunk["event_items"],
+                )
+            )
+        chunk_keys = [(r.repeat_count, r.chunk_index) for r in results]
+        if len(results) != mode["num_chunks"] or len(set(chunk_keys)) != len(chunk_keys):
+            raise RuntimeError(
+                f"Shard bundles hold {len(results)} chunks for {betmode}, expected {mode['num_chunks']}."
+            )
+
+        gamestate.combine(results, betmode)
+        gamestate.get_betmode(betmode).lock_force_keys()
+        output_criteria_costs(results, betmode, gamestate)
+        output_event_items(results, betmode, gamestate)
+        output_lookup_and_force_files([r.temp_files for r in results], game_id, betmode, gamestate, compress=compress)
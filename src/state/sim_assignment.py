@@ -0,0 +1,86 @@
+"""Compact criteria and seed arrays for every simulation in a bet mode, shared read-only with worker processes."""
+
+import json
+import hashlib
+import numpy as np
+from multiprocessing import shared_memory
+
+_shared_blocks = {}
+_created_blocks = []
+
+
+def string_to_int(s: str) -> int:
+    "Convert criteria name to large integer value"
+    h = hashlib.sha256(s.encode()).hexdigest()
+    return int(h[:12], 16)
+
+
+def get_code_dtype(num_criteria: int) -> np.dtype:
+    """Smallest signed integer type able to index the criteria code table."""
+    return np.dtype(np.int8 if num_criteria <= np.iinfo(np.int8).max else np.int16)
+
+
+class SimulationAssignment:
+    """
+    Criteria and seeds for all simulations of a bet mode, held in a single shared memory block.
+    Criteria are stored as int8/int16 codes into code_table and seeds as uint64 values.
+    Only the block name and code table are pickled when a task is sent to a worker, which maps the
+    block on first use rather than receiving its own copy of the Python lists.
+    """
+
+    def __init__(self, code_table: list, criteria_codes: np.ndarray, simulation_seeds: np.ndarray):
+        assert len(criteria_codes) == len(simulation_seeds), "criteria and seed lengths do not match"
+        self.num_sims = len(criteria_codes)
+        self.code_table = list(code_table)
+        self.code_dtype = np.asarray(criteria_codes).dtype.str
+
+        shm = shared_memory.SharedMemory(create=True, size=max(self.get_block_size(), 1))
+        self.name = shm.name
+        _shared_blocks[self.name] = shm
+        _created_blocks.append(self.name)
+
+        seeds, codes = self.get_arrays(writeable=True)
+        seeds[:] = simulation_seeds
+        codes[:] = criteria_codes
+
+    def get_block_size(self) -> int:
+        """Bytes required for the seed array followed by the criteria codes."""
+        return self.num_sims * (np.dtype(np.uint64).itemsize + np.dtype(self.code_dtype).itemsize)
+
+    def get_arrays(self, writeable: bool = False) -> tuple:
+        """(seeds, codes) views onto the shared block, attaching to it if not yet mapped by this process."""
+        shm = _shared_blocks.get(self.name)
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=self.name)
+            _shared_blocks[self.name] = shm
+        seeds = np.ndarray((self.num_sims,), dtype=np.uint64, buffer=shm.buf)
+        codes = np.ndarray((self.num_sims,), dtype=self.code_dtype, buffer=shm.buf, offset=seeds.nbytes)
+        seeds.flags.writeable = writeable
+        codes.flags.writeable = writeable
+        return seeds, codes
+
+    def get_fingerprint(self) -> str:
+        """Hash of the full criteria and seed assignment, identical for any run with the same inputs."""
+        seeds, codes = self.get_arrays()
+        fingerprint = hashlib.sha256(json.dumps(self.code_table).encode("UTF-8"))
+        fingerprint.update(codes.astype(np.int16).tobytes())
+        fingerprint.update(seeds.tobytes())
+        return fingerprint.hexdigest()
+
+    def get_criteria(self, sim_start: int, sim_end: int) -> list:
+        """Criteria names for simulations [sim_start, sim_end)."""
+        codes = self.get_arrays()[1][sim_start:sim_end]
+        return [self.code_table[code] for code in codes.tolist()]
+
+    def get_seeds(self, sim_start: int, sim_end: int) -> list:
+        """Simulation seeds for [sim_start, sim_end), as Python integers."""
+        return self.get_arrays()[0][sim_start:sim_end].tolist()
+
+
+def release_shared_assignments() -> None:
+    """Close and remove all shared blocks created by this process."""
+    while _created_blocks:
+        shm = _shared_blocks.pop(_created_blocks.pop(), None)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
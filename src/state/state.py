@@ -2,18 +2,20 @@ from copy import copy, deepcopy
 from abc import ABC, abstractmethod
 from warnings import warn
 import random
+import time
 
 # from src.config.config import BetMode
 from src.wins.win_manager import WinManager
 from src.calculations.symbol import SymbolStorage
 from src.config.output_filenames import OutputFiles
+from src.config.runtime import get_runtime_config
 from src.state.books import Book
+from src.state.worker_pool import SimulationResult
 from src.write_data.write_data import (
     print_recorded_wins,
     make_lookup_tables,
-    write_json,
     make_lookup_pay_split,
-    write_library_events,
+    BookWriter,
 )
 
 
@@ -25,6 +27,8 @@ class GeneralGameState(ABC):
         self.output_files = OutputFiles(self.config)
         self.win_manager = WinManager(self.config.basegame_type, self.config.freegame_type, config.wincap)
         self.library = {}
+        self.book_writer = None
+        self.criteria_stats = {}
         self.recorded_events = {}
         self.special_symbol_functions = {}
         self.temp_wins = []
@@ -100,33 +104,55 @@ class GeneralGameState(ABC):
         self.gametype = self.config.freegame_type
         self.win_manager.reset_spin_win()
 
+    @property
+    def betmode(self) -> str:
+        """Current bet mode name. Assigning it resolves the bet mode and distribution once."""
+        return self._betmode
+
+    @betmode.setter
+    def betmode(self, betmode: str) -> None:
+        self._betmode = betmode
+        self.resolve_current_distribution()
+
+    @property
+    def criteria(self) -> str:
+        """Current criteria. Assigning it resolves the distribution once per simulation."""
+        return self._criteria
+
+    @criteria.setter
+    def criteria(self, criteria: str) -> None:
+        self._criteria = criteria
+        self.resolve_current_distribution()
+
+    def resolve_current_distribution(self) -> None:
+        """Look up the current bet mode and distribution in the compiled configuration."""
+        runtime = get_runtime_config(self.config)
+        betmode = self.__dict__.get("_betmode")
+        self._current_betmode = runtime.get_betmode(betmode)
+        self._current_distribution = runtime.get_distribution(betmode, self.__dict__.get("_criteria"))
+
     def get_betmode(self, mode_name) -> object:
         """Return all current betmode information."""
-        for betmode in self.config.bet_modes:
-            if betmode.get_name() == mode_name:
-                return betmode
-        print("\nWarning: betmode couldn't be retrieved\n")
+        betmode = get_runtime_config(self.config).get_betmode(mode_name)
+        if betmode is None:
+            print("\nWarning: betmode couldn't be retrieved\n")
+        return betmode
 
     def get_current_betmode(self) -> object:
         """Get current betmode information."""
-        for betmode in self.config.bet_modes:
-            if betmode.get_name() == self.betmode:
-                return betmode
+        return self._current_betmode
 
     def get_current_betmode_distributions(self) -> object:
         """Return current betmode criteria information."""
-        dist = self.get_current_betmode().get_distributions()
-        for c in dist:
-            if c._criteria == self.criteria:
-                return c
-        raise RuntimeError("Could not locate criteria distribution.")
+        if self._current_distribution is None:
+            raise RuntimeError("Could not locate criteria distribution.")
+        return self._current_distribution
 
     def get_current_distribution_conditions(self) -> dict:
         """Return requirements for criteria setup/acceptance."""
-        for d in self.get_betmode(self.betmode).get_distributions():
-            if d._criteria == self.criteria:
-                return d._conditions
-        return RuntimeError("Could not locate betmode conditions")
+        if self._current_distribution is None:
+            raise RuntimeError("Could not locate betmode conditions")
+        return self._current_distribution._conditions
 
     def check_current_repeat_count(self, warn_after_count: int = 1000):
         """Alert user to high repeat count."""
@@ -135,6 +161,16 @@ class GeneralGameState(ABC):
                 f"\nHigh repeat count:\n Current Count: {self.repeat_count} \n Criteria: {self.criteria} \n Simulation: {self.sim}"
             )
 
+    def update_criteria_stats(self, criteria: str, attempts: int, elapsed: float) -> None:
+        """Accumulate the number of spins and time taken before a simulation satisfied its criteria."""
+        if criteria not in self.criteria_stats:
+            self.criteria_stats[criteria] = {"accepted": 0, "attempts": 0, "max_repeats": 0, "time": 0.0}
+        stats = self.criteria_stats[criteria]
+        stats["accepted"] += 1
+        stats["attempts"] += attempts
+        stats["max_repeats"] = max(stats["max_repeats"], attempts)
+        stats["time"] += elapsed
+
     def record(self, description: dict) -> None:
         """
         Record functions must be used for distribution conditions.
@@ -154,14 +190,12 @@ class GeneralGameState(ABC):
             if keyValue[0] not in current_mode_force_keys:
                 self.get_current_betmode().add_force_key(keyValue[0])  # type:ignore
 
-    def combine(self, modes, betmode_name) -> None:
-        """Retrieve unique force record keys."""
-        for modeConfig in modes:
-            for betmode in modeConfig:
-                if betmode.get_name() == betmode_name:
-                    break
-            force_keys = betmode.get_force_keys()  # type:ignore
-            for key in force_keys:
+    def combine(self, results, betmode_name) -> None:
+        """Retrieve unique force record keys from completed simulation results."""
+        for result in results:
+            if result.betmode != betmode_name:
+                continue
+            for key in result.force_keys:
                 if key not in self.get_betmode(betmode_name).get_force_keys():  # type:ignore
                     self.get_betmode(betmode_name).add_force_key(key)  # type:ignore
 
@@ -182,7 +216,18 @@ class GeneralGameState(ABC):
                     "bookIds": [book_id],
                 }
         self.temp_wins = []
-        self.library[self.sim + 1] = copy(self.book.to_json())
+        book = self.book.to_json()
+        if self.book_writer is not None:
+            self.book_writer.write_book(book)
+            self.library[self.sim + 1] = {
+                "id": book["id"],
+                "payoutMultiplier": book["payoutMultiplier"],
+                "criteria": book["criteria"],
+                "baseGameWins": book["baseGameWins"],
+                "freeGameWins": book["freeGameWins"],
+            }
+        else:
+            self.library[self.sim + 1] = copy(book)
         self.win_manager.update_end_round_wins()
 
     def update_final_win(self) -> None:
@@ -232,21 +277,8 @@ class GeneralGameState(ABC):
         """run_freespin trigger function should be defined in gamestate."""
         print("gamestate requires def run_freespin(), currently passing when calling runFreeSpin")
 
-    def run_sims(
-        self,
-        betmode_copy_list,
-        betmode,
-        sim_to_criteria,
-        total_threads,
-        total_repeats,
-        num_sims,
-        thread_index,
-        repeat_count,
-        compress=True,
-        write_event_list=True,
-        simulation_seeds=[],
-    ) -> None:
-        """Assigns criteria and runs individual simulations. Results are stored in temporary file to be combined when all threads are finished."""
+    def reset_betmode(self, betmode: str) -> None:
+        """Clear wins, library and recorded events before simulating a range of books in a bet mode."""
         mode_max_win = None
         for bm in self.config.bet_modes:
             if bm._name.lower() == betmode.lower():
@@ -256,18 +288,56 @@ class GeneralGameState(ABC):
         self.win_manager = WinManager(self.config.basegame_type, self.config.freegame_type, mode_max_win)
         self.library = {}
         self.recorded_events = {}
+        self.criteria_stats = {}
         self.betmode = betmode
+
+    def run_sims(
+        self,
+        betmode,
+        sim_to_criteria,
+        sim_start,
+        chunk_index,
+        repeat_count,
+        compress=True,
+        write_event_list=True,
+        simulation_seeds=[],
+        progress_reporter=None,
+    ) -> SimulationResult:
+        """Assigns criteria and runs individual simulations. Results are stored in temporary file to be combined when all threads are finished.
+        sim_to_criteria and simulation_seeds are indexed relative to the first simulation number, sim_start.
+        If a progress_reporter is given, each completed simulation and its number of spins (including repeats) is counted.
+        """
+        self.reset_betmode(betmode)
+        num_sims = len(sim_to_criteria)
         self.num_sims = num_sims
-        for sim in range(
-            thread_index * num_sims + (total_threads * num_sims) * repeat_count,
-            (thread_index + 1) * num_sims + (total_threads * num_sims) * repeat_count,
-        ):
-            self.criteria = sim_to_criteria[sim]
-            self.run_spin(sim, simulation_seeds[sim])
+        temp_files = {
+            "books": self.output_files.get_temp_multi_thread_name(betmode, chunk_index, repeat_count, compress),
+            "force": self.output_files.get_temp_force_name(betmode, chunk_index, repeat_count),
+            "lookup": self.output_files.get_temp_lookup_name(betmode, chunk_index, repeat_count),
+            "segmented": self.output_files.get_temp_segmented_name(betmode, chunk_index, repeat_count),
+        }
+        self.book_writer = BookWriter(
+            temp_files["books"], self.config.output_regular_json, track_events=write_event_list
+        )
+        if progress_reporter is not None:
+            progress_reporter.start_task(betmode)
+        try:
+            for idx in range(num_sims):
+                self.criteria = sim_to_criteria[idx]
+                spin_start = time.perf_counter()
+                self.run_spin(sim_start + idx, simulation_seeds[idx])
+                attempts = max(self.repeat_count, 1)
+                self.update_criteria_stats(self.criteria, attempts, time.perf_counter() - spin_start)
+                if progress_reporter is not None:
+                    progress_reporter.update(self.criteria, attempts)
+        finally:
+            self.book_writer.close()
+        if progress_reporter is not None:
+            progress_reporter.publish()
         mode_cost = self.get_current_betmode().get_cost()
 
         print(
-            "Thread " + str(thread_index),
+            "Chunk " + str(chunk_index),
             "finished with",
             round(self.win_manager.total_cumulative_wins / (num_sims * mode_cost), 3),
             "RTP.",
@@ -275,16 +345,19 @@ class GeneralGameState(ABC):
             flush=True,
         )
 
-        write_json(
-            self,
-            self.output_files.get_temp_multi_thread_name(
-                betmode, thread_index, repeat_count, (compress) * True + (not compress) * False
-            ),
+        print_recorded_wins(self, temp_files["force"])
+        make_lookup_tables(self, temp_files["lookup"])
+        make_lookup_pay_split(self, temp_files["segmented"])
+
+        event_items = self.book_writer.event_items if write_event_list else None
+        self.book_writer = None
+
+        return SimulationResult(
+            betmode,
+            chunk_index,
+            repeat_count,
+            list(self.get_betmode(betmode).get_force_keys()),
+            temp_files,
+            self.criteria_stats,
+            event_items,
         )
-        print_recorded_wins(self, self.output_files.get_temp_force_name(betmode, thread_index, repeat_count))
-        make_lookup_tables(self, self.output_files.get_temp_lookup_name(betmode, thread_index, repeat_count))
-        make_lookup_pay_split(self, self.output_files.get_temp_segmented_name(betmode, thread_index, repeat_count))
-
-        if write_event_list:
-            write_library_events(self, list(self.library.values()), betmode)
-        betmode_copy_list.append(self.config.bet_modes)
@@ -0,0 +1,191 @@
+"""Live throughput and ETA reporting, published by simulation workers and aggregated by the parent process."""
+
+import os
+import json
+import time
+import threading
+from queue import Empty
+from datetime import timedelta
+from collections import Counter
+from multiprocessing import Queue
+
+
+class ProgressReporter:
+    """Worker-side counters, sent to the parent as deltas at most once per publish_interval seconds."""
+
+    def __init__(self, queue: Queue, publish_interval: float = 1.0):
+        self.queue = queue
+        self.publish_interval = publish_interval
+        self.betmode = None
+        self.reset_counters()
+        self.last_publish = time.time()
+
+    def reset_counters(self) -> None:
+        """Clear counters which have been sent to the parent."""
+        self.sims = 0
+        self.spins = 0
+        self.criteria = Counter()
+
+    def start_task(self, betmode: str) -> None:
+        """Publish outstanding counters before switching bet mode."""
+        if betmode != self.betmode:
+            self.publish()
+            self.betmode = betmode
+
+    def update(self, criteria: str, spins: int) -> None:
+        """Count a completed simulation, which took `spins` attempts (including repeats)."""
+        self.sims += 1
+        self.spins += spins
+        self.criteria[criteria] += 1
+        if time.time() - self.last_publish >= self.publish_interval:
+            self.publish()
+
+    def publish(self) -> None:
+        """Send counters accumulated since the last update."""
+        self.last_publish = time.time()
+        if self.sims == 0:
+            return
+        self.queue.put(
+            {
+                "worker": os.getpid(),
+                "betmode": self.betmode,
+                "sims": self.sims,
+                "spins": self.spins,
+                "criteria": dict(self.criteria),
+                "time": self.last_publish,
+            }
+        )
+        self.reset_counters()
+
+
+class RunTelemetry:
+    """
+    Collects worker updates on a background thread. Every render_interval seconds the aggregate sims/sec,
+    spins/sec (including repeats), ETA and per-worker lag (seconds since a worker last reported) are
+    printed, and the same values are written to a JSON metrics file.
+    """
+
+    def __init__(self, metrics_path: str, game_id: str, render_interval: float = 10.0):
+        self.metrics_path = metrics_path
+        self.game_id = game_id
+        self.render_interval = render_interval
+        self.queue = Queue()
+        self.modes = {}
+        self.workers = {}
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def add_mode(self, betmode: str, num_sims: int, num_completed: int = 0) -> None:
+        """Register the total simulations for a mode, of which num_completed were reused from a previous run."""
+        with self.lock:
+            self.modes[betmode] = {
+                "sims_total": num_sims,
+                "sims_reused": num_completed,
+                "sims_completed": 0,
+                "spins": 0,
+                "criteria": Counter(),
+            }
+
+    def start(self) -> None:
+        """Begin consuming worker updates."""
+        self.start_time = time.time()
+        self.thread = threading.Thread(target=self.consume, daemon=True)
+        self.thread.start()
+
+    def consume(self) -> None:
+        """Apply worker updates, rendering progress at a fixed interval."""
+        last_render = time.time()
+        while not self.stop_event.is_set():
+            try:
+                self.apply(self.queue.get(timeout=0.5))
+            except Empty:
+                pass
+            if time.time() - last_render >= self.render_interval:
+                self.render()
+                last_render = time.time()
+
+    def apply(self, update: dict) -> None:
+        """Add a worker update to the mode and worker totals."""
+        with self.lock:
+            mode = self.modes[update["betmode"]]
+            mode["sims_completed"] += update["sims"]
+            mode["spins"] += update["spins"]
+            mode["criteria"].update(update["criteria"])
+            worker = self.workers.setdefault(update["worker"], {"sims": 0, "spins": 0, "last_update": 0.0})
+            worker["sims"] += update["sims"]
+            worker["spins"] += update["spins"]
+            worker["last_update"] = update["time"]
+
+    def get_metrics(self) -> dict:
+        """Machine-readable snapshot of run progress."""
+        with self.lock:
+            now = time.time()
+            elapsed = max(now - self.start_time, 1e-9)
+            sims_completed = sum(m["sims_completed"] for m in self.modes.values())
+            sims_remaining = sum(m["sims_total"] - m["sims_reused"] - m["sims_completed"] for m in self.modes.values())
+            spins = sum(m["spins"] for m in self.modes.values())
+            sims_per_sec = sims_completed / elapsed
+            return {
+                "game_id": self.game_id,
+                "elapsed_seconds": round(elapsed, 2),
+                "sims_completed": sims_completed,
+                "sims_remaining": sims_remaining,
+                "sims_per_sec": round(sims_per_sec, 2),
+                "spins_per_sec": round(spins / elapsed, 2),
+                "eta_seconds": round(sims_remaining / sims_per_sec, 1) if sims_per_sec > 0 else None,
+                "modes": {
+                    betmode: {
+                        "sims_total": m["sims_total"],
+                        "sims_reused": m["sims_reused"],
+                        "sims_completed": m["sims_completed"],
+                        "spins": m["spins"],
+                        "criteria": dict(m["criteria"]),
+                    }
+                    for betmode, m in self.modes.items()
+                },
+                "workers": {
+                    str(pid): {
+                        "sims": w["sims"],
+                        "spins": w["spins"],
+                        "sims_per_sec": round(w["sims"] / elapsed, 2),
+                        "lag_seconds": round(now - w["last_update"], 2),
+                    }
+                    for pid, w in self.workers.items()
+                },
+            }
+
+    def render(self) -> dict:
+        """Print aggregate progress and write the metrics file."""
+        metrics = self.get_metrics()
+        total = metrics["sims_completed"] + metrics["sims_remaining"]
+        eta = "unknown" if metrics["eta_seconds"] is None else str(timedelta(seconds=int(metrics["eta_seconds"])))
+        max_lag = max([w["lag_seconds"] for w in metrics["workers"].values()], default=0.0)
+        print(
+            f"Progress: {metrics['sims_completed']}/{total} sims",
+            f"| {metrics['sims_per_sec']} sims/s, {metrics['spins_per_sec']} spins/s",
+            f"| ETA {eta} | max worker lag {max_lag}s",
+            flush=True,
+        )
+        self.write_metrics(metrics)
+        return metrics
+
+    def write_metrics(self, metrics: dict) -> None:
+        """Replace the metrics file, so readers never see a partially written file."""
+        temp_path = self.metrics_path + ".tmp"
+        with open(temp_path, "w", encoding="UTF-8") as f:
+            json.dump(metrics, f, indent=4)
+        os.replace(temp_path, self.metrics_path)
+
+    def stop(self) -> dict:
+        """Apply any remaining updates and write the final metrics."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        while True:
+            try:
+                self.apply(self.queue.get(timeout=0.1))
+            except Empty:
+                break
+        return self.render()
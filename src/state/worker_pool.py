@@ -0,0 +1,139 @@
+"""Long-lived simulation workers, reused across batches and bet-modes within a single create_books() call."""
+
+from copy import deepcopy
+from multiprocessing import Pool, resource_tracker
+
+from src.state.sim_assignment import SimulationAssignment
+from src.state.profiling import run_profiled
+from src.state.telemetry import ProgressReporter
+
+_worker_gamestate = None
+_worker_reporter = None
+
+
+class SimulationTask:
+    """Contiguous chunk of simulation numbers, picked up by whichever worker is idle.
+    Criteria and seeds are read from the shared mode assignment rather than carried by the task."""
+
+    def __init__(
+        self,
+        betmode: str,
+        chunk_index: int,
+        repeat_count: int,
+        sim_start: int,
+        sim_end: int,
+        assignment: SimulationAssignment,
+        compress: bool = True,
+        write_event_list: bool = False,
+        profile_dir: str = None,
+    ):
+        self.betmode = betmode
+        self.chunk_index = chunk_index
+        self.repeat_count = repeat_count
+        self.sim_start = sim_start
+        self.sim_end = sim_end
+        self.assignment = assignment
+        self.compress = compress
+        self.write_event_list = write_event_list
+        self.profile_dir = profile_dir
+
+    def get_sim_to_criteria(self) -> list:
+        """Criteria assigned to each simulation in the chunk."""
+        return self.assignment.get_criteria(self.sim_start, self.sim_end)
+
+    def get_simulation_seeds(self) -> list:
+        """Seeds assigned to each simulation in the chunk."""
+        return self.assignment.get_seeds(self.sim_start, self.sim_end)
+
+
+def count_task_sims(tasks: list) -> int:
+    """Total number of simulations covered by a list of tasks."""
+    return sum(task.sim_end - task.sim_start for task in tasks)
+
+
+class SimulationResult:
+    """Force-keys, temporary file names, per-criteria rejection costs and event examples (None if events were not
+    tracked) produced by a completed SimulationTask."""
+
+    def __init__(
+        self,
+        betmode: str,
+        chunk_index: int,
+        repeat_count: int,
+        force_keys: list,
+        temp_files: dict,
+        criteria_stats: dict = None,
+        event_items: dict = None,
+    ):
+        self.betmode = betmode
+        self.chunk_index = chunk_index
+        self.repeat_count = repeat_count
+        self.force_keys = force_keys
+        self.temp_files = temp_files
+        self.criteria_stats = criteria_stats if criteria_stats is not None else {}
+        self.event_items = event_items
+
+
+def init_worker(gamestate: object, progress_queue: object = None) -> None:
+    """Store one gamestate copy per worker process, shared by all tasks run on that worker,
+    along with the worker's progress reporter if telemetry is enabled."""
+    global _worker_gamestate, _worker_reporter
+    _worker_gamestate = gamestate
+    _worker_reporter = ProgressReporter(progress_queue) if progress_queue is not None else None
+
+
+def run_task(gamestate: object, task: SimulationTask, progress_reporter: ProgressReporter = None) -> SimulationResult:
+    """
+    Simulate all books within a task range, under the process profiler if profiling is enabled.
+    Each task starts from a fresh copy of gamestate, so results do not depend on which tasks previously ran in the
+    same process, whether in a pool worker, in the parent with threads=1, on another shard or before a resume.
+    The compiled RuntimeConfig tables are shared by every copy rather than cloned (see RuntimeConfig.__deepcopy__).
+    """
+    gamestate = deepcopy(gamestate)
+    if task.profile_dir is not None:
+        return run_profiled(task.profile_dir, task.betmode, simulate_task, gamestate, task, progress_reporter)
+    return simulate_task(gamestate, task, progress_reporter)
+
+
+def simulate_task(
+    gamestate: object, task: SimulationTask, progress_reporter: ProgressReporter = None
+) -> SimulationResult:
+    """Pass the task range, criteria and seeds to the gamestate."""
+    return gamestate.run_sims(
+        betmode=task.betmode,
+        sim_to_criteria=task.get_sim_to_criteria(),
+        sim_start=task.sim_start,
+        chunk_index=task.chunk_index,
+        repeat_count=task.repeat_count,
+        compress=task.compress,
+        write_event_list=task.write_event_list,
+        simulation_seeds=task.get_simulation_seeds(),
+        progress_reporter=progress_reporter,
+    )
+
+
+def run_worker_task(task: SimulationTask) -> SimulationResult:
+    """Pool entry-point, running the task on a copy of the worker's initial gamestate."""
+    return run_task(_worker_gamestate, task, _worker_reporter)
+
+
+def run_tasks_on_pool(pool: Pool, tasks: list, on_result: callable = None) -> list:
+    """Hand out tasks one at a time from the pool queue, so idle workers take the next available chunk
+    instead of waiting on a fixed allocation. Results are returned ordered by (repeat_count, chunk_index).
+    on_result(task, result) is called in the parent process as each chunk completes."""
+    task_lookup = {(task.repeat_count, task.chunk_index): task for task in tasks}
+    results = []
+    for result in pool.imap_unordered(run_worker_task, tasks, chunksize=1):
+        results.append(result)
+        if on_result is not None:
+            on_result(task_lookup[(result.repeat_count, result.chunk_index)], result)
+    return sorted(results, key=lambda r: (r.repeat_count, r.chunk_index))
+
+
+def create_worker_pool(gamestate: object, threads: int, progress_queue: object = None) -> Pool:
+    """Start worker processes once, each holding a copy of the gamestate.
+    If a progress_queue is given, workers publish throughput counters to it."""
+    # Start the resource tracker before forking, so workers attaching to shared assignment blocks
+    # use the parent's tracker rather than starting their own, which would unlink the blocks on exit.
+    resource_tracker.ensure_running()
+    return Pool(processes=threads, initializer=init_worker, initargs=(gamestate, progress_queue))
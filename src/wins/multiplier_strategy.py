@@ -2,7 +2,9 @@
     All functions return [final_win_amount], [applied multiplier]"""
 
 from typing import List, Dict
+import numpy as np
 from src.calculations.board import Board
+from src.calculations.symbol import get_attribute_mask
 
 
 def apply_mult(
@@ -15,13 +17,13 @@ def apply_mult(
 ):
     """Apply multiplier method to win_amount and winning symbol positions."""
     strat = {
-        "global": apply_global_mult(win_amount, global_multiplier),
-        "symbol": apply_added_symbol_mult(board, win_amount, positions, multiplier_key=multiplier_key),
-        "combined": apply_combined_mult(
+        "global": lambda: apply_global_mult(win_amount, global_multiplier),
+        "symbol": lambda: apply_added_symbol_mult(board, win_amount, positions, multiplier_key=multiplier_key),
+        "combined": lambda: apply_combined_mult(
             board, win_amount, global_multiplier, positions, multiplier_key=multiplier_key
         ),
     }
-    return strat[strategy]
+    return strat[strategy]()
 
 
 def apply_global_mult(win_amount: float, global_multiplier: int) -> tuple:
@@ -32,9 +34,10 @@ def apply_global_mult(win_amount: float, global_multiplier: int) -> tuple:
 def apply_added_symbol_mult(board: Board, win_amount: float, positions: List[Dict], multiplier_key: str) -> tuple:
     """Get multiplier attribute from all winning positions"""
     symbol_multiplier = 0
+    multiplier_mask = get_attribute_mask(multiplier_key)
     for pos in positions:
         if (
-            board[pos["reel"]][pos["row"]].check_attribute(multiplier_key)
+            board[pos["reel"]][pos["row"]].flags & multiplier_mask
             and board[pos["reel"]][pos["row"]].get_attribute(multiplier_key) > 1
         ):
             symbol_multiplier += board[pos["reel"]][pos["row"]].get_attribute(multiplier_key)
@@ -47,3 +50,22 @@ def apply_combined_mult(
     """Apply symbol multipliers and then global multiplier"""
     win, sym_mult = apply_added_symbol_mult(board, win_amount, positions, multiplier_key)
     return (win * global_multiplier  , sym_mult * global_multiplier)
+
+
+def apply_mult_array(
+    strategy: str, win_amounts: np.ndarray, global_multiplier: np.ndarray, symbol_multipliers: np.ndarray
+) -> tuple:
+    """
+    Array form of apply_mult for many wins at once. symbol_multipliers holds the summed symbol multipliers
+    (values above 1) of each win's positions, and global_multiplier broadcasts against win_amounts.
+    """
+    symbol_mult = np.maximum(symbol_multipliers, 1)
+    strat = {
+        "global": lambda: (np.round(win_amounts * global_multiplier, 2), global_multiplier),
+        "symbol": lambda: (np.round(win_amounts * symbol_mult, 2), symbol_mult),
+        "combined": lambda: (
+            np.round(win_amounts * symbol_mult, 2) * global_multiplier,
+            symbol_mult * global_multiplier,
+        ),
+    }
+    return strat[strategy]()
@@ -103,18 +103,59 @@ def make_lookup_pay_split(gamestate: object, name: str):
     file.close()
 
 
-def write_library_events(gamestate: object, library: list, gametype: str):
-    """Write all unique events within a given mode - with one example application."""
-    unique_event = []
-    event_items = {}
-    for event in library:
-        for instance in event["events"]:
-            lib_event = instance["type"]
-            if lib_event not in unique_event:
-                unique_event.append(lib_event)
-                item_keys = instance.keys()
-                dict_details = {key: instance[key] for key in item_keys if key != "index"}
-                event_items[lib_event] = dict_details
+def merge_criteria_stats(criteria_stats: list) -> dict:
+    """Combine per-criteria rejection costs from several simulation chunks."""
+    merged = {}
+    for chunk_stats in criteria_stats:
+        for criteria, stats in chunk_stats.items():
+            if criteria not in merged:
+                merged[criteria] = {"accepted": 0, "attempts": 0, "max_repeats": 0, "time": 0.0}
+            merged[criteria]["accepted"] += stats["accepted"]
+            merged[criteria]["attempts"] += stats["attempts"]
+            merged[criteria]["max_repeats"] = max(merged[criteria]["max_repeats"], stats["max_repeats"])
+            merged[criteria]["time"] += stats["time"]
+    return merged
+
+
+def make_criteria_cost_table(criteria_stats: dict, name: str):
+    """Write spins attempted and time spent per accepted simulation for each criteria, most expensive first."""
+    total_time = sum(stats["time"] for stats in criteria_stats.values())
+    file = open(name, "w", encoding="UTF-8")
+    file.write("criteria,accepted,attempts,rejected,mean_repeats,max_repeats,seconds,seconds_per_accepted,time_share\n")
+    for criteria, stats in sorted(criteria_stats.items(), key=lambda item: item[1]["time"], reverse=True):
+        file.write(
+            "{},{},{},{},{},{},{},{},{}\n".format(
+                criteria,
+                stats["accepted"],
+                stats["attempts"],
+                stats["attempts"] - stats["accepted"],
+                round(stats["attempts"] / stats["accepted"], 3),
+                stats["max_repeats"],
+                round(stats["time"], 3),
+                round(stats["time"] / stats["accepted"], 6),
+                round(stats["time"] / total_time, 4) if total_time > 0 else 0,
+            )
+        )
+    file.close()
+
+
+def output_criteria_costs(results: list, betmode: str, gamestate: object):
+    """Merge chunk rejection costs for a bet mode and write the report next to the lookup tables."""
+    criteria_stats = merge_criteria_stats([result.criteria_stats for result in results])
+    make_criteria_cost_table(criteria_stats, gamestate.output_files.get_criteria_cost_name(betmode))
+    return criteria_stats
+
+
+def get_event_example(book: dict, event_items: dict) -> None:
+    """Record the first instance of each unique event type within a book."""
+    for instance in book["events"]:
+        lib_event = instance["type"]
+        if lib_event not in event_items:
+            event_items[lib_event] = {key: instance[key] for key in instance.keys() if key != "index"}
+
+
+def write_event_items(gamestate: object, event_items: dict, gametype: str):
+    """Write unique event examples to the mode event config file."""
     json_object = json.dumps(event_items, indent=4)
     with open(
         os.path.join(gamestate.output_files.config_path, f"event_config_{gametype}.json"),
@@ -124,36 +165,82 @@ def write_library_events(gamestate: object, library: list, gametype: str):
         f.write(json_object)
 
 
+def merge_event_items(event_items: list) -> dict:
+    """Keep the first example of each event type, taking chunks in simulation order."""
+    merged = {}
+    for chunk_items in event_items:
+        for lib_event, example in chunk_items.items():
+            merged.setdefault(lib_event, example)
+    return merged
+
+
+def output_event_items(results: list, betmode: str, gamestate: object):
+    """Merge chunk event examples for a bet mode and write the event config, if events were tracked."""
+    tracked = [result.event_items for result in results if result.event_items is not None]
+    if len(tracked) > 0:
+        write_event_items(gamestate, merge_event_items(tracked), betmode)
+
+
+class BookWriter:
+    """Streams finished books to a temporary file as they are imprinted, so only small
+    lookup/pay-split rows are held in memory rather than every book in the chunk."""
+
+    def __init__(self, filename: str, output_regular_json: bool = False, track_events: bool = False):
+        self.filename = filename
+        self.output_regular_json = output_regular_json and not filename.endswith(".zst")
+        self.track_events = track_events
+        self.event_items = {}
+        self.num_books = 0
+        if filename.endswith(".zst"):
+            self.stream = zstd.ZstdCompressor().stream_writer(open(filename, "wb"))
+        else:
+            self.stream = open(filename, "wb")
+        if self.output_regular_json:
+            self.stream.write(b"[")
+
+    def write_book(self, book: dict) -> None:
+        """Serialize and write a single book."""
+        if self.track_events:
+            get_event_example(book, self.event_items)
+        if self.output_regular_json:
+            prefix = ", " if self.num_books > 0 else ""
+            self.stream.write((prefix + json.dumps(book)).encode("UTF-8"))
+        else:
+            self.stream.write((json.dumps(book) + "\n").encode("UTF-8"))
+        self.num_books += 1
+
+    def close(self) -> None:
+        """Finalize the file, writing a single newline for an empty compressed/jsonl chunk."""
+        if self.output_regular_json:
+            self.stream.write(b"]")
+        elif self.num_books == 0:
+            self.stream.write(b"\n")
+        self.stream.close()
+
+
 def output_lookup_and_force_files(
-    threads: int,
-    batching_size: int,
+    temp_files: list,
     game_id: str,
     betmode: str,
     gamestate: object,
-    num_sims: int = 1000000,
     compress: bool = True,
 ):
-    """Combine temporary lookup tables and force files into a single output."""
+    """Combine temporary lookup tables and force files into a single output.
+    temp_files must be ordered by simulation number, chunks may have completed in any order."""
     print("Saving books for ", game_id, "in", betmode)
-    num_repeats = max(int(round(num_sims / threads / batching_size, 0)), 1)
-    file_list = []
-    for repeat_index in range(num_repeats):
-        for thread in range(threads):
-            file_list.append(
-                gamestate.output_files.get_temp_multi_thread_name(betmode, thread, repeat_index, compress)
-            )
+    file_list = [files["books"] for files in temp_files]
 
     if compress:
         temp_book_output_path = os.path.join(gamestate.output_files.book_path, "temp_book_output.json")
-        with open(temp_book_output_path, "w", encoding="UTF-8") as outfile:
+        with open(temp_book_output_path, "wb") as outfile:
             for fname in file_list:
                 with open(fname, "rb") as infile:
-                    decompressed = zstd.ZstdDecompressor().decompress(infile.read())
-                    outfile.write(decompressed.decode("UTF-8"))
+                    zstd.ZstdDecompressor().copy_stream(infile, outfile)
 
         final_out = gamestate.output_files.get_final_book_name(betmode, True)
+        # Stream the merged books through the compressor, recording the content size in the frame header
         with open(temp_book_output_path, "rb") as f_in, open(final_out, "wb") as f_out:
-            f_out.write(zstd.ZstdCompressor().compress(f_in.read()))
+            zstd.ZstdCompressor().copy_stream(f_in, f_out, size=os.path.getsize(temp_book_output_path))
 
         os.remove(temp_book_output_path)
     else:
@@ -179,12 +266,7 @@ def output_lookup_and_force_files(
 
     print("Saving force files for", game_id, "in", betmode)
     force_results_dict = {}
-    file_list = []
-    for repeat_index in range(num_repeats):
-        for thread in range(threads):
-            file_list.append(
-                gamestate.output_files.get_temp_force_name(betmode, thread, repeat_index),
-            )
+    file_list = [files["force"] for files in temp_files]
 
     for filename in file_list:
         force_chunk = ast.literal_eval(json.load(open(filename, "r", encoding="UTF-8")))
@@ -219,22 +301,14 @@ def output_lookup_and_force_files(
             data = json.load(file)
     except FileNotFoundError:
         data = {}
-    data[gamestate.get_current_betmode().get_name()] = forceResultKeys
+    data[betmode] = forceResultKeys
     json_object = json.dumps(data, indent=4)
     with open(json_file_path, "w", encoding="UTF-8") as file:
         file.write(json_object)
 
-    weights_plus_wins_file_list = []
-    segmented_lut_file_list = []
     print("Saving LUTs for", game_id, "in", betmode)
-    for repeat_index in range(num_repeats):
-        for thread in range(threads):
-            weights_plus_wins_file_list += [
-                gamestate.output_files.get_temp_lookup_name(betmode, thread, repeat_index)
-            ]
-            segmented_lut_file_list += [
-                gamestate.output_files.get_temp_segmented_name(betmode, thread, repeat_index)
-            ]
+    weights_plus_wins_file_list = [files["lookup"] for files in temp_files]
+    segmented_lut_file_list = [files["segmented"] for files in temp_files]
 
     with open(
         gamestate.output_files.get_final_lookup_name(betmode),
@@ -261,25 +335,6 @@ def output_lookup_and_force_files(
                 outfile.write(infile.read())
 
 
-def write_json(gamestate, filename: str):
-    """Convert the list of dictionaries to a JSON-encoded string and compress it in chunks."""
-    json_objects = [json.dumps(item) for item in gamestate.library.values()]
-    combined_data = "\n".join(json_objects) + "\n"
-
-    if filename.endswith(".zst"):
-        compressor = zstd.ZstdCompressor()
-        compressed_data = compressor.compress(combined_data.encode("UTF-8"))
-        with open(filename, "wb") as f:
-            f.write(compressed_data)
-    else:
-        with open(filename, "w", encoding="UTF-8") as f:
-            if not (gamestate.config.output_regular_json):
-                f.write(combined_data)
-            else:
-                j_regular = [item for item in gamestate.library.values()]
-                f.write(json.dumps(j_regular))
-
-
 def print_recorded_wins(gamestate: object, name: str = ""):
     """Temporary file generation for wins/recorded results."""
     json_object = json.dumps(str(gamestate.recorded_events), indent=4)
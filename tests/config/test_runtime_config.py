@@ -0,0 +1,174 @@
+"""Test the compiled runtime view of a game configuration."""
+
+import collections
+import itertools
+import random
+from copy import deepcopy
+import pytest
+from src.config.config import Config
+from src.config.betmode import BetMode
+from src.config.distributions import Distribution
+from src.config.runtime import RuntimeConfig, ReelWindowTable, get_runtime_config
+
+
+def linear_win_level(levels, win_amount):
+    for idx, pair in levels.items():
+        if win_amount >= pair[0] and win_amount < pair[1]:
+            return idx
+
+
+def test_win_levels_match_linear_scan():
+    config = Config()
+    for key, levels in config.win_levels.items():
+        amounts = [0, 0.05, 0.1, 0.99, 1.0, 2.0, 99.99, 100.0, 4999.9, 5000, 1e9]
+        amounts += [pair[0] for pair in levels.values()]
+        for amount in amounts:
+            assert config.get_win_level(amount, key) == linear_win_level(levels, amount)
+
+
+def test_overlapping_win_levels_keep_first_match():
+    config = Config()
+    config.win_levels = {"overlap": {1: (0, 10), 2: (5, 20), 3: (20, float("inf"))}}
+    assert get_runtime_config(config).win_levels["overlap"] is None
+    assert [config.get_win_level(x, "overlap") for x in [0, 7, 15, 25]] == [1, 1, 2, 3]
+    with pytest.raises(RuntimeError):
+        config.get_win_level(-1, "overlap")
+
+
+def test_paytable_arrays_and_frozen_view():
+    config = Config()
+    config.paytable = {(3, "H1"): 5, (5, "H1"): 20, (4, "L1"): 1.5}
+    config.special_symbols = {"wild": ["W"], "scatter": ["S"]}
+    runtime = RuntimeConfig(config)
+    assert runtime.symbol_names == ("H1", "L1", "S", "W")
+    assert runtime.get_pay(5, "H1") == 20
+    assert runtime.get_pay(4, "H1") == 0.0
+    assert runtime.pay_values[runtime.get_symbol_id("L1"), 4] == 1.5
+    assert runtime.pays.sum() == 3
+    assert runtime.pay_rows[runtime.get_symbol_id("H1")] == (None, None, None, 5, None, 20)
+    assert runtime.pay_rows[runtime.get_symbol_id("W")] == (None,) * 6
+    with pytest.raises(AttributeError):
+        runtime.symbol_ids = {}
+    with pytest.raises(ValueError):
+        runtime.pay_values[0, 0] = 1
+
+
+def test_deepcopy_shares_tables_and_copies_bet_modes():
+    config = Config()
+    config.paytable = {(3, "H1"): 5}
+    config.special_symbols = {"wild": ["W"], "scatter": ["S"]}
+    config.num_rows = [3] * 3
+    config.reels = {"BR0": [["H1", "W", "S", "H1"]] * 3}
+    distribution = Distribution(criteria="basegame", quota=1, conditions={"reel_weights": {"basegame": {"BR0": 1}}})
+    config.bet_modes = [BetMode("base", 1.0, 0.97, 5000, False, False, False, [distribution])]
+    runtime = get_runtime_config(config)
+
+    copied = deepcopy(config)
+    copied_runtime = get_runtime_config(copied)
+    assert copied_runtime is not runtime
+    assert copied_runtime.reel_windows is runtime.reel_windows
+    assert copied_runtime.pay_values is runtime.pay_values
+    assert copied_runtime.get_betmode("base") is copied.bet_modes[0]
+    assert copied_runtime.get_distribution("base", "basegame") is copied.bet_modes[0].get_distributions()[0]
+    copied_runtime.get_betmode("base").add_force_key(["symbol", "H1"])
+    assert len(runtime.get_betmode("base").get_force_keys()) == 0
+
+
+def legacy_anticipation(windows, trigger):
+    anticipation, count, first_scatter_reel = [0] * len(windows), 0, -1
+    for reel, window in enumerate(windows):
+        for name in window:
+            if name == "S":
+                count += 1
+                if count >= trigger and first_scatter_reel == -1:
+                    first_scatter_reel = reel + 1
+    if first_scatter_reel > -1:
+        for offset, reel in enumerate(range(first_scatter_reel, len(windows))):
+            anticipation[reel] = offset + 1
+    return anticipation
+
+
+def test_reel_windows_match_modulo_lookups():
+    rng = random.Random(1)
+    reelstrip = [[rng.choice(["H1", "L1", "S", "W"]) for _ in range(rng.randint(4, 9))] for _ in range(5)]
+    num_rows = [3, 4, 3, 4, 3]
+    special_symbols = {"wild": ["W"], "scatter": ["S"]}
+    table = ReelWindowTable(reelstrip, num_rows, special_symbols, {"H1": 0, "L1": 1, "S": 2, "W": 3})
+    for _ in range(200):
+        stops = [rng.randrange(-3, len(strip)) for strip in reelstrip]
+        windows = []
+        for reel, stop in enumerate(stops):
+            strip = reelstrip[reel]
+            expected = [strip[(stop + row) % len(strip)] for row in range(-1, num_rows[reel] + 1)]
+            assert list(table.get_window(reel, stop)) == expected
+            visible = expected[1:-1]
+            assert table.get_special_rows(reel, stop) == (
+                tuple(r for r, n in enumerate(visible) if n == "W"),
+                tuple(r for r, n in enumerate(visible) if n == "S"),
+            )
+            windows.append(visible)
+        for trigger in [1, 2, 3]:
+            counts = table.get_scatter_counts(stops)
+            assert table.get_anticipation(counts, trigger) == legacy_anticipation(windows, trigger)
+
+
+def test_stop_count_sampler_matches_enumeration():
+    rng = random.Random(3)
+    reelstrip = [[rng.choice(["H1", "L1", "S", "S", "W"]) for _ in range(rng.randint(4, 7))] for _ in range(4)]
+    table = ReelWindowTable(reelstrip, [3, 2, 3, 2], {"wild": ["W"], "scatter": ["S"]}, {})
+    sampler = table.get_count_sampler(("S",))
+    by_total = {}
+    for stops in itertools.product(*[range(length) for length in table.lengths]):
+        by_total.setdefault(sum(table.get_scatter_counts(stops)), []).append(tuple(stops))
+    for total, combinations in by_total.items():
+        assert sampler.count_combinations([total]) == len(combinations)
+    assert sampler.count_combinations([max(by_total) + 1]) == 0
+    with pytest.raises(RuntimeError):
+        sampler.draw([max(by_total) + 1])
+
+    target = sorted(by_total, key=lambda t: len(by_total[t]))[len(by_total) // 2]
+    random.seed(11)
+    draws = collections.Counter(tuple(sampler.draw([target])) for _ in range(40 * len(by_total[target])))
+    assert set(draws) == set(by_total[target])
+    assert max(draws.values()) < 4 * min(draws.values())
+
+
+def test_conditional_reel_weights_match_rejection():
+    """P(reelstrip, stops | count < trigger) under redraw-until-accepted equals the direct two-step draw."""
+    config = Config()
+    config.special_symbols = {"scatter": ["S"]}
+    config.paytable = {(3, "H1"): 1}
+    config.num_rows = [2, 3, 2]
+    config.reels = {
+        "R0": [["S", "H1", "S", "H1", "H1"], ["H1", "S", "H1", "H1"], ["S", "S", "H1", "H1", "H1", "H1"]],
+        "R1": [["H1", "H1", "S"], ["S", "H1", "H1", "H1", "H1"], ["H1", "S", "H1"]],
+    }
+    reel_weights = {"R0": 3, "R1": 1}
+    runtime = RuntimeConfig(config)
+    totals = (0, 1, 2)
+
+    rejection = {}
+    for reelstrip_id, weight in reel_weights.items():
+        table = runtime.get_reel_windows(reelstrip_id)
+        num_stops = table.lengths[0] * table.lengths[1] * table.lengths[2]
+        for stops in itertools.product(*[range(length) for length in table.lengths]):
+            if sum(table.get_scatter_counts(stops)) in totals:
+                rejection[(reelstrip_id, stops)] = weight / sum(reel_weights.values()) / num_stops
+    accepted = sum(rejection.values())
+
+    weights = runtime.get_conditional_reel_weights(reel_weights, ("S",), totals)
+    for (reelstrip_id, stops), probability in rejection.items():
+        sampler = runtime.get_reel_windows(reelstrip_id).get_count_sampler(("S",))
+        direct = weights[reelstrip_id] / sum(weights.values()) / sampler.count_combinations(totals)
+        assert direct == pytest.approx(probability / accepted)
+
+    random.seed(5)
+    draws = collections.Counter()
+    for _ in range(20000):
+        reelstrip_id = random.choices(list(weights), list(weights.values()))[0]
+        stops = runtime.get_reel_windows(reelstrip_id).get_count_sampler(("S",)).draw(totals)
+        draws[(reelstrip_id, tuple(stops))] += 1
+    assert set(draws) == set(rejection)
+    for outcome, probability in rejection.items():
+        expected = 20000 * probability / accepted
+        assert abs(draws[outcome] - expected) < 5 * expected**0.5 + 2
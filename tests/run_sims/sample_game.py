@@ -0,0 +1,39 @@
+"""Sample games with their library redirected to a temporary directory."""
+
+import os
+import sys
+import importlib
+import zstandard as zstd
+from src.config import output_filenames
+from src.config.paths import PATH_TO_GAMES
+
+GAME_MODULES = ["gamestate", "game_config", "game_override", "game_executables", "game_calculations", "game_events"]
+
+
+def create_sample_gamestate(game_id: str, library_root, monkeypatch) -> tuple:
+    """Sample game writing its library under library_root rather than the games directory.
+    Game modules share names across games, so any previously imported game is dropped first."""
+    monkeypatch.syspath_prepend(os.path.join(PATH_TO_GAMES, game_id))
+    monkeypatch.setattr(output_filenames, "PATH_TO_GAMES", str(library_root))
+    for module in GAME_MODULES:
+        monkeypatch.delitem(sys.modules, module, raising=False)
+    config = importlib.import_module("game_config").GameConfig()
+    return importlib.import_module("gamestate").GameState(config), config
+
+
+def read_library(gamestate: object) -> dict:
+    """Contents of the final output files, keyed by path relative to the library."""
+    library_path = gamestate.output_files.library_path
+    contents = {}
+    for folder in ["publish_files", "lookup_tables", "forces", "configs"]:
+        for name in sorted(os.listdir(os.path.join(library_path, folder))):
+            path = os.path.join(library_path, folder, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if name.endswith(".zst"):
+                data = zstd.ZstdDecompressor().decompressobj().decompress(data)
+            if name.startswith("criteriaCost"):
+                # Rejection costs are ordered by wall time, only compare the counts
+                data = sorted(line.split(",")[:6] for line in data.decode("UTF-8").splitlines())
+            contents[os.path.join(folder, name)] = data
+    return contents
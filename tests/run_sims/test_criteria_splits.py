@@ -0,0 +1,34 @@
+"""Test apportionment and shuffling of criteria across simulation numbers."""
+
+import numpy as np
+from src.state.run_sims import get_criteria_counts, assign_sim_criteria, get_criteria_seeds, string_to_int
+
+
+def test_largest_remainder_counts():
+    """Counts sum exactly to the number of simulations, leftover sims go to the largest remainders."""
+    counts = get_criteria_counts(["wincap", "freegame", "0", "basegame"], [0.001, 0.1, 0.4, 0.499], 1000)
+    assert counts == {"wincap": 1, "freegame": 100, "0": 400, "basegame": 499}
+
+    counts = get_criteria_counts(["a", "b", "c"], [1, 1, 1], 100)
+    assert counts == {"a": 34, "b": 33, "c": 33}
+
+    counts = get_criteria_counts(["rare", "common"], [1e-9, 1.0], 10)
+    assert counts == {"rare": 1, "common": 9}
+
+
+def test_assigned_codes_are_seeded_permutation():
+    num_sims_criteria = {"0": 300, "basegame": 650, "freegame": 50}
+    code_table, codes = assign_sim_criteria(num_sims_criteria, 1000)
+    assert code_table == ["0", "basegame", "freegame"]
+    assert codes.dtype == np.int8
+    assert np.bincount(codes).tolist() == [300, 650, 50]
+    assert np.array_equal(codes, assign_sim_criteria(num_sims_criteria, 1000)[1])
+    assert not np.array_equal(codes, assign_sim_criteria(num_sims_criteria, 1000, seed=1)[1])
+
+
+def test_criteria_seeds():
+    """Seeds are offset from the criteria hash by the count of earlier sims with the same criteria."""
+    code_table = ["basegame", "freegame"]
+    seeds = get_criteria_seeds(code_table, np.array([0, 1, 0, 0, 1], dtype=np.int8))
+    base, free = string_to_int("basegame"), string_to_int("freegame")
+    assert seeds.tolist() == [base, free, base + 1, base + 2, free + 1]
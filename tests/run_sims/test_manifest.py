@@ -0,0 +1,84 @@
+"""Test chunk manifest used for resuming interrupted runs."""
+
+import os
+import pytest
+import numpy as np
+from src.state.manifest import RunManifest
+from src.state.sim_assignment import SimulationAssignment, release_shared_assignments
+from src.state.run_sims import create_books
+from src.state.worker_pool import SimulationTask, SimulationResult
+from tests.run_sims.sample_game import create_sample_gamestate, read_library
+
+
+@pytest.fixture(autouse=True)
+def release_assignments():
+    yield
+    release_shared_assignments()
+
+
+def create_chunk(temp_path, criteria=("0", "basegame")):
+    """Write dummy temporary files for a single chunk."""
+    assignment = SimulationAssignment(list(criteria), np.arange(2, dtype=np.int8), np.array([1, 2], dtype=np.uint64))
+    task = SimulationTask("base", 0, 0, 0, 2, assignment)
+    temp_files = {}
+    for kind in ["books", "lookup"]:
+        temp_files[kind] = os.path.join(temp_path, f"{kind}_base_0_0")
+        with open(temp_files[kind], "w", encoding="UTF-8") as f:
+            f.write(f"{kind} data\n")
+    return task, SimulationResult("base", 0, 0, ["kind", "symbol"], temp_files)
+
+
+def test_resume_verified_chunk(tmp_path):
+    task, result = create_chunk(str(tmp_path))
+    RunManifest(str(tmp_path)).record(task, result)
+
+    resumed = RunManifest(str(tmp_path), resume=True).get_verified_result(task)
+    assert resumed is not None
+    assert resumed.force_keys == ["kind", "symbol"]
+    assert resumed.temp_files == result.temp_files
+
+
+def test_modified_chunk_is_rerun(tmp_path):
+    task, result = create_chunk(str(tmp_path))
+    RunManifest(str(tmp_path)).record(task, result)
+    with open(result.temp_files["lookup"], "a", encoding="UTF-8") as f:
+        f.write("truncated")
+    assert RunManifest(str(tmp_path), resume=True).get_verified_result(task) is None
+
+
+def test_changed_criteria_is_rerun(tmp_path):
+    task, result = create_chunk(str(tmp_path))
+    RunManifest(str(tmp_path)).record(task, result)
+    new_task, _ = create_chunk(str(tmp_path), criteria=("freegame", "basegame"))
+    assert RunManifest(str(tmp_path), resume=True).get_verified_result(new_task) is None
+
+
+def test_new_run_clears_manifest(tmp_path):
+    task, result = create_chunk(str(tmp_path))
+    RunManifest(str(tmp_path)).record(task, result)
+    assert RunManifest(str(tmp_path)).get_verified_result(task) is None
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path, monkeypatch):
+    """The cluster game keeps grid multipliers between simulations, so resumed chunks run at threads=1 must start
+    from the initial gamestate, as they do in an uninterrupted run."""
+    num_sim_args = {"base": 40, "bonus": 40}
+    gamestate, config = create_sample_gamestate("0_0_cluster", tmp_path / "full", monkeypatch)
+    create_books(gamestate, config, dict(num_sim_args), 20, 1, True, False)
+
+    interrupted, config = create_sample_gamestate("0_0_cluster", tmp_path / "resumed", monkeypatch)
+    run_sims = type(interrupted).run_sims
+
+    def interrupt_bonus(self, betmode, sim_to_criteria, sim_start, *args, **kwargs):
+        if betmode == "bonus" and sim_start >= 20:
+            raise KeyboardInterrupt
+        return run_sims(self, betmode, sim_to_criteria, sim_start, *args, **kwargs)
+
+    monkeypatch.setattr(type(interrupted), "run_sims", interrupt_bonus)
+    with pytest.raises(KeyboardInterrupt):
+        create_books(interrupted, config, dict(num_sim_args), 20, 1, True, False)
+    assert len(RunManifest(interrupted.output_files.temp_path, resume=True).entries) == 12
+
+    resumed, config = create_sample_gamestate("0_0_cluster", tmp_path / "resumed", monkeypatch)
+    create_books(resumed, config, dict(num_sim_args), 20, 1, True, False, resume=True)
+    assert read_library(resumed) == read_library(gamestate)
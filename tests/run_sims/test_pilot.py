@@ -0,0 +1,50 @@
+"""Test batch size recommendations from pilot estimates."""
+
+import os
+import json
+from src.state.pilot import get_batch_peak_memory, is_valid_batch_size, recommend_batch_size
+from src.state.run_sims import estimate_books
+from tests.run_sims.sample_game import create_sample_gamestate
+
+
+def test_recommended_batch_fits_budget():
+    estimate = {"worker_base_memory": 1e8, "memory_per_sim": 1e4, "merge_memory": 2e9}
+    num_sims = [int(1e7), int(1e6)]
+    batch_size = recommend_batch_size(estimate, 4e9, threads=10, num_sims=num_sims)
+    assert batch_size is not None
+    assert is_valid_batch_size(batch_size, 10, num_sims)
+    assert get_batch_peak_memory(estimate, batch_size, 10) <= 4e9
+    assert get_batch_peak_memory(estimate, batch_size + 1000, 10) > 4e9
+
+
+def test_no_batch_when_merge_exceeds_budget():
+    estimate = {"worker_base_memory": 1e8, "memory_per_sim": 1e4, "merge_memory": 5e9}
+    assert recommend_batch_size(estimate, 4e9, threads=10, num_sims=[int(1e7)]) is None
+
+
+def test_batch_size_divisibility():
+    assert is_valid_batch_size(5000, 10, [int(1e7)])
+    assert not is_valid_batch_size(3001, 10, [int(1e7)])
+    assert is_valid_batch_size(3001, 10, [1000])
+
+
+def test_pilot_on_sample_game(tmp_path, monkeypatch):
+    gamestate, config = create_sample_gamestate("0_0_lines", tmp_path, monkeypatch)
+    num_sim_args = {"base": int(1e5), "bonus": int(1e4)}
+    estimate = estimate_books(gamestate, config, num_sim_args, 1000, 4, True, pilot_sims=3, memory_budget_gb=4)
+
+    for betmode, num_sims in num_sim_args.items():
+        mode = estimate["modes"][betmode]
+        assert mode["num_sims"] == num_sims
+        assert mode["sims_per_sec"] > 0 and mode["mean_attempts"] >= 1
+        assert 0 < mode["wall_seconds"] < num_sims
+        assert num_sims * 100 < mode["disk_bytes"] < num_sims * mode["book_bytes"] * 2
+    assert estimate["wall_seconds"] == round(sum(m["wall_seconds"] for m in estimate["modes"].values()), 1)
+    assert estimate["disk_bytes"] == sum(m["disk_bytes"] for m in estimate["modes"].values())
+    assert 0 < estimate["memory_per_sim"] < 1e6
+    assert 4 * estimate["worker_base_memory"] < estimate["peak_memory"] < estimate["memory_budget"]
+    assert is_valid_batch_size(estimate["recommended_batch_size"], 4, list(num_sim_args.values()))
+
+    with open(gamestate.output_files.get_pilot_estimate_name(), "r", encoding="UTF-8") as f:
+        assert json.load(f) == estimate
+    assert not os.path.exists(os.path.join(gamestate.output_files.temp_path, "pilot"))
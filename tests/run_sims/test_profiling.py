@@ -0,0 +1,26 @@
+"""Test merging of per-worker simulation profiles."""
+
+import os
+import shutil
+from src.state.profiling import run_profiled, merge_profiles, get_worker_profile_path
+
+
+def busy_function(n):
+    return sum(i * i for i in range(n))
+
+
+def test_worker_profiles_merge(tmp_path):
+    profile_dir = str(tmp_path)
+    assert run_profiled(profile_dir, "base", busy_function, 1000) == busy_function(1000)
+    run_profiled(profile_dir, "base", busy_function, 10)
+    worker_path = get_worker_profile_path(profile_dir, "base")
+    assert os.path.isfile(worker_path)
+
+    # a second worker process with the same workload
+    shutil.copy(worker_path, os.path.join(profile_dir, "base_worker_0.prof"))
+    output_path = os.path.join(profile_dir, "merged.prof")
+    stats = merge_profiles(profile_dir, "base", output_path)
+
+    calls = [v[1] for k, v in stats.stats.items() if k[2] == "busy_function"]
+    assert calls == [4]
+    assert os.path.isfile(output_path)
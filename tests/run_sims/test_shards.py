@@ -0,0 +1,80 @@
+"""Test splitting of tasks between shards and validation of shard bundles."""
+
+import os
+import json
+import pytest
+from src.state.run_sims import create_books
+from src.state.shards import (
+    get_shard_tasks,
+    load_shard_bundles,
+    check_chunk_ranges,
+    merge_shard_bundles,
+    SHARD_METADATA,
+)
+from tests.run_sims.sample_game import create_sample_gamestate, read_library
+
+
+def test_shards_cover_all_tasks():
+    tasks = list(range(10))
+    for num_shards in [1, 3, 4, 10, 12]:
+        shards = [get_shard_tasks(tasks, (i, num_shards)) for i in range(num_shards)]
+        assert [t for shard in shards for t in shard] == tasks
+
+
+def write_bundle(path, shard, assignment="abc"):
+    os.makedirs(path)
+    metadata = {
+        "game_id": "test",
+        "shard": list(shard),
+        "compress": True,
+        "modes": {"base": {"num_chunks": 2, "assignment": assignment, "chunks": []}},
+    }
+    with open(os.path.join(path, SHARD_METADATA), "w", encoding="UTF-8") as f:
+        json.dump(metadata, f)
+    return path
+
+
+def test_bundle_validation(tmp_path):
+    first = write_bundle(str(tmp_path / "a"), (1, 2))
+    second = write_bundle(str(tmp_path / "b"), (0, 2))
+    bundles = load_shard_bundles([first, second])
+    assert [metadata["shard"][0] for _, metadata in bundles] == [0, 1]
+
+    with pytest.raises(RuntimeError):
+        load_shard_bundles([first])
+    with pytest.raises(RuntimeError):
+        load_shard_bundles([first, write_bundle(str(tmp_path / "c"), (0, 2), assignment="xyz")])
+
+
+@pytest.mark.parametrize("game_id", ["0_0_lines", "0_0_cluster"])
+def test_merged_shards_match_single_node(game_id, tmp_path, monkeypatch):
+    """Shards run at threads=1, so chunks simulated in the same process must not share gamestate.
+    The cluster game keeps grid multipliers between simulations."""
+    num_sim_args = {"base": 40, "bonus": 40}
+    gamestate, config = create_sample_gamestate(game_id, tmp_path / "single", monkeypatch)
+    create_books(gamestate, config, dict(num_sim_args), 20, 1, True, False)
+
+    bundle_paths = []
+    for shard_index in range(2):
+        node_gamestate, node_config = create_sample_gamestate(game_id, tmp_path / f"node{shard_index}", monkeypatch)
+        create_books(node_gamestate, node_config, dict(num_sim_args), 20, 1, True, False, shard=(shard_index, 2))
+        bundle_paths.append(node_gamestate.output_files.get_shard_path(shard_index, 2))
+
+    merged_gamestate, _ = create_sample_gamestate(game_id, tmp_path / "merged", monkeypatch)
+    merge_shard_bundles(merged_gamestate, bundle_paths)
+
+    single, merged = read_library(gamestate), read_library(merged_gamestate)
+    assert "configs/event_config_base.json" in merged
+    assert merged == single
+
+    with pytest.raises(RuntimeError):
+        merge_shard_bundles(create_sample_gamestate(game_id, tmp_path / "partial", monkeypatch)[0], bundle_paths[:1])
+
+
+def test_merge_rejects_gaps_in_chunk_ranges():
+    chunks = [{"sim_start": 0, "sim_end": 10}, {"sim_start": 10, "sim_end": 20}]
+    check_chunk_ranges("base", chunks, 20)
+    with pytest.raises(RuntimeError):
+        check_chunk_ranges("base", chunks, 30)
+    with pytest.raises(RuntimeError):
+        check_chunk_ranges("base", [chunks[0], {"sim_start": 12, "sim_end": 20}], 20)
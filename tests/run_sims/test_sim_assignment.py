@@ -0,0 +1,63 @@
+"""Test shared criteria and seed arrays handed to simulation workers."""
+
+import pickle
+import pytest
+import numpy as np
+from src.state.sim_assignment import (
+    SimulationAssignment,
+    get_code_dtype,
+    release_shared_assignments,
+    _shared_blocks,
+)
+
+
+@pytest.fixture(autouse=True)
+def release_assignments():
+    yield
+    release_shared_assignments()
+
+
+def create_assignment(criteria: list, seeds: list) -> SimulationAssignment:
+    """Encode a list of criteria names the same way assign_sim_criteria() does."""
+    code_table = list(dict.fromkeys(criteria))
+    codes = np.array([code_table.index(c) for c in criteria], dtype=get_code_dtype(len(code_table)))
+    return SimulationAssignment(code_table, codes, np.asarray(seeds, dtype=np.uint64))
+
+
+def test_assignment_round_trip():
+    criteria = ["basegame", "0", "freegame", "basegame", "wincap", "0"]
+    seeds = [1, 2**48 + 7, 3, 2**63 + 11, 5, 6]
+    assignment = create_assignment(criteria, seeds)
+
+    assert assignment.code_table == ["basegame", "0", "freegame", "wincap"]
+    assert np.dtype(assignment.code_dtype) == np.int8
+    assert assignment.get_block_size() == len(criteria) * 9
+    assert assignment.get_criteria(0, 6) == criteria
+    assert assignment.get_criteria(2, 4) == ["freegame", "basegame"]
+    assert assignment.get_seeds(0, 6) == seeds
+    assert all(isinstance(s, int) for s in assignment.get_seeds(0, 6))
+
+
+def test_pickled_assignment_attaches_to_block():
+    criteria = [str(i % 300) for i in range(10000)]
+    assignment = create_assignment(criteria, list(range(10000)))
+    assert np.dtype(assignment.code_dtype) == np.int16
+
+    payload = pickle.dumps(assignment)
+    shm = _shared_blocks.pop(assignment.name)
+    try:
+        worker_view = pickle.loads(payload)
+        assert worker_view.get_criteria(9990, 10000) == criteria[9990:]
+        assert worker_view.get_seeds(5, 8) == [5, 6, 7]
+    finally:
+        _shared_blocks.pop(assignment.name).close()
+        _shared_blocks[assignment.name] = shm
+
+
+def test_worker_arrays_are_read_only():
+    assignment = create_assignment(["0", "basegame"], [1, 2])
+    seeds, codes = assignment.get_arrays()
+    with pytest.raises(ValueError):
+        seeds[0] = 5
+    with pytest.raises(ValueError):
+        codes[0] = 1
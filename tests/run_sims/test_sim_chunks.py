@@ -0,0 +1,23 @@
+"""Test splitting of simulation numbers into worker chunks."""
+
+from src.state.run_sims import get_sim_chunks
+
+
+def test_chunks_cover_all_sims():
+    """Chunks are contiguous, ordered and cover every simulation exactly once."""
+    batches = get_sim_chunks(num_sims=1000, threads=4, batching_size=50, chunks_per_thread=3)
+    assert len(batches) == 5
+    flat = [chunk for batch in batches for chunk in batch]
+    assert flat[0][0] == 0
+    assert flat[-1][1] == 1000
+    for prev, nxt in zip(flat[:-1], flat[1:]):
+        assert prev[1] == nxt[0]
+    assert all(len(batch) == 12 for batch in batches)
+
+
+def test_chunks_small_run():
+    """Fewer simulations than chunks does not produce empty chunks."""
+    batches = get_sim_chunks(num_sims=6, threads=2, batching_size=100, chunks_per_thread=4)
+    flat = [chunk for batch in batches for chunk in batch]
+    assert all(end > start for start, end in flat)
+    assert sum(end - start for start, end in flat) == 6
@@ -0,0 +1,31 @@
+"""Test aggregation of worker throughput updates."""
+
+import os
+import json
+from src.state.telemetry import ProgressReporter, RunTelemetry
+
+
+def test_worker_updates_are_aggregated(tmp_path):
+    metrics_path = os.path.join(str(tmp_path), "run_metrics.json")
+    telemetry = RunTelemetry(metrics_path, "test_game")
+    telemetry.add_mode("base", 10, num_completed=4)
+    telemetry.add_mode("bonus", 5)
+    telemetry.start()
+
+    reporter = ProgressReporter(telemetry.queue, publish_interval=60)
+    reporter.start_task("base")
+    for criteria, spins in [("0", 1), ("basegame", 3), ("freegame", 12)]:
+        reporter.update(criteria, spins)
+    reporter.start_task("bonus")
+    reporter.update("freegame", 2)
+    reporter.publish()
+
+    metrics = telemetry.stop()
+    assert metrics["sims_completed"] == 4
+    assert metrics["sims_remaining"] == 7
+    assert metrics["modes"]["base"]["spins"] == 16
+    assert metrics["modes"]["base"]["criteria"] == {"0": 1, "basegame": 1, "freegame": 1}
+    assert metrics["modes"]["bonus"]["criteria"] == {"freegame": 1}
+    assert list(metrics["workers"].values())[0]["spins"] == 18
+    with open(metrics_path, "r", encoding="UTF-8") as f:
+        assert json.load(f)["sims_completed"] == 4
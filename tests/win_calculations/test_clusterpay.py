@@ -1,8 +1,11 @@
 """Test basic cluster-calculation functionality."""
 
+import random
+import numpy as np
 import pytest
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.cluster import Cluster
+from src.calculations.symbol import get_attribute_mask, get_board_arrays
 
 
 class GameClusterConfig:
@@ -99,3 +102,62 @@ def test_basic_cluster(gamestate):
         clusters=clusters,
     )
     assert total_win == gamestate.config.paytable[(9, "H1")]
+
+
+def reference_clusters(names, wilds):
+    """Connected like-symbol groups (with shared wilds) as sets of cells, from a plain breadth-first search."""
+    clusters, seen = [], set()
+    for reel, reel_names in enumerate(names):
+        for row, name in enumerate(reel_names):
+            if (reel, row) in seen or wilds[reel][row]:
+                continue
+            group, queue = {(reel, row)}, [(reel, row)]
+            while queue:
+                r, c = queue.pop()
+                for nr, nc in [(r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)]:
+                    if 0 <= nr < len(names) and 0 <= nc < len(names[nr]) and (nr, nc) not in group:
+                        if wilds[nr][nc] or names[nr][nc] == name:
+                            group.add((nr, nc))
+                            queue.append((nr, nc))
+            seen |= {cell for cell in group if not wilds[cell[0]][cell[1]]}
+            clusters.append((name, frozenset(group)))
+    return sorted(clusters, key=lambda cluster: sorted(cluster[1]))
+
+
+@pytest.mark.parametrize("size", [6, 8, 10])
+def test_clusters_match_reference_search(gamestate, size):
+    rng = random.Random(size)
+    for _ in range(50):
+        board = [
+            [gamestate.create_symbol(rng.choice(["H1", "H2", "WM", "X"])) for _ in range(size)] for _ in range(size)
+        ]
+        clusters = Cluster.get_clusters(board)
+        found = sorted(
+            ((sym, frozenset(cluster)) for sym, sym_clusters in clusters.items() for cluster in sym_clusters),
+            key=lambda cluster: sorted(cluster[1]),
+        )
+        names = [[sym.name for sym in reel] for reel in board]
+        wilds = [[sym.name == "WM" for sym in reel] for reel in board]
+        assert found == reference_clusters(names, wilds)
+
+
+def test_large_cluster_without_recursion(gamestate):
+    board = [[gamestate.create_symbol("H1") for _ in range(40)] for _ in range(40)]
+    clusters = Cluster.get_clusters(board)
+    assert len(clusters["H1"]) == 1 and len(clusters["H1"][0]) == 1600
+
+
+def test_cluster_batch_matches_get_cluster_data(gamestate):
+    rng = random.Random(4)
+    boards = [
+        [[gamestate.create_symbol(rng.choice(["H1", "H1", "H2", "WM", "X"])) for _ in range(6)] for _ in range(6)]
+        for _ in range(200)
+    ]
+    expected = [Cluster.get_cluster_data(gamestate.config, board, global_multiplier=2)["totalWin"] for board in boards]
+    arrays = [get_board_arrays(board) for board in boards]
+    symbol_ids, multipliers, flags = (np.stack([array[i] for array in arrays]) for i in range(3))
+    wilds = (flags & get_attribute_mask("wild")) != 0
+
+    totals = Cluster.get_cluster_wins_batch(symbol_ids, wilds, gamestate.config, multipliers, global_multiplier=2)
+    assert totals == pytest.approx(expected)
+    assert sum(expected) > 0
@@ -1,8 +1,11 @@
 """Test basic lines-calculation functionality."""
 
+import random
+import numpy as np
 import pytest
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.lines import Lines
+from src.calculations.symbol import get_board_arrays
 
 
 class GameLinesConfig:
@@ -122,3 +125,27 @@ def test_linespay_mult(gamestate):
 
     windata = Lines.get_lines(gamestate.board, gamestate.config)
     assert windata["totalWin"] == (gamestate.config.paytable[(5, "WM")] * sum([3, 3, 3, 3, 3]))
+
+
+def test_linespay_batch_matches_get_lines(gamestate):
+    "Batch evaluation of int-coded boards matches get_lines totals."
+    rng = random.Random(7)
+    boards = []
+    for _ in range(200):
+        for idx, _ in enumerate(gamestate.board):
+            for idy, _ in enumerate(gamestate.board[idx]):
+                gamestate.board[idx][idy] = gamestate.create_symbol(rng.choice(["W", "H1", "WM", "X"]))
+        boards.append([list(reel) for reel in gamestate.board])
+    arrays = [get_board_arrays(board) for board in boards]
+    symbol_ids, multipliers, flags = (np.stack([array[i] for array in arrays]) for i in range(3))
+
+    for method in ["global", "symbol", "combined"]:
+        expected = [
+            Lines.get_lines(board, gamestate.config, multiplier_method=method, global_multiplier=2)["totalWin"]
+            for board in boards
+        ]
+        totals = Lines.get_lines_batch(
+            symbol_ids, flags, gamestate.config, multipliers, multiplier_method=method, global_multiplier=2
+        )
+        assert totals == pytest.approx(expected)
+    assert sum(expected) > 0
@@ -1,8 +1,11 @@
 """Test basic scatterpay-calculation functionality."""
 
+import random
+import numpy as np
 import pytest
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.scatter import Scatter
+from src.calculations.symbol import get_attribute_mask, get_board_arrays
 
 
 class GameScatterConfig:
@@ -103,3 +106,61 @@ def test_scatterpay_wilds(gamestate):
             assert wd["win"] == 3
 
     assert windata["totalWin"] == 53
+
+
+def test_scatterpay_positions_and_explode(gamestate):
+    """Winning positions list the symbol in board order followed by the wilds, and only winning symbols explode."""
+    for idx, _ in enumerate(gamestate.board):
+        for idy, _ in enumerate(gamestate.board[idx]):
+            gamestate.board[idx][idy] = gamestate.create_symbol("H1" if idy < 2 else "X")
+    gamestate.board[4][1] = gamestate.create_symbol("X")
+    gamestate.board[0][4] = gamestate.create_symbol("WM")
+
+    windata = Scatter.get_scatterpay_wins(gamestate.config, gamestate.board, global_multiplier=2)
+
+    assert len(windata["wins"]) == 1
+    positions = windata["wins"][0]["positions"]
+    assert positions[-1] == {"reel": 0, "row": 4}
+    assert positions[:-1] == [{"reel": reel, "row": row} for reel in range(5) for row in range(2)][:-1]
+    assert windata["totalWin"] == 10 * 2 * 3
+    assert gamestate.board[0][4].check_attribute("explode")
+    assert not gamestate.board[0][3].check_attribute("explode")
+
+
+def test_scatterpay_batch_matches_get_scatterpay_wins(gamestate):
+    rng = random.Random(3)
+    boards = [
+        [
+            [gamestate.create_symbol(rng.choice(["H1", "H1", "H2", "H2", "WM", "W", "M", "X"])) for _ in range(5)]
+            for _ in range(5)
+        ]
+        for _ in range(300)
+    ]
+    expected = [
+        Scatter.get_scatterpay_wins(gamestate.config, board, global_multiplier=2)["totalWin"] for board in boards
+    ]
+    arrays = [get_board_arrays(board) for board in boards]
+    symbol_ids, multipliers, flags = (np.stack([array[i] for array in arrays]) for i in range(3))
+    wilds = (flags & get_attribute_mask("wild")) != 0
+
+    totals = Scatter.get_scatterpay_wins_batch(symbol_ids, wilds, gamestate.config, multipliers, global_multiplier=2)
+    assert totals == pytest.approx(expected)
+    assert sum(expected) > 0
+
+
+def test_scatterpay_overlay_fallbacks_count_towards_limit():
+    """Overlays falling back to (0, 0) still use up one of the max_reels overlay rows."""
+    config = GameScatterConfig()
+    config.paytable = {(1, name): 1 for name in ["A", "B", "C", "D", "E", "F"]}
+    gamestate = GamestateTest(config)
+    gamestate.create_symbol_map()
+    gamestate.assign_special_sym_function()
+    board = [[gamestate.create_symbol("X") for _ in range(5)] for _ in range(5)]
+    for reel, name in enumerate(["A", "B", "C", "D", "E"]):
+        board[reel][2] = gamestate.create_symbol(name)
+    board[4][3] = gamestate.create_symbol("F")
+
+    windata = Scatter.get_scatterpay_wins(config, board)
+
+    overlays = [(win["meta"]["overlay"]["reel"], win["meta"]["overlay"]["row"]) for win in windata["wins"]]
+    assert overlays == [(0, 2), (0, 0), (0, 0), (0, 0), (0, 0), (0, 0)]
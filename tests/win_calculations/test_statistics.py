@@ -0,0 +1,49 @@
+"""Test cached distribution samplers against a linear cumulative scan."""
+
+import random
+import numpy as np
+from src.calculations.statistics import get_random_outcome, get_sampler, clear_samplers
+
+
+def linear_scan_outcome(distribution):
+    roll = random.uniform(0, sum(distribution.values()))
+    cumulative = 0.0
+    for value, weight in distribution.items():
+        cumulative += weight
+        if cumulative >= roll:
+            return value
+
+
+def test_cached_draws_match_linear_scan():
+    distributions = [
+        {"BR0": 1},
+        {1: 100, 2: 50, 3: 0, 5: 10, 10: 0},
+        {2: 0.3, 3: 0.25, 4: 0.2, 5: 0.15, 10: 0.1},
+        {0: 0, 1: 7, 2: 3},
+    ]
+    for seed in range(200):
+        for distribution in distributions:
+            random.seed(seed)
+            expected = [linear_scan_outcome(distribution) for _ in range(5)]
+            random.seed(seed)
+            assert [get_random_outcome(distribution) for _ in range(5)] == expected
+            random.seed(seed)
+            assert get_sampler(distribution).sample(5) == expected
+
+
+def test_sampler_cache_invalidation():
+    distribution = {"a": 1, "b": 0}
+    assert get_random_outcome(distribution) == "a"
+    assert get_sampler(distribution) is get_sampler(distribution)
+    assert get_random_outcome({"a": 0, "b": 1}) == "b"
+
+    distribution["a"], distribution["b"] = 0, 1
+    assert get_random_outcome(distribution) == "a"
+    clear_samplers(distribution)
+    assert get_random_outcome(distribution) == "b"
+
+
+def test_vectorized_sample_frequencies():
+    sampler = get_sampler({1: 1, 2: 3})
+    draws = sampler.sample(40000, rng=np.random.default_rng(7))
+    assert abs(draws.count(2) / len(draws) - 0.75) < 0.01
@@ -0,0 +1,90 @@
+"""Test symbol prototypes and copy-on-write attributes."""
+
+from copy import deepcopy
+import numpy as np
+from src.calculations.symbol import Symbol, SymbolStorage, get_attribute_mask, get_board_arrays
+from src.config.runtime import get_runtime_config, recompile_runtime_config
+from src.events.events import json_ready_sym
+
+
+class SymbolConfig:
+    def __init__(self):
+        self.paytable = {(3, "H1"): 5, (4, "H1"): 10, (3, "W"): 20}
+        self.special_symbols = {"wild": ["W"], "scatter": ["S"], "multiplier": ["W"]}
+
+
+def test_prototype_properties():
+    storage = SymbolStorage(SymbolConfig(), ["H1", "W", "S"])
+    wild = storage.create_symbol_state("W")
+    assert wild.special and wild.wild and wild.multiplier is True
+    assert wild.paytable == [{"3": 20}]
+    h1 = storage.create_symbol_state("H1")
+    assert not h1.special and h1.is_paying and not hasattr(h1, "wild")
+    scatter = storage.create_symbol_state("S")
+    assert scatter.check_attribute("scatter") and not scatter.is_paying and scatter.paytable is None
+
+
+def test_attribute_writes_do_not_leak_to_prototype():
+    storage = SymbolStorage(SymbolConfig(), ["H1", "W"])
+    wild = storage.create_symbol_state("W")
+    wild.assign_attribute({"multiplier": 3})
+    h1 = storage.create_symbol_state("H1")
+    h1.explode = True
+    assert wild.multiplier == 3 and h1.explode
+    assert storage.create_symbol_state("W").multiplier is True
+    assert not hasattr(storage.create_symbol_state("H1"), "explode")
+
+    copied = deepcopy(wild)
+    copied.multiplier = 5
+    assert wild.multiplier == 3 and copied.prototype is wild.prototype
+
+
+def test_symbols_share_cached_storage():
+    config = SymbolConfig()
+    first, second = Symbol(config, "W"), Symbol(config, "W")
+    assert first.prototype is second.prototype and first.wild and first.paytable == [{"3": 20}]
+    first.multiplier = 3
+    assert second.multiplier is True
+
+    config.paytable[(5, "W")] = 50
+    recompile_runtime_config(config)
+    assert Symbol(config, "W").paytable == [{"3": 20}, {"5": 50}]
+
+
+def test_json_ready_symbol_keeps_attribute_order():
+    storage = SymbolStorage(SymbolConfig(), ["W"])
+    wild = storage.create_symbol_state("W")
+    wild.assign_attribute({"multiplier": 2})
+    special_attributes = list(SymbolConfig().special_symbols.keys())
+    assert list(json_ready_sym(wild, special_attributes).items()) == [("name", "W"), ("wild", True), ("multiplier", 2)]
+
+
+def test_attribute_flags_match_attribute_values():
+    storage = SymbolStorage(SymbolConfig(), ["H1", "W", "S"])
+    wild, h1 = storage.create_symbol_state("W"), storage.create_symbol_state("H1")
+    assert wild.flags & get_attribute_mask("wild") and not h1.flags & get_attribute_mask("wild")
+    assert wild.check_attribute("scatter", "wild") and not h1.check_attribute("scatter", "wild")
+
+    h1.assign_attribute({"prize": 0})
+    assert h1.check_attribute("prize")
+    h1.explode = True
+    assert h1.check_attribute("explode")
+    h1.explode = False
+    assert not h1.check_attribute("explode") and h1.get_attribute("explode") is False
+    assert h1.check_attribute("name") and h1.check_attribute("special") is False
+    assert wild.check_attribute("special")
+
+
+def test_board_arrays():
+    config = SymbolConfig()
+    storage = SymbolStorage(config, ["H1", "W", "S"])
+    board = [[storage.create_symbol_state(name) for name in reel] for reel in [["H1", "W"], ["S", "H1", "W"]]]
+    board[1][2].multiplier = 4
+    symbol_ids, multipliers, flags = get_board_arrays(board)
+    assert symbol_ids.dtype == np.int16 and symbol_ids.shape == (2, 3)
+    assert [[get_runtime_config(config).symbol_names[i] if i >= 0 else None for i in reel] for reel in symbol_ids] == [
+        ["H1", "W", None],
+        ["S", "H1", "W"],
+    ]
+    assert multipliers.tolist() == [[0, 0, 0], [0, 0, 4]]
+    assert flags[1, 0] & get_attribute_mask("scatter") and not flags[0, 0]
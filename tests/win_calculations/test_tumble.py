@@ -0,0 +1,105 @@
+"""Test tumble board refills."""
+
+import random
+from copy import copy
+import pytest
+from tests.win_calculations.game_test_config import GamestateTest
+from src.calculations.tumble import Tumble
+from src.calculations.symbol import get_attribute_mask
+
+
+class GameTumbleConfig:
+    """Testing game functions"""
+
+    def __init__(self, include_padding: bool):
+        self.game_id = "0_test_class"
+        self.rtp = 0.9700
+
+        # Game Dimensions
+        self.num_reels = 5
+        self.num_rows = [3, 4, 5, 4, 3]
+        self.include_padding = include_padding
+        # Board and Symbol Properties
+        self.paytable = {(5, "H1"): 10, (5, "H2"): 5, (5, "L1"): 2}
+        self.special_symbols = {"wild": ["W", "WM"], "scatter": ["S"], "multiplier": ["WM"]}
+        rng = random.Random(7)
+        self.reels = {
+            "BR0": [[rng.choice(["H1", "H2", "L1", "L1", "W", "WM", "S"]) for _ in range(17)] for _ in range(5)]
+        }
+        self.anticipation_triggers = {"basegame": 99}
+        self.bet_modes = []
+        self.basegame_type = "basegame"
+        self.freegame_type = "freegame"
+
+
+class TumbleGamestateTest(GamestateTest, Tumble):
+    """Testing gamestate with tumble actions."""
+
+
+def reference_tumble(gamestate):
+    """Previous tumble implementation, inserting refills reel by reel and rescanning the board."""
+    static_board = copy(gamestate.board)
+    gamestate.new_symbols_from_tumble = [[] for _ in range(len(static_board))]
+    explode_mask = get_attribute_mask("explode")
+    for reel, _ in enumerate(static_board):
+        copy_reel = list(static_board[reel])
+        exploding_symbols = sum(1 for x in static_board[reel] if x.flags & explode_mask)
+        for i in range(exploding_symbols):
+            reel_pos = (gamestate.reel_positions[reel] - 1) % len(gamestate.reelstrip[reel])
+            gamestate.reel_positions[reel] = reel_pos
+            if i == 0 and gamestate.config.include_padding:
+                insert_sym = gamestate.top_symbols[reel]
+            else:
+                insert_sym = gamestate.create_symbol(gamestate.reelstrip[reel][reel_pos])
+                gamestate.new_symbols_from_tumble[reel].insert(0, insert_sym)
+            copy_reel.insert(0, insert_sym)
+        static_board[reel] = [sym for sym in copy_reel if not (sym.flags & explode_mask)]
+        if gamestate.config.include_padding and exploding_symbols > 0:
+            reel_pos = (gamestate.reel_positions[reel] - 1) % len(gamestate.reelstrip[reel])
+            gamestate.top_symbols[reel] = gamestate.create_symbol(gamestate.reelstrip[reel][reel_pos])
+            gamestate.new_symbols_from_tumble[reel].insert(0, gamestate.top_symbols[reel])
+    gamestate.board = static_board
+    gamestate.get_special_symbols_on_board()
+
+
+def create_tumble_gamestate(include_padding: bool, stops: list):
+    """Boilerplate gamestate with a board drawn from the test reelstrip."""
+    gamestate = TumbleGamestateTest(GameTumbleConfig(include_padding))
+    gamestate.create_symbol_map()
+    gamestate.assign_special_sym_function()
+    gamestate.gametype = "basegame"
+    gamestate.create_board_from_stops("BR0", list(stops))
+    return gamestate
+
+
+def names(symbols: list) -> list:
+    return [sym.name for sym in symbols]
+
+
+@pytest.mark.parametrize("include_padding", [True, False])
+def test_tumble_matches_reference(include_padding):
+    rng = random.Random(11)
+    stops = [rng.randrange(17) for _ in range(5)]
+    gamestate = create_tumble_gamestate(include_padding, stops)
+    reference = create_tumble_gamestate(include_padding, stops)
+    for _ in range(40):
+        for reel, symbols in enumerate(gamestate.board):
+            for row, sym in enumerate(symbols):
+                if rng.random() < 0.3:
+                    sym.explode = True
+                    reference.board[reel][row].explode = True
+        before = [names(symbols) for symbols in gamestate.board]
+
+        gamestate.tumble_board()
+        reference_tumble(reference)
+
+        assert [names(symbols) for symbols in gamestate.board] == [names(symbols) for symbols in reference.board]
+        assert [names(symbols) for symbols in gamestate.new_symbols_from_tumble] == [
+            names(symbols) for symbols in reference.new_symbols_from_tumble
+        ]
+        assert gamestate.reel_positions == reference.reel_positions
+        assert gamestate.special_syms_on_board == reference.special_syms_on_board
+        assert [names(symbols) for symbols in gamestate.board_before_tumble] == before
+        if include_padding:
+            assert names(gamestate.top_symbols) == names(reference.top_symbols)
+        assert [len(symbols) for symbols in gamestate.board] == gamestate.config.num_rows
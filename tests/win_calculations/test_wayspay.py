@@ -1,8 +1,12 @@
 """Test basic ways-calculation functionality."""
 
+import random
+import numpy as np
 import pytest
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.ways import Ways
+from src.calculations.symbol import get_board_arrays
+from src.config.runtime import get_runtime_config
 
 
 class GameWaysConfig:
@@ -136,3 +140,41 @@ def test_global_multiplier_strategy(gamestate):
     expected_win = base_win * global_mult
 
     assert windata["totalWin"] == expected_win, f"Expected {expected_win}, got {windata['totalWin']}"
+
+
+def test_ways_batch_matches_get_ways_data(gamestate):
+    """Batch evaluation of int-coded boards matches get_ways_data for every multiplier strategy."""
+    rng = random.Random(3)
+    boards = []
+    for _ in range(200):
+        for idx, _ in enumerate(gamestate.board):
+            for idy, _ in enumerate(gamestate.board[idx]):
+                sym = gamestate.create_symbol(rng.choice(["H1", "H1", "H2", "W", "X"]))
+                if sym.name in ["W", "H1"] and rng.random() < 0.3:
+                    sym.assign_attribute({"multiplier": rng.choice([1, 2, 3])})
+                gamestate.board[idx][idy] = sym
+        boards.append([list(reel) for reel in gamestate.board])
+    arrays = [get_board_arrays(board) for board in boards]
+    symbol_ids, multipliers, flags = (np.stack([array[i] for array in arrays]) for i in range(3))
+
+    for strategy in ["symbol", "board", "global"]:
+        expected = [
+            Ways.get_ways_data(gamestate.config, board, global_multiplier=3, multiplier_strategy=strategy)
+            for board in boards
+        ]
+        totals = Ways.get_ways_batch(
+            symbol_ids, flags, multipliers, gamestate.config, global_multiplier=3, multiplier_strategy=strategy
+        )
+        assert totals == pytest.approx([win_data["totalWin"] for win_data in expected])
+        assert sum(totals) > 0
+
+        kinds, ways, symbol_mults, _, _ = Ways.evaluate_ways(
+            symbol_ids, flags, multipliers, gamestate.config, multiplier_strategy=strategy
+        )
+        runtime = get_runtime_config(gamestate.config)
+        for board, win_data in enumerate(expected):
+            for win in win_data["wins"]:
+                symbol_id = runtime.get_symbol_id(win["symbol"])
+                assert kinds[board, symbol_id] == win["kind"]
+                assert ways[board, symbol_id] == win["meta"]["ways"]
+                assert symbol_mults[board, symbol_id] == win["meta"]["symbolMult"]
@@ -0,0 +1,51 @@
+"""Test streamed book output."""
+
+import os
+import json
+import pytest
+import zstandard as zstd
+from src.write_data.write_data import BookWriter
+
+
+def create_books(num_books):
+    books = {}
+    for sim in range(num_books):
+        books[sim + 1] = {
+            "id": sim + 1,
+            "payoutMultiplier": sim * 10,
+            "events": [{"index": 0, "type": "reveal", "board": [["H1", "L2"]]}, {"index": 1, "type": "finalWin"}],
+            "criteria": "basegame",
+            "baseGameWins": 0.1 * sim,
+            "freeGameWins": 0.0,
+        }
+    return books
+
+
+def read_file(filename):
+    with open(filename, "rb") as f:
+        if filename.endswith(".zst"):
+            return zstd.ZstdDecompressor().stream_reader(f).read()
+        return f.read()
+
+
+@pytest.mark.parametrize("extension,regular_json", [(".jsonl.zst", False), (".jsonl", False), (".json", True)])
+@pytest.mark.parametrize("num_books", [0, 1, 5])
+def test_streamed_books_match_library_json(tmp_path, extension, regular_json, num_books):
+    library = create_books(num_books)
+    streamed_name = os.path.join(tmp_path, "streamed" + extension)
+    if regular_json:
+        expected = json.dumps(list(library.values()))
+    else:
+        expected = "\n".join(json.dumps(book) for book in library.values()) + "\n"
+
+    writer = BookWriter(streamed_name, output_regular_json=regular_json, track_events=True)
+    for book in library.values():
+        writer.write_book(book)
+    writer.close()
+
+    assert read_file(streamed_name) == expected.encode("UTF-8")
+    if num_books > 0:
+        assert writer.event_items == {
+            "reveal": {"type": "reveal", "board": [["H1", "L2"]]},
+            "finalWin": {"type": "finalWin"},
+        }
@@ -0,0 +1,23 @@
+"""Test merging and reporting of per-criteria rejection costs."""
+
+import os
+from src.write_data.write_data import merge_criteria_stats, make_criteria_cost_table
+
+
+def test_merge_and_report(tmp_path):
+    chunk_a = {
+        "basegame": {"accepted": 3, "attempts": 9, "max_repeats": 5, "time": 0.25},
+        "0": {"accepted": 2, "attempts": 2, "max_repeats": 1, "time": 0.25},
+    }
+    chunk_b = {"basegame": {"accepted": 1, "attempts": 7, "max_repeats": 7, "time": 0.5}}
+    merged = merge_criteria_stats([chunk_a, chunk_b])
+    assert merged["basegame"] == {"accepted": 4, "attempts": 16, "max_repeats": 7, "time": 0.75}
+    assert merged["0"]["accepted"] == 2
+
+    name = os.path.join(str(tmp_path), "criteriaCost_base.csv")
+    make_criteria_cost_table(merged, name)
+    with open(name, "r", encoding="UTF-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith("criteria,accepted,attempts,rejected,mean_repeats")
+    assert lines[1] == "basegame,4,16,12,4.0,7,0.75,0.1875,0.75"
+    assert lines[2].startswith("0,2,2,0,1.0,1,")
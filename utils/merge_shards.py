@@ -0,0 +1,32 @@
+"""
+Combine shard bundles produced by create_books(..., shard=(index, num_shards)) into the final library files.
+
+Usage: python3 utils/merge_shards.py <game_directory> <bundle_directory> [<bundle_directory> ...]
+Example: python3 utils/merge_shards.py games/0_0_lines node0/shard_0_of_2 node1/shard_1_of_2
+"""
+
+import os
+import sys
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python3 utils/merge_shards.py <game_directory> <bundle_directory> [<bundle_directory> ...]")
+        sys.exit(1)
+
+    game_dir = os.path.abspath(sys.argv[1])
+    bundle_paths = [os.path.abspath(path) for path in sys.argv[2:]]
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, game_dir)
+
+    from gamestate import GameState
+    from game_config import GameConfig
+    from src.state.shards import merge_shard_bundles
+
+    config = GameConfig()
+    gamestate = GameState(config)
+    merge_shard_bundles(gamestate, bundle_paths)
+
+
+if __name__ == "__main__":
+    main()